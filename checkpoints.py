@@ -0,0 +1,70 @@
+"""
+Stage-level checkpoints for the training pipeline
+Each completed stage (sampled rows, fitted scaler, QGA generations, trained
+models) is saved under a directory named by a hash of every setting that
+influences it. Stages derive from each other, so changing e.g. a model
+hyperparameter keeps the sample and QGA checkpoints but not the models.
+A rerun with the same settings resumes after the last completed stage.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import joblib
+
+
+def config_hash(config):
+    text = json.dumps(config, sort_keys=True, default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class Checkpoints:
+    def __init__(self, root, config, parent=None, enabled=True):
+        self.root = root
+        self.config = config
+        self.parent = parent
+        self.enabled = enabled
+        self.key = config_hash({"parent": parent.key if parent else None, "config": config})
+        self.path = os.path.join(root, self.key)
+
+    def derive(self, config):
+        """Checkpoints for a later stage that also depends on `config`."""
+        return Checkpoints(self.root, config, parent=self, enabled=self.enabled)
+
+    def _file(self, stage):
+        return os.path.join(self.path, f"{stage}.pkl")
+
+    def has(self, stage):
+        return self.enabled and os.path.exists(self._file(stage))
+
+    def load(self, stage, default=None):
+        if not self.has(stage):
+            return default
+        try:
+            return joblib.load(self._file(stage))
+        except Exception:
+            print(f"⚠ Ignoring unreadable checkpoint '{self._file(stage)}'")
+            return default
+
+    def save(self, stage, obj):
+        if not self.enabled:
+            return
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, "config.json"), "w") as f:
+                json.dump({"parent": self.parent.key if self.parent else None, "config": self.config},
+                          f, indent=2, sort_keys=True, default=repr)
+        # Write then rename, so a kill mid-dump never leaves a truncated checkpoint behind.
+        tmp = f"{self._file(stage)}.tmp{os.getpid()}"
+        joblib.dump(obj, tmp)
+        os.replace(tmp, self._file(stage))
+
+    def clear(self):
+        """Remove this stage's checkpoints and those of the stages it derives from."""
+        node = self
+        while node is not None:
+            shutil.rmtree(node.path, ignore_errors=True)
+            node = node.parent
+        if os.path.isdir(self.root) and not os.listdir(self.root):
+            os.rmdir(self.root)
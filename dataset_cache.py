@@ -0,0 +1,226 @@
+"""
+Columnar cache for the WUSTL-IIoT CSV
+The CSV is parsed once (in chunks) into one .npy file per numeric column with
+the most compact dtype that stores every value exactly. Later runs memory-map
+only the numeric feature columns and Target instead of re-parsing the CSV.
+
+The cache is keyed by the source's size, mtime and SHA-256: if only the mtime
+changed the file is re-hashed and the cache kept when the content is unchanged.
+"""
+
+import hashlib
+import json
+import os
+import time
+import numpy as np
+
+CSV_FILE = "wustl_iiot_2021.csv"
+TARGET_COL = "Target"
+CACHE_VERSION = 1
+CHUNK_ROWS = 200_000
+
+INT_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def file_sha256(path, block_size=8 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+def default_cache_dir(csv_path):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), ".dataset_cache", stem)
+
+
+class ColumnarDataset:
+    def __init__(self, cache_dir, manifest, columns=None):
+        self.cache_dir = cache_dir
+        self.manifest = manifest
+        self.n_rows = manifest["n_rows"]
+        self.feature_names = [c for c in manifest["columns"] if c != TARGET_COL]
+        self._columns = {}
+        for name in columns or manifest["columns"]:
+            self._columns[name] = np.load(self._column_path(name), mmap_mode="r")
+
+    def _column_path(self, name):
+        return os.path.join(self.cache_dir, self.manifest["files"][name])
+
+    def column(self, name):
+        if name not in self._columns:
+            self._columns[name] = np.load(self._column_path(name), mmap_mode="r")
+        return self._columns[name]
+
+    @property
+    def target(self):
+        return self.column(TARGET_COL)
+
+    def feature_matrix(self, rows=None, dtype=np.float64, columns=None, order="C"):
+        """Gather feature columns (optionally only `rows`) into one contiguous matrix (C or Fortran order)."""
+        columns = columns or self.feature_names
+        n = self.n_rows if rows is None else len(rows)
+        X = np.empty((n, len(columns)), dtype=dtype, order=order)
+        for j, name in enumerate(columns):
+            col = self.column(name)
+            X[:, j] = col if rows is None else col[rows]
+        return X
+
+    def to_frame(self, rows=None, feature_dtype=None):
+        """Numeric features + Target as a DataFrame, in CSV column order."""
+        import pandas as pd
+        data = {}
+        for name in self.manifest["columns"]:
+            col = self.column(name)
+            col = col if rows is None else col[rows]
+            if feature_dtype is not None and name != TARGET_COL:
+                col = col.astype(feature_dtype)
+            data[name] = np.asarray(col)
+        return pd.DataFrame(data)
+
+
+def _compact_dtype(stats):
+    if stats["kind"] == "i":
+        for dtype in INT_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= stats["min"] and stats["max"] <= info.max:
+                return np.dtype(dtype)
+    return np.dtype(np.float32 if stats["float32_exact"] else np.float64)
+
+
+def _scan(csv_path, chunksize):
+    import pandas as pd
+    order, stats, n_rows = [], {}, 0
+    non_numeric = set()
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, low_memory=False):
+        if not order:
+            order = list(chunk.columns)
+        n_rows += len(chunk)
+        for name in order:
+            if name in non_numeric:
+                continue
+            col = chunk[name]
+            if not (pd.api.types.is_numeric_dtype(col) or pd.api.types.is_bool_dtype(col)):
+                non_numeric.add(name)
+                stats.pop(name, None)
+                continue
+            values = col.to_numpy()
+            s = stats.setdefault(name, {"kind": "i", "min": 0, "max": 0, "float32_exact": True, "seen": False})
+            if values.dtype.kind == "f":
+                s["kind"] = "f"
+                finite = values[~np.isnan(values)]
+                if s["float32_exact"] and not np.array_equal(finite.astype(np.float32).astype(values.dtype), finite):
+                    s["float32_exact"] = False
+            else:
+                values = values.astype(np.int64)
+                finite = values
+                if s["float32_exact"] and len(finite) and np.abs(finite).max() > 2 ** 24:
+                    s["float32_exact"] = False
+            if len(finite):
+                lo, hi = finite.min().item(), finite.max().item()
+                s["min"] = lo if not s["seen"] else min(s["min"], lo)
+                s["max"] = hi if not s["seen"] else max(s["max"], hi)
+                s["seen"] = True
+
+    numeric = [c for c in order if c in stats]
+    return numeric, {c: _compact_dtype(stats[c]) for c in numeric}, n_rows
+
+
+def build_cache(csv_path=CSV_FILE, cache_dir=None, chunksize=CHUNK_ROWS):
+    import pandas as pd
+    cache_dir = cache_dir or default_cache_dir(csv_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    print(f"Building columnar cache for '{csv_path}' in '{cache_dir}'...")
+    t0 = time.time()
+
+    st = os.stat(csv_path)
+    sha = file_sha256(csv_path)
+    columns, dtypes, n_rows = _scan(csv_path, chunksize)
+
+    files = {name: f"col_{i:03d}.npy" for i, name in enumerate(columns)}
+    outputs = {name: np.lib.format.open_memmap(os.path.join(cache_dir, files[name]), mode="w+",
+                                               dtype=dtypes[name], shape=(n_rows,))
+               for name in columns}
+    start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, usecols=columns, low_memory=False):
+        stop = start + len(chunk)
+        for name in columns:
+            outputs[name][start:stop] = chunk[name].to_numpy()
+        start = stop
+    for out in outputs.values():
+        out.flush()
+    del outputs
+
+    manifest = {
+        "version": CACHE_VERSION,
+        "source": os.path.abspath(csv_path),
+        "size": st.st_size,
+        "mtime": st.st_mtime,
+        "sha256": sha,
+        "n_rows": n_rows,
+        "columns": columns,
+        "dtypes": {name: dtypes[name].str for name in columns},
+        "files": files,
+    }
+    with open(os.path.join(cache_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"[OK] Cached {n_rows} rows x {len(columns)} numeric columns in {time.time() - t0:.1f}s")
+    return manifest
+
+
+def _valid_manifest(csv_path, cache_dir, verify_hash=False):
+    path = os.path.join(cache_dir, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+
+    st = os.stat(csv_path)
+    if manifest.get("version") != CACHE_VERSION or manifest.get("size") != st.st_size:
+        return None
+    if TARGET_COL not in manifest["columns"]:
+        return None
+    if verify_hash or manifest.get("mtime") != st.st_mtime:
+        if file_sha256(csv_path) != manifest.get("sha256"):
+            return None
+        # Same content, only touched: remember the new mtime.
+        manifest["mtime"] = st.st_mtime
+        with open(path, "w") as f:
+            json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_dataset(csv_path=CSV_FILE, cache_dir=None, verify_hash=False, rebuild=False, chunksize=CHUNK_ROWS):
+    """Memory-mapped numeric columns + Target of `csv_path`, building the cache if needed."""
+    cache_dir = cache_dir or default_cache_dir(csv_path)
+    manifest = None if rebuild else _valid_manifest(csv_path, cache_dir, verify_hash)
+    if manifest is None:
+        manifest = build_cache(csv_path, cache_dir, chunksize)
+        if TARGET_COL not in manifest["columns"]:
+            raise RuntimeError(f"Target column '{TARGET_COL}' not found in CSV.")
+    else:
+        print(f"[OK] Using columnar cache '{cache_dir}' ({manifest['n_rows']} rows)")
+    return ColumnarDataset(cache_dir, manifest)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or inspect the columnar dataset cache")
+    parser.add_argument("csv", nargs="?", default=CSV_FILE)
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument("--verify-hash", action="store_true")
+    args = parser.parse_args()
+
+    t0 = time.time()
+    ds = load_dataset(args.csv, args.cache_dir, args.verify_hash, args.rebuild)
+    print(f"Loaded in {time.time() - t0:.2f}s: {ds.n_rows} rows, {len(ds.feature_names)} features")
+    for name in ds.manifest["columns"]:
+        print(f"  {name:<20} {ds.manifest['dtypes'][name]}")
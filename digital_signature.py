@@ -1,30 +1,59 @@
 import os
 import json
 import base64
+import threading
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.backends import default_backend
 
+# Padding/hash objects are immutable, so one shared instance is safe across threads.
+PSS_PADDING = padding.PSS(
+    mgf=padding.MGF1(hashes.SHA256()),
+    salt_length=padding.PSS.MAX_LENGTH
+)
+
 
 class DigitalSignatureManager:
     def __init__(self, private_key_path=None, public_key_path=None, key_size=2048):
         self.private_key_path = private_key_path or "private_key.pem"
         self.public_key_path = public_key_path or "public_key.pem"
         self.key_size = key_size
-        self.private_key = None
-        self.public_key = None
+        # (private_key, public_key) is replaced as a whole so readers always see a consistent pair.
+        self._keys = (None, None)
+        self._lock = threading.RLock()
+
+    @property
+    def private_key(self):
+        return self._keys[0]
+
+    @private_key.setter
+    def private_key(self, key):
+        with self._lock:
+            self._keys = (key, self._keys[1])
+
+    @property
+    def public_key(self):
+        return self._keys[1]
+
+    @public_key.setter
+    def public_key(self, key):
+        with self._lock:
+            self._keys = (self._keys[0], key)
 
     def generate_keys(self, save=True):
         print(f"Generating RSA-{self.key_size} key pair...")
-        self.private_key = rsa.generate_private_key(
+        private_key = rsa.generate_private_key(
             public_exponent=65537,
             key_size=self.key_size,
             backend=default_backend()
         )
-        self.public_key = self.private_key.public_key()
+        
+        with self._lock:
+            self._keys = (private_key, private_key.public_key())
+            if save:
+                self.save_keys()
         
         if save:
-            self.save_keys()
             print(f"[OK] Keys saved to {self.private_key_path} and {self.public_key_path}")
         else:
             print("[OK] Keys generated (not saved)")
@@ -32,16 +61,17 @@ class DigitalSignatureManager:
         return self.private_key, self.public_key
 
     def save_keys(self):
-        if self.private_key is None:
+        private_key, public_key = self._keys
+        if private_key is None:
             raise RuntimeError("Private key not initialized. Call generate_keys() first.")
         
-        private_pem = self.private_key.private_bytes(
+        private_pem = private_key.private_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PrivateFormat.PKCS8,
             encryption_algorithm=serialization.NoEncryption()
         )
         
-        public_pem = self.public_key.public_bytes(
+        public_pem = public_key.public_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PublicFormat.SubjectPublicKeyInfo
         )
@@ -49,38 +79,61 @@ class DigitalSignatureManager:
         os.makedirs(os.path.dirname(self.private_key_path) or ".", exist_ok=True)
         os.makedirs(os.path.dirname(self.public_key_path) or ".", exist_ok=True)
         
-        with open(self.private_key_path, "wb") as f:
-            f.write(private_pem)
-        
-        with open(self.public_key_path, "wb") as f:
-            f.write(public_pem)
+        with self._lock:
+            with open(self.private_key_path, "wb") as f:
+                f.write(private_pem)
+            
+            with open(self.public_key_path, "wb") as f:
+                f.write(public_pem)
 
     def load_private_key(self):
         if not os.path.exists(self.private_key_path):
             raise FileNotFoundError(f"Private key not found at {self.private_key_path}")
         
-        with open(self.private_key_path, "rb") as f:
-            self.private_key = serialization.load_pem_private_key(
-                f.read(),
-                password=None,
-                backend=default_backend()
-            )
-        self.public_key = self.private_key.public_key()
-        return self.private_key
+        with self._lock:
+            with open(self.private_key_path, "rb") as f:
+                private_key = serialization.load_pem_private_key(
+                    f.read(),
+                    password=None,
+                    backend=default_backend()
+                )
+            self._keys = (private_key, private_key.public_key())
+        return private_key
 
     def load_public_key(self):
         if not os.path.exists(self.public_key_path):
             raise FileNotFoundError(f"Public key not found at {self.public_key_path}")
         
-        with open(self.public_key_path, "rb") as f:
-            self.public_key = serialization.load_pem_public_key(
-                f.read(),
-                backend=default_backend()
-            )
-        return self.public_key
+        with self._lock:
+            with open(self.public_key_path, "rb") as f:
+                public_key = serialization.load_pem_public_key(
+                    f.read(),
+                    backend=default_backend()
+                )
+            self._keys = (self._keys[0], public_key)
+        return public_key
+
+    def load_keys(self):
+        """Read both PEM files, then swap in the pair at once so no caller sees a mixed pair."""
+        for path in (self.private_key_path, self.public_key_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Key not found at {path}")
+        
+        with self._lock:
+            with open(self.private_key_path, "rb") as f:
+                private_pem = f.read()
+            with open(self.public_key_path, "rb") as f:
+                public_pem = f.read()
+        
+        private_key = serialization.load_pem_private_key(private_pem, password=None, backend=default_backend())
+        public_key = serialization.load_pem_public_key(public_pem, backend=default_backend())
+        with self._lock:
+            self._keys = (private_key, public_key)
+        return private_key, public_key
 
     def sign_data(self, data):
-        if self.private_key is None:
+        private_key = self.private_key
+        if private_key is None:
             raise RuntimeError("Private key not loaded. Call load_private_key() first.")
         
         if isinstance(data, dict):
@@ -90,12 +143,9 @@ class DigitalSignatureManager:
         else:
             data_bytes = bytes(data)
         
-        signature = self.private_key.sign(
+        signature = private_key.sign(
             data_bytes,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
+            PSS_PADDING,
             hashes.SHA256()
         )
         
@@ -103,7 +153,8 @@ class DigitalSignatureManager:
         return signature_b64
 
     def verify_signature(self, data, signature_b64):
-        if self.public_key is None:
+        public_key = self.public_key
+        if public_key is None:
             raise RuntimeError("Public key not loaded. Call load_public_key() first.")
         
         if isinstance(data, dict):
@@ -115,13 +166,10 @@ class DigitalSignatureManager:
         
         try:
             signature = base64.b64decode(signature_b64)
-            self.public_key.verify(
+            public_key.verify(
                 signature,
                 data_bytes,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH
-                ),
+                PSS_PADDING,
                 hashes.SHA256()
             )
             return True
@@ -0,0 +1,142 @@
+"""
+Single-pass evaluation of binary classifiers
+One predict_proba pass per model: labels come from thresholding P(class 1),
+and Accuracy, Precision, Recall and F1 all come from one confusion matrix.
+Scores are also binned into a fixed histogram per class, which gives
+ROC-AUC and the ROC curve without sorting. Test sets up to
+AUC_EXACT_MAX_ROWS keep their scores for the exact (rank-based) ROC-AUC.
+Larger ones use the histogram, whose error is at most half the share of
+positive/negative pairs that fall into the same bin.
+
+The evaluator can be updated chunk by chunk (out_of_core.py), and
+save_plot_data writes every model's confusion matrix and ROC curve points
+next to model_comparison.csv for the plotting scripts. predict_latency_ms
+times single-row predictions for the accuracy/latency tradeoff.
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+
+THRESHOLD = 0.5  # P(class 1) above this is predicted as class 1
+AUC_BINS = 1 << 16  # score histogram resolution
+AUC_EXACT_MAX_ROWS = 250_000  # test sets up to this size get the exact ROC-AUC
+ROC_POINTS = 500  # ROC curve points saved per model
+LATENCY_REPEATS = 100  # single-row predictions timed per model
+
+CONFUSION_FILE = "confusion_matrices.csv"
+ROC_FILE = "roc_curves.csv"
+
+
+class BinaryEvaluator:
+    """Confusion matrix and score histograms accumulated over (y, P(class 1)) batches."""
+
+    def __init__(self, threshold=THRESHOLD, n_bins=AUC_BINS, exact_max_rows=AUC_EXACT_MAX_ROWS):
+        self.threshold = threshold
+        self.n_bins = n_bins
+        self.exact_max_rows = exact_max_rows
+        self.confusion = np.zeros((2, 2), dtype=np.int64)  # rows: true 0/1, columns: predicted 0/1
+        self.histogram = np.zeros((2, n_bins), dtype=np.int64)  # score counts of negatives, positives
+        self.n_rows = 0
+        self._exact = ([], [])
+
+    def update(self, y, proba):
+        y = np.asarray(y).astype(np.intp, copy=False)
+        proba = np.asarray(proba, dtype=np.float64)
+        if len(y) and (y.min() < 0 or y.max() > 1):
+            raise ValueError("BinaryEvaluator expects 0/1 labels")
+        y_pred = (proba > self.threshold).astype(np.intp)
+        self.confusion += np.bincount(2 * y + y_pred, minlength=4).reshape(2, 2)
+        bins = np.clip((proba * self.n_bins).astype(np.intp), 0, self.n_bins - 1)
+        self.histogram += np.bincount(y * self.n_bins + bins, minlength=2 * self.n_bins).reshape(2, self.n_bins)
+        self.n_rows += len(y)
+        if self._exact is not None:
+            if self.n_rows <= self.exact_max_rows:
+                self._exact[0].append(y.copy())
+                self._exact[1].append(proba.copy())
+            else:
+                self._exact = None
+        return self
+
+    def roc_auc(self):
+        neg, pos = self.histogram
+        n_neg, n_pos = neg.sum(), pos.sum()
+        if n_neg == 0 or n_pos == 0:
+            return float("nan")
+        if self._exact is not None:
+            return float(roc_auc_score(np.concatenate(self._exact[0]), np.concatenate(self._exact[1])))
+        # P(score_pos > score_neg) + 0.5 P(same bin): negatives in lower bins, half of those alongside
+        neg_below = np.cumsum(neg) - neg
+        return float(np.dot(pos, neg_below + 0.5 * neg) / (n_pos * n_neg))
+
+    def metrics(self):
+        (tn, fp), (fn, tp) = self.confusion.tolist()
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        return {
+            "Accuracy": (tp + tn) / self.n_rows if self.n_rows else float("nan"),
+            "Precision": precision,
+            "Recall": recall,
+            "F1": 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0,
+            "ROC-AUC": self.roc_auc(),
+        }
+
+    def roc_curve(self, max_points=ROC_POINTS):
+        """(FPR, TPR, threshold) at histogram bin edges, highest threshold first, thinned to max_points."""
+        neg, pos = self.histogram[:, ::-1]
+        keep = np.flatnonzero(neg + pos)
+        fpr = np.cumsum(neg)[keep] / max(neg.sum(), 1)
+        tpr = np.cumsum(pos)[keep] / max(pos.sum(), 1)
+        thresholds = (self.n_bins - 1 - keep) / self.n_bins
+        if len(keep) > max_points:
+            pick = np.unique(np.linspace(0, len(keep) - 1, max_points).round().astype(int))
+            fpr, tpr, thresholds = fpr[pick], tpr[pick], thresholds[pick]
+        return pd.DataFrame({"FPR": np.r_[0.0, fpr], "TPR": np.r_[0.0, tpr], "Threshold": np.r_[1.0, thresholds]})
+
+
+def positive_proba(model, X):
+    return model.predict_proba(X)[:, 1]
+
+
+def evaluate(model, X, y, chunk_rows=None, evaluator=None):
+    """One predict_proba pass over X (optionally chunk by chunk); returns the BinaryEvaluator."""
+    evaluator = evaluator or BinaryEvaluator()
+    if chunk_rows is None:
+        return evaluator.update(y, positive_proba(model, X))
+    for start in range(0, len(y), chunk_rows):
+        evaluator.update(y[start:start + chunk_rows], positive_proba(model, X[start:start + chunk_rows]))
+    return evaluator
+
+
+def predict_latency_ms(model, X, repeats=LATENCY_REPEATS, random_state=0):
+    """Median wall time (ms) of a single-row predict_proba over random rows of X."""
+    rows = np.random.default_rng(random_state).integers(0, len(X), repeats + 1)
+    times = []
+    for i, row in enumerate(rows):
+        t0 = time.perf_counter()
+        model.predict_proba(X[row:row + 1])
+        if i:  # the first call pays one-off setup costs
+            times.append(time.perf_counter() - t0)
+    return float(np.median(times)) * 1000
+
+
+def save_plot_data(evaluations, out_dir, append=False):
+    """Write {name: BinaryEvaluator} as confusion_matrices.csv and roc_curves.csv in out_dir.
+
+    With append, models already in the files are kept unless `evaluations` replaces them.
+    """
+    confusion = pd.DataFrame(
+        [dict(zip(("TN", "FP", "FN", "TP"), ev.confusion.ravel().tolist())) for ev in evaluations.values()],
+        index=pd.Index(list(evaluations), name="Model"))
+    curves = pd.concat([ev.roc_curve().assign(Model=name) for name, ev in evaluations.items()])
+    curves = curves[["Model", "FPR", "TPR", "Threshold"]]
+    confusion_path, roc_path = os.path.join(out_dir, CONFUSION_FILE), os.path.join(out_dir, ROC_FILE)
+    if append and os.path.exists(confusion_path) and os.path.exists(roc_path):
+        old_confusion = pd.read_csv(confusion_path, index_col="Model")
+        old_curves = pd.read_csv(roc_path)
+        confusion = pd.concat([old_confusion.drop(index=list(evaluations), errors="ignore"), confusion])
+        curves = pd.concat([old_curves[~old_curves["Model"].isin(list(evaluations))], curves])
+    confusion.to_csv(confusion_path)
+    curves.to_csv(roc_path, index=False)
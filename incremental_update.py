@@ -0,0 +1,401 @@
+"""
+Incremental model updates from newly verified traffic
+Signed, labeled records are verified with DigitalSignatureManager and folded
+into an existing model directory without a full retrain:
+
+  - scaler: running mean/variance over old + new rows (StandardScaler.partial_fit)
+  - NB: GaussianNB.partial_fit on the new rows
+  - XGBoost: extra boosting rounds on the existing booster
+  - KNN: new rows appended to the reference set
+  - DT: kept as is
+
+Updating the scaler moves the feature space the models were trained in, so
+before the new rows are applied every model is re-expressed in the new space
+(per feature, new = a * old + b): NB means/variances, DT and XGBoost split
+thresholds and the KNN reference set. This is exact for NB, DT and KNN and
+exact for XGBoost up to float32 rounding of points lying on a split value.
+
+publish() writes a new versioned model directory (atomically) that
+SecureIoTPredictor.reload_artifacts() can switch to. Each updated model is
+scored on the holdout first and compared with the parent version; a model
+whose Accuracy, F1 or ROC-AUC drops by more than `tolerance` is replaced by
+the parent's model (re-expressed in the new scaler space) before publishing.
+"""
+
+import copy
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+import joblib
+import xgboost
+from model_training import MODEL_FILES, OPTIONAL_MODEL_FILES, evaluate_model
+from model_bundle import save_bundle
+
+VERSION_FILE = "version.json"
+TARGET_COL = "Target"
+XGB_ROWS_PER_ROUND = 1000  # extra boosting rounds scale with the batch: one per this many new rows
+XGB_MAX_ROUNDS = 20
+METRIC_TOLERANCE = 0.01  # publish: largest allowed drop of a gated metric vs the parent version
+GATED_METRICS = ("Accuracy", "F1", "ROC-AUC")
+
+
+def next_version_dir(model_dir, version):
+    base = model_dir.rstrip("/\\")
+    stem, sep, suffix = base.rpartition("_v")
+    if sep and suffix.isdigit():
+        base = stem
+    return f"{base}_v{version}"
+
+
+def read_version(model_dir):
+    path = os.path.join(model_dir, VERSION_FILE)
+    if not os.path.exists(path):
+        return {"version": 1, "rows_added": 0, "history": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _affine(old_scaler, new_scaler, idx):
+    """(a, b) with new_scaled = a * old_scaled + b for the columns in idx."""
+    a = old_scaler.scale_[idx] / new_scaler.scale_[idx]
+    b = (old_scaler.mean_[idx] - new_scaler.mean_[idx]) / new_scaler.scale_[idx]
+    return a, b
+
+
+def _reexpress_nb(nb, a, b):
+    var = nb.var_ - nb.epsilon_
+    nb.theta_ = nb.theta_ * a + b
+    nb.var_ = var * a ** 2 + nb.epsilon_
+
+
+def _reexpress_dt(dt, a, b):
+    tree = dt.tree_
+    feature, threshold = tree.feature, tree.threshold
+    inner = feature >= 0
+    threshold[inner] = threshold[inner] * a[feature[inner]] + b[feature[inner]]
+
+
+def _reexpress_xgb(clf, a, b):
+    model = json.loads(clf.get_booster().save_raw("json"))
+    for tree in model["learner"]["gradient_booster"]["model"]["trees"]:
+        left = np.asarray(tree["left_children"])
+        feature = np.asarray(tree["split_indices"])
+        condition = np.asarray(tree["split_conditions"], dtype=np.float64)
+        inner = left != -1  # leaves store their value in split_conditions
+        condition[inner] = condition[inner] * a[feature[inner]] + b[feature[inner]]
+        tree["split_conditions"] = condition.tolist()
+    booster = xgboost.Booster()
+    booster.load_model(bytearray(json.dumps(model).encode()))
+    clf._Booster = booster
+
+
+def _knn_reference(knn):
+    return np.asarray(knn._fit_X), knn.classes_[knn._y]
+
+
+def _reexpress_knn(knn, a, b):
+    ref_X, ref_y = _knn_reference(knn)
+    knn.fit(ref_X * a.astype(ref_X.dtype) + b.astype(ref_X.dtype), ref_y)
+
+
+def xgb_rounds_for(n_rows):
+    """Extra boosting rounds for a batch of n_rows: small batches get few rounds so they cannot dominate."""
+    return int(min(XGB_MAX_ROUNDS, max(1, round(n_rows / XGB_ROWS_PER_ROUND))))
+
+
+def regressions(metrics, parent_metrics, tolerance=METRIC_TOLERANCE):
+    """{model: [(metric, parent, new), ...]} for gated metrics that dropped by more than tolerance."""
+    dropped = {}
+    for name, row in metrics.items():
+        if name not in parent_metrics.index:
+            continue
+        for metric in GATED_METRICS:
+            old, new = parent_metrics.at[name, metric], row.get(metric)
+            if metric in parent_metrics.columns and pd.notna(old) and new is not None and new < old - tolerance:
+                dropped.setdefault(name, []).append((metric, float(old), float(new)))
+    return dropped
+
+
+class IncrementalUpdater:
+    def __init__(self, model_dir, xgb_rounds=None, knn_max_reference=None, tolerance=METRIC_TOLERANCE):
+        self.model_dir = model_dir
+        self.xgb_rounds = xgb_rounds  # None: xgb_rounds_for(batch size)
+        self.knn_max_reference = knn_max_reference
+        self.tolerance = tolerance  # None disables the publish gate
+        self.scaler = joblib.load(os.path.join(model_dir, "scaler.pkl"))
+        self.selected_idx = np.asarray(joblib.load(os.path.join(model_dir, "selected_idx.npy")), dtype=np.intp)
+        cols_path = os.path.join(model_dir, "selected_cols.pkl")
+        self.selected_cols = joblib.load(cols_path) if os.path.exists(cols_path) else None
+        self.models = {name: joblib.load(os.path.join(model_dir, filename)) for name, filename in MODEL_FILES.items()}
+        for name, filename in OPTIONAL_MODEL_FILES.items():
+            if os.path.exists(os.path.join(model_dir, filename)):
+                self.models[name] = joblib.load(os.path.join(model_dir, filename))
+        self.version = read_version(model_dir)
+
+        # Scaler the models currently live in; self.scaler keeps the running statistics.
+        self._model_scaler = copy.deepcopy(self.scaler)
+        self._parent_scaler = copy.deepcopy(self.scaler)
+        self._X, self._y = [], []
+        self.verified = 0
+        self.rejected = 0
+        self.skipped = 0  # verified rows without a usable label
+        self.imputed = 0  # rows with missing or non-numeric features, filled from the running mean
+
+    def _scaler_input(self, X_raw):
+        # The scaler was fitted on a DataFrame; keep its column names to avoid sklearn's warning.
+        names = getattr(self.scaler, "feature_names_in_", None)
+        return X_raw if names is None else pd.DataFrame(X_raw, columns=names)
+
+    @property
+    def pending_rows(self):
+        return sum(len(y) for y in self._y)
+
+    def _feature_frame(self, df):
+        """Float64 matrix of the scaler's feature columns; values that are not numbers become NaN."""
+        names = getattr(self.scaler, "feature_names_in_", None)
+        if names is not None and all(name in df.columns for name in names):
+            df = df[list(names)]
+        else:
+            df = df.select_dtypes(include=[np.number])
+        if df.shape[1] != self.scaler.n_features_in_:
+            raise ValueError(f"Expected {self.scaler.n_features_in_} numeric features, got {df.shape[1]}")
+        if not all(dtype.kind in "biuf" for dtype in df.dtypes):
+            df = df.apply(pd.to_numeric, errors="coerce")
+        return df.to_numpy(dtype=np.float64)
+
+    def _fill_missing(self, X_raw):
+        # A batch's own median is NaN for a single record; the running mean always exists.
+        missing = np.isnan(X_raw)
+        if missing.any():
+            self.imputed += int(missing.any(axis=1).sum())
+            rows, cols = np.nonzero(missing)
+            X_raw[rows, cols] = self.scaler.mean_[cols]
+        return X_raw
+
+    def add_records(self, X_raw, y):
+        """Add labeled raw feature rows (already trusted); updates the running scaler statistics."""
+        if isinstance(X_raw, pd.DataFrame):
+            X_raw = self._feature_frame(X_raw)
+        X_raw = self._fill_missing(np.array(X_raw, dtype=np.float64))
+        y = np.asarray(y).astype(int)
+        if len(X_raw) != len(y):
+            raise ValueError("X_raw and y must have the same number of rows")
+        if len(y) == 0:
+            return 0
+        self.scaler.partial_fit(self._scaler_input(X_raw))
+        self._X.append(X_raw)
+        self._y.append(y)
+        return len(y)
+
+    def add_signed(self, signed_packages, sig_manager, labels=None, label_key=TARGET_COL):
+        """Verify signed packages and add the valid ones as one batch; labels come from `labels` or the signed data.
+
+        Rows without a numeric label are skipped (counted in `skipped`); missing or non-numeric
+        features are filled from the running scaler mean (counted in `imputed`).
+        """
+        names = getattr(self.scaler, "feature_names_in_", None)
+        columns, y = None, []
+        for i, package in enumerate(signed_packages):
+            result = sig_manager.verify_and_extract(package)
+            if not result["is_valid"]:
+                self.rejected += 1
+                continue
+            self.verified += 1
+            data = result["data"]
+            batch = isinstance(next(iter(data.values()), None), list)
+            n_rows = len(next(iter(data.values()))) if batch else 1
+            if columns is None:
+                keys = names if names is not None else [k for k in data if k != label_key]
+                columns = {key: [] for key in keys}
+            for key, values in columns.items():
+                value = data.get(key)
+                values.extend(value if batch and isinstance(value, list) else [value] * n_rows)
+            label = labels[i] if labels is not None else data.get(label_key)
+            y.extend(np.broadcast_to(np.asarray(label, dtype=object), (n_rows,)).tolist())
+        if columns is None:
+            return 0
+
+        X_raw = self._feature_frame(pd.DataFrame(columns))
+        y = pd.to_numeric(pd.Series(y), errors="coerce").to_numpy()
+        labeled = ~np.isnan(y)
+        self.skipped += int((~labeled).sum())
+        return self.add_records(X_raw[labeled], y[labeled])
+
+    def apply(self, verbose=True):
+        """Fold the pending rows into the models; returns per-model update times."""
+        if not self._y:
+            return {}
+        X_raw, y = np.vstack(self._X), np.concatenate(self._y)
+        times = {}
+
+        t0 = time.perf_counter()
+        a, b = _affine(self._model_scaler, self.scaler, self.selected_idx)
+        _reexpress_nb(self.models["NaiveBayes"], a, b)
+        _reexpress_dt(self.models["DT"], a, b)
+        _reexpress_xgb(self.models["XGBoost"], a, b)
+        knn_X, knn_y = _knn_reference(self.models["KNN"])
+        knn_X = knn_X * a.astype(knn_X.dtype) + b.astype(knn_X.dtype)
+        if "KNN_reduced" in self.models:
+            # Prototypes live in the scaled space too; they are rescaled but not extended with the new rows.
+            _reexpress_knn(self.models["KNN_reduced"], a, b)
+        times["rescale"] = time.perf_counter() - t0
+
+        X_new = self.scaler.transform(self._scaler_input(X_raw))[:, self.selected_idx]
+
+        t0 = time.perf_counter()
+        self.models["NaiveBayes"].partial_fit(X_new, y)
+        times["NaiveBayes"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        clf = self.models["XGBoost"]
+        params = {k: v for k, v in clf.get_xgb_params().items() if v is not None and k != "use_label_encoder"}
+        rounds = self.xgb_rounds if self.xgb_rounds is not None else xgb_rounds_for(len(y))
+        booster = xgboost.train(params, xgboost.DMatrix(X_new, label=y), num_boost_round=rounds,
+                                xgb_model=clf.get_booster())
+        clf._Booster = booster
+        clf.n_estimators = booster.num_boosted_rounds()
+        times["XGBoost"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        knn = self.models["KNN"]
+        knn_X = np.vstack([knn_X, X_new.astype(knn_X.dtype)])
+        knn_y = np.concatenate([knn_y, y])
+        if self.knn_max_reference and len(knn_y) > self.knn_max_reference:
+            # Keep the most recent rows.
+            knn_X, knn_y = knn_X[-self.knn_max_reference:], knn_y[-self.knn_max_reference:]
+        knn.fit(knn_X, knn_y)
+        times["KNN"] = time.perf_counter() - t0
+
+        self._model_scaler = copy.deepcopy(self.scaler)
+        self.version["rows_added"] = self.version.get("rows_added", 0) + len(y)
+        self._X, self._y = [], []
+        if verbose:
+            print(f"[OK] Applied {len(y)} new rows: " + ", ".join(f"{k} {v:.2f}s" for k, v in times.items()))
+        return times
+
+    def evaluate(self, X_raw, y, models=None):
+        X = self.scaler.transform(self._scaler_input(X_raw))[:, self.selected_idx]
+        return {name: evaluate_model(model, X, y) for name, model in (models or self.models).items()}
+
+    def parent_model(self, name):
+        """The parent version's model, re-expressed in the current scaler space."""
+        model = joblib.load(os.path.join(self.model_dir, dict(MODEL_FILES, **OPTIONAL_MODEL_FILES)[name]))
+        a, b = _affine(self._parent_scaler, self.scaler, self.selected_idx)
+        if name == "NaiveBayes":
+            _reexpress_nb(model, a, b)
+        elif name == "DT":
+            _reexpress_dt(model, a, b)
+        elif name == "XGBoost":
+            _reexpress_xgb(model, a, b)
+        else:
+            _reexpress_knn(model, a, b)
+        return model
+
+    def _gate(self, results, holdout, parent_metrics):
+        """Swap regressed models for their parent version; returns the names that were kept."""
+        if parent_metrics is None:
+            parents = {name: self.parent_model(name) for name in results}
+            parent_metrics = pd.DataFrame(self.evaluate(*holdout, models=parents)).T
+        kept = []
+        for name, dropped in regressions(results, parent_metrics, self.tolerance).items():
+            detail = ", ".join(f"{metric} {old:.4f} -> {new:.4f}" for metric, old, new in dropped)
+            print(f"⚠ {name} regressed on the holdout ({detail}); keeping the parent model")
+            self.models[name] = self.parent_model(name)
+            results[name] = self.evaluate(*holdout, models={name: self.models[name]})[name]
+            kept.append(name)
+        return kept
+
+    def publish(self, out_dir=None, holdout=None, update_times=None):
+        """Write all artifacts to a new version directory; returns its path."""
+        if self._y:
+            update_times = self.apply()
+        version = self.version.get("version", 1) + 1
+        out_dir = out_dir or next_version_dir(self.model_dir, version)
+        if os.path.exists(out_dir):
+            raise FileExistsError(f"'{out_dir}' already exists")
+
+        tmp = f"{out_dir}.tmp{os.getpid()}"
+        os.makedirs(tmp)
+        joblib.dump(self.scaler, os.path.join(tmp, "scaler.pkl"))
+        joblib.dump(self.selected_idx, os.path.join(tmp, "selected_idx.npy"))
+        if self.selected_cols is not None:
+            joblib.dump(self.selected_cols, os.path.join(tmp, "selected_cols.pkl"))
+
+        test_split = os.path.join(self.model_dir, "test_split.npz")
+        parent_comparison = os.path.join(self.model_dir, "model_comparison.csv")
+        parent_metrics = None  # a caller's holdout is scored against the parent models themselves
+        if holdout is None and os.path.exists(test_split):
+            shutil.copy2(test_split, os.path.join(tmp, "test_split.npz"))
+            with np.load(test_split) as split:
+                holdout = (split["X_raw"], split["y"])
+            if os.path.exists(parent_comparison):
+                parent_metrics = pd.read_csv(parent_comparison, index_col=0)
+        kept = []
+        if holdout is not None:
+            results = self.evaluate(*holdout)
+            if self.tolerance is not None:
+                kept = self._gate(results, holdout, parent_metrics)
+            for name, metrics in results.items():
+                metrics["TrainTime_s"] = (update_times or {}).get(name, 0.0)
+            pd.DataFrame(results).T.to_csv(os.path.join(tmp, "model_comparison.csv"), index=True)
+        elif os.path.exists(parent_comparison):
+            shutil.copy2(parent_comparison, tmp)
+        for name, filename in dict(MODEL_FILES, **OPTIONAL_MODEL_FILES).items():
+            if name in self.models:
+                joblib.dump(self.models[name], os.path.join(tmp, filename))
+        comparison = os.path.join(tmp, "model_comparison.csv")
+        metrics = pd.read_csv(comparison, index_col=0) if os.path.exists(comparison) else None
+        save_bundle(tmp, self.models, self.scaler, self.selected_idx, self.selected_cols, metrics)
+
+        history = list(self.version.get("history", []))
+        history.append({"version": version, "parent": os.path.abspath(self.model_dir),
+                        "rows_added": self.version.get("rows_added", 0), "kept_parent": kept,
+                        "published_at": time.strftime("%Y-%m-%dT%H:%M:%S")})
+        self.version = {"version": version, "rows_added": 0, "history": history}
+        with open(os.path.join(tmp, VERSION_FILE), "w") as f:
+            json.dump(self.version, f, indent=2)
+        os.replace(tmp, out_dir)
+        self.model_dir = out_dir
+        self._parent_scaler = copy.deepcopy(self.scaler)
+        print(f"✅ Published model version {version} to '{out_dir}'")
+        return out_dir
+
+
+def read_signed_packages(path):
+    """One signed package ({"data": ..., "signature": ...}) per line."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    import argparse
+    from digital_signature import DigitalSignatureManager
+
+    parser = argparse.ArgumentParser(description="Fold newly verified, labeled traffic into a model directory")
+    parser.add_argument("model_dir")
+    parser.add_argument("packages", help="JSON lines of signed packages with the label in the signed data")
+    parser.add_argument("--public-key", default="public_key.pem")
+    parser.add_argument("--label-key", default=TARGET_COL)
+    parser.add_argument("--xgb-rounds", type=int, default=None,
+                        help=f"extra boosting rounds (default: one per {XGB_ROWS_PER_ROUND} new rows, at most {XGB_MAX_ROUNDS})")
+    parser.add_argument("--knn-max-reference", type=int, default=None)
+    parser.add_argument("--tolerance", type=float, default=METRIC_TOLERANCE,
+                        help="keep the parent model when a gated metric drops by more than this")
+    parser.add_argument("--out", default=None, help="new version directory (default <model_dir>_v<N>)")
+    args = parser.parse_args()
+
+    sig_manager = DigitalSignatureManager(public_key_path=args.public_key)
+    sig_manager.load_public_key()
+    updater = IncrementalUpdater(args.model_dir, xgb_rounds=args.xgb_rounds,
+                                 knn_max_reference=args.knn_max_reference, tolerance=args.tolerance)
+    t0 = time.time()
+    added = updater.add_signed(read_signed_packages(args.packages), sig_manager, label_key=args.label_key)
+    print(f"Verified {updater.verified} packages ({added} rows), rejected {updater.rejected}, "
+          f"skipped {updater.skipped} unlabeled rows, imputed features in {updater.imputed} rows")
+    if added == 0:
+        raise SystemExit("Nothing to update")
+    updater.publish(args.out)
+    print(f"Update finished in {time.time() - t0:.1f}s")
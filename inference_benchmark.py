@@ -0,0 +1,255 @@
+"""
+Inference benchmark for SecureIoTPredictor and DigitalSignatureManager
+Times every stage of the secure path separately and end to end, per model
+and batch size, on rows from the model directory's test split:
+
+  sign        DigitalSignatureManager.sign_data on the batch payload
+  verify      verify_and_extract of the signed package
+  preprocess  verified payload -> scaled, selected float matrix
+  predict     predict + predict_proba of one model
+  end_to_end  secure_predict on a DataFrame (all of the above, with its prints)
+
+A batch is signed as one package, as secure_predict does. Each cell gets
+warmup calls, then up to `repeats` timed calls (fewer once `max_seconds` is
+spent, never fewer than MIN_REPEATS), summarised as p50/p95/p99 latency and
+rows per second at the median. Results are written as JSON (with the
+environment and settings) plus a flat CSV, and two JSON runs can be compared
+to flag regressions.
+
+    python inference_benchmark.py models_sample300k --out bench_base.json
+    python inference_benchmark.py --compare bench_base.json bench_new.json --threshold 0.10
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from secure_predictor import SecureIoTPredictor
+
+STAGES = ("sign", "verify", "preprocess", "predict", "end_to_end")
+BATCH_SIZES = (1, 10, 100, 1_000, 10_000, 100_000)
+BENCH_MODELS = ("knn", "dt", "xgb", "nb")
+WARMUP = 2
+REPEATS = 30
+MIN_REPEATS = 3
+MAX_SECONDS = 10.0  # per (stage, model, batch size) cell, after warmup
+REGRESSION_THRESHOLD = 0.10  # compare: slower by more than this fraction is a regression
+REGRESSION_MIN_MS = 0.5  # compare: smaller absolute slowdowns are timer noise
+COMPARE_METRICS = ("p50_ms", "p95_ms")
+RESULT_COLUMNS = ["stage", "model", "batch_size", "repeats", "mean_ms", "p50_ms", "p95_ms", "p99_ms",
+                  "rows_per_s"]
+
+
+def _version(module):
+    try:
+        return __import__(module).__version__
+    except Exception:
+        return None
+
+
+def _cpu_model():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or None
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    """Machine, interpreter and library versions the numbers were measured with."""
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu": _cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": _git_commit(),
+        "versions": {name: _version(name) for name in ("numpy", "pandas", "sklearn", "xgboost", "cryptography")},
+    }
+
+
+def time_calls(fn, warmup=WARMUP, repeats=REPEATS, max_seconds=MAX_SECONDS):
+    """Wall times (seconds) of fn() after warmup calls."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeats and (len(times) < MIN_REPEATS or time.perf_counter() - start < max_seconds):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return np.asarray(times)
+
+
+def summarize(times, batch_size):
+    ms = times * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"repeats": len(ms), "mean_ms": float(ms.mean()), "p50_ms": float(p50), "p95_ms": float(p95),
+            "p99_ms": float(p99), "rows_per_s": batch_size / (p50 / 1000) if p50 > 0 else float("inf")}
+
+
+def load_rows(predictor):
+    """Raw 43-feature rows (and column names) from the predictor's test split."""
+    with np.load(os.path.join(predictor.model_dir, "test_split.npz")) as split:
+        X_raw = split["X_raw"]
+    names = getattr(predictor.scaler, "feature_names_in_", None)
+    return X_raw, [str(c) for c in names] if names is not None else [f"f{i}" for i in range(X_raw.shape[1])]
+
+
+def make_batch(X_raw, columns, batch_size):
+    """(DataFrame, signed payload) of batch_size rows, cycling through X_raw."""
+    df = pd.DataFrame(np.resize(X_raw, (batch_size, X_raw.shape[1])), columns=columns)
+    payload = df.to_dict(orient="records")[0] if batch_size == 1 else df.to_dict(orient="list")
+    return df, payload
+
+
+def run_benchmark(predictor, X_raw, columns, models=BENCH_MODELS, batch_sizes=BATCH_SIZES, stages=STAGES,
+                  warmup=WARMUP, repeats=REPEATS, max_seconds=MAX_SECONDS):
+    """List of result rows, one per (stage, model, batch size); model-independent stages use model '-'."""
+    sig = predictor.sig_manager
+    results = []
+
+    def record(stage, model, batch_size, fn):
+        row = dict(stage=stage, model=model, batch_size=batch_size,
+                   **summarize(time_calls(fn, warmup, repeats, max_seconds), batch_size))
+        results.append(row)
+        print(f"  {stage:<11} {model:<12} {batch_size:>7}  p50 {row['p50_ms']:10.3f} ms  "
+              f"p99 {row['p99_ms']:10.3f} ms  {row['rows_per_s']:12.0f} rows/s  ({row['repeats']} runs)",
+              file=sys.__stdout__, flush=True)
+
+    for batch_size in batch_sizes:
+        df, payload = make_batch(X_raw, columns, batch_size)
+        package = {"data": payload, "signature": sig.sign_data(payload)}
+        X_scaled = predictor.preprocess(payload)
+        # The predictor prints progress on every call; keep it out of the report, not out of the timings
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if "sign" in stages:
+                record("sign", "-", batch_size, lambda: sig.sign_data(payload))
+            if "verify" in stages:
+                record("verify", "-", batch_size, lambda: sig.verify_and_extract(package))
+            if "preprocess" in stages:
+                record("preprocess", "-", batch_size, lambda: predictor.preprocess(payload))
+            for name in models:
+                if "predict" in stages:
+                    record("predict", name, batch_size, lambda: predictor.predict(X_scaled, name))
+                if "end_to_end" in stages:
+                    result = predictor.secure_predict(df, name)
+                    if not result["is_valid"]:
+                        raise RuntimeError(f"secure_predict failed for {name}: {result.get('error')}")
+                    record("end_to_end", name, batch_size, lambda: predictor.secure_predict(df, name))
+    return results
+
+
+def save_results(path, results, env, settings):
+    """Write {environment, settings, results} as JSON and the results alone as CSV next to it."""
+    with open(path, "w") as f:
+        json.dump({"environment": env, "settings": settings, "results": results}, f, indent=2)
+    csv_path = os.path.splitext(path)[0] + ".csv"
+    pd.DataFrame(results, columns=RESULT_COLUMNS).to_csv(csv_path, index=False)
+    return csv_path
+
+
+def compare(baseline_path, candidate_path, threshold=REGRESSION_THRESHOLD, min_ms=REGRESSION_MIN_MS,
+            metrics=COMPARE_METRICS):
+    """DataFrame of candidate/baseline latency ratios per shared cell, with a Regression flag."""
+    runs = []
+    for path in (baseline_path, candidate_path):
+        with open(path) as f:
+            runs.append(json.load(f))
+    env_base, env_new = runs[0]["environment"], runs[1]["environment"]
+    for key in ("cpu", "cpu_count", "python", "versions"):
+        if env_base.get(key) != env_new.get(key):
+            print(f"⚠ {key} differs: {env_base.get(key)} -> {env_new.get(key)}")
+    keys = ["stage", "model", "batch_size"]
+    base = pd.DataFrame(runs[0]["results"]).set_index(keys)
+    new = pd.DataFrame(runs[1]["results"]).set_index(keys)
+    shared = base.index.intersection(new.index, sort=False)
+    if len(shared) < max(len(base), len(new)):
+        print(f"⚠ Only {len(shared)} of {len(base)}/{len(new)} cells are in both runs")
+    table = pd.DataFrame(index=shared)
+    regression = pd.Series(False, index=shared)
+    for metric in metrics:
+        old, cur = base.loc[shared, metric], new.loc[shared, metric]
+        table[f"base_{metric}"] = old
+        table[f"new_{metric}"] = cur
+        table[f"ratio_{metric}"] = cur / old
+        regression |= (cur > old * (1 + threshold)) & (cur - old > min_ms)
+    table["Regression"] = regression
+    return table.reset_index()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark signing, verification, preprocessing and prediction")
+    parser.add_argument("model_dir", nargs="?", default="models_sample300k")
+    parser.add_argument("--models", nargs="+", default=list(BENCH_MODELS))
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=list(BATCH_SIZES))
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--warmup", type=int, default=WARMUP)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--max-seconds", type=float, default=MAX_SECONDS, help="time budget per cell")
+    parser.add_argument("--float32", action="store_true")
+    parser.add_argument("--no-bundle", action="store_true", help="load the pickles, not the model bundle")
+    parser.add_argument("--private-key", default="private_key.pem")
+    parser.add_argument("--public-key", default="public_key.pem")
+    parser.add_argument("--out", default="inference_benchmark.json", help="JSON path; the CSV is written next to it")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"),
+                        help="compare two JSON runs instead of benchmarking")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="compare: flag cells slower by more than this fraction")
+    parser.add_argument("--min-ms", type=float, default=REGRESSION_MIN_MS,
+                        help="compare: ignore slowdowns smaller than this many ms")
+    args = parser.parse_args()
+
+    if args.compare:
+        table = compare(*args.compare, threshold=args.threshold, min_ms=args.min_ms)
+        with pd.option_context("display.max_rows", None, "display.width", 200):
+            print(table.round(3).to_string(index=False))
+        regressions = table[table["Regression"]]
+        if len(regressions):
+            print(f"\n⚠ {len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\n✅ No regressions over {args.threshold:.0%}")
+        sys.exit(0)
+
+    predictor = SecureIoTPredictor(args.model_dir, args.private_key, args.public_key,
+                                   float32=args.float32, use_bundle=not args.no_bundle)
+    if os.path.exists(args.private_key) and os.path.exists(args.public_key):
+        predictor.setup_keys()
+    else:
+        predictor.sig_manager.generate_keys(save=False)
+    missing = [m for m in args.models if m not in predictor.model_names]
+    if missing:
+        parser.error(f"models not in '{args.model_dir}': {', '.join(missing)}")
+    predictor.warmup(args.models)
+    X_raw, columns = load_rows(predictor)
+
+    settings = {"model_dir": args.model_dir, "models": args.models, "batch_sizes": args.batch_sizes,
+                "stages": args.stages, "warmup": args.warmup, "repeats": args.repeats,
+                "max_seconds": args.max_seconds, "float32": args.float32,
+                "bundle": predictor.uses_bundle, "source_rows": len(X_raw)}
+    print(f"\nBenchmarking {', '.join(args.models)} at batch sizes {args.batch_sizes}...")
+    results = run_benchmark(predictor, X_raw, columns, args.models, args.batch_sizes, args.stages,
+                            args.warmup, args.repeats, args.max_seconds)
+    csv_path = save_results(args.out, results, environment(), settings)
+    print(f"\n✅ Results saved to '{args.out}' and '{csv_path}'")
@@ -0,0 +1,178 @@
+"""
+KNN reference-set compression
+The KNN model keeps every training row of the sample as its reference set,
+so the artifact grows with the sample and every query scans all of it. This
+replaces the reference set with a much smaller one after training:
+
+  kmeans  class-wise (mini-batch) k-means centroids as prototypes; the budget
+          is split across classes by size, with a floor for the rare class
+  cnn     condensed nearest neighbours: rows the current prototypes misclassify
+          (1-NN) are added, in batches, until a full pass adds none
+  enn     edited nearest neighbours: drop rows their own k neighbours
+          outvote; a cleaning step applied before kmeans/cnn (edit=True)
+
+The reduced model is an ordinary KNeighborsClassifier on the prototypes,
+saved as knn_reduced_model.pkl (and in the bundle). The predictor serves it as
+"knn_reduced", and model_comparison.csv gets a KNN_reduced row.
+
+    python knn_compression.py models_sample300k --method kmeans --ratio 0.02
+"""
+
+import os
+import time
+from contextlib import nullcontext
+import joblib
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.neighbors import KNeighborsClassifier, NearestNeighbors
+from evaluation import evaluate
+from model_training import OPTIONAL_MODEL_FILES
+
+REDUCED_NAME = "KNN_reduced"
+
+KNN_COMPRESSION_METHOD = "kmeans"  # kmeans, cnn
+KNN_COMPRESSION_RATIO = 0.02  # kmeans: prototypes per reference row (0.02 = 50x smaller)
+KNN_MIN_CLASS_PROTOTYPES = 50  # kmeans: floor per class, so the rare class keeps its shape
+KNN_REDUCED_NEIGHBORS = None  # neighbours the reduced model votes with (None = same as the full KNN)
+CNN_BATCH = 2048  # cnn: rows classified against the prototypes per step
+CNN_MAX_PASSES = 5
+
+
+def edited_nn(X, y, n_neighbors=3, n_jobs=None):
+    """Boolean mask of rows that agree with the majority of their n_neighbors nearest other rows."""
+    nn = NearestNeighbors(n_neighbors=n_neighbors + 1, n_jobs=n_jobs).fit(X)
+    _, neighbors = nn.kneighbors(X)
+    votes = y[neighbors[:, 1:]]  # column 0 is the row itself
+    agree = (votes == y[:, None]).sum(axis=1)
+    return agree * 2 > n_neighbors
+
+
+def _class_budgets(y, n_prototypes, min_per_class):
+    classes, counts = np.unique(y, return_counts=True)
+    budgets = np.maximum(np.round(counts / counts.sum() * n_prototypes).astype(int), min_per_class)
+    return dict(zip(classes, np.minimum(budgets, counts)))
+
+
+def kmeans_prototypes(X, y, n_prototypes, min_per_class=KNN_MIN_CLASS_PROTOTYPES, random_state=42):
+    """Class-wise k-means centroids; returns (prototypes, labels)."""
+    prototypes, labels = [], []
+    for label, budget in _class_budgets(y, n_prototypes, min_per_class).items():
+        X_c = X[y == label]
+        if budget >= len(X_c):
+            centers = X_c
+        else:
+            km = MiniBatchKMeans(n_clusters=budget, batch_size=max(4096, 3 * budget), n_init=3,
+                                 random_state=random_state).fit(X_c)
+            centers = km.cluster_centers_
+        prototypes.append(centers.astype(X.dtype, copy=False))
+        labels.append(np.full(len(centers), label, dtype=y.dtype))
+    return np.vstack(prototypes), np.concatenate(labels)
+
+
+def _nearest_label(X, prototypes, labels, sq_norms):
+    # Squared distances up to the per-row constant |x|^2, which does not change the argmin
+    d = sq_norms[None, :] - 2.0 * (X @ prototypes.T)
+    return labels[np.argmin(d, axis=1)]
+
+
+def condensed_nn(X, y, batch=CNN_BATCH, max_passes=CNN_MAX_PASSES, random_state=42):
+    """Hart's condensed nearest neighbours, batched; returns (prototypes, labels)."""
+    rng = np.random.default_rng(random_state)
+    keep = np.zeros(len(y), dtype=bool)
+    for label in np.unique(y):
+        keep[rng.choice(np.flatnonzero(y == label))] = True
+    for _ in range(max_passes):
+        added = 0
+        order = rng.permutation(len(y))
+        for start in range(0, len(y), batch):
+            rows = order[start:start + batch]
+            rows = rows[~keep[rows]]
+            if not len(rows):
+                continue
+            prototypes = X[keep]
+            sq_norms = np.einsum("ij,ij->i", prototypes, prototypes)
+            wrong = _nearest_label(X[rows], prototypes, y[keep], sq_norms) != y[rows]
+            keep[rows[wrong]] = True
+            added += int(wrong.sum())
+        if not added:
+            break
+    return X[keep], y[keep]
+
+
+def compress_knn(knn, X=None, y=None, method=KNN_COMPRESSION_METHOD, ratio=KNN_COMPRESSION_RATIO,
+                 n_neighbors=KNN_REDUCED_NEIGHBORS, edit=False, random_state=42):
+    """Reduced KNeighborsClassifier from a fitted KNN's reference set (or X, y)."""
+    if X is None:
+        X, y = np.asarray(knn._fit_X), knn.classes_[knn._y]
+    y = np.asarray(y)
+    if edit:
+        mask = edited_nn(X, y, n_jobs=knn.n_jobs)
+        X, y = X[mask], y[mask]
+    if method == "kmeans":
+        prototypes, labels = kmeans_prototypes(X, y, max(1, int(len(y) * ratio)), random_state=random_state)
+    elif method == "cnn":
+        prototypes, labels = condensed_nn(X, y, random_state=random_state)
+    else:
+        raise ValueError(f"Unknown KNN compression method '{method}' (kmeans, cnn)")
+    n_neighbors = n_neighbors or knn.n_neighbors
+    params = dict(knn.get_params(), n_neighbors=min(n_neighbors, len(labels)))
+    return KNeighborsClassifier(**params).fit(prototypes, labels)
+
+
+def train_reduced(knn, X_test, y_test, out_dir=None, memory=None, **kwargs):
+    """Compress, evaluate and save the reduced KNN; returns (model, metrics, BinaryEvaluator)."""
+    with memory.stage(REDUCED_NAME) if memory is not None else nullcontext():
+        t0 = time.time()
+        reduced = compress_knn(knn, **kwargs)
+        t1 = time.time()
+        evaluation = evaluate(reduced, X_test, y_test)
+    metrics = evaluation.metrics()
+    metrics["TrainTime_s"] = t1 - t0
+    if memory is not None:
+        metrics["PeakRSS_MB"] = memory.peak_mb(REDUCED_NAME)
+    n_full, n_reduced = len(knn._y), len(reduced._y)
+    print(f" [OK] KNN reference set {n_full} -> {n_reduced} rows ({n_full / n_reduced:.0f}x smaller) "
+          f"in {metrics['TrainTime_s']:.2f}s")
+    if out_dir is not None:
+        joblib.dump(reduced, os.path.join(out_dir, OPTIONAL_MODEL_FILES[REDUCED_NAME]))
+    return reduced, metrics, evaluation
+
+
+if __name__ == "__main__":
+    import argparse
+    import pandas as pd
+    from evaluation import predict_latency_ms, save_plot_data
+    from model_bundle import bundle_from_pickles, has_bundle
+    from model_training import MODEL_FILES
+
+    parser = argparse.ArgumentParser(description="Add a compressed-reference KNN (KNN_reduced) to a model directory")
+    parser.add_argument("model_dir")
+    parser.add_argument("--method", choices=["kmeans", "cnn"], default=KNN_COMPRESSION_METHOD)
+    parser.add_argument("--ratio", type=float, default=KNN_COMPRESSION_RATIO, help="kmeans prototypes per reference row")
+    parser.add_argument("--neighbors", type=int, default=KNN_REDUCED_NEIGHBORS)
+    parser.add_argument("--edit", action="store_true", help="clean the reference set with edited NN first")
+    args = parser.parse_args()
+
+    knn = joblib.load(os.path.join(args.model_dir, MODEL_FILES["KNN"]))
+    scaler = joblib.load(os.path.join(args.model_dir, "scaler.pkl"))
+    selected_idx = joblib.load(os.path.join(args.model_dir, "selected_idx.npy"))
+    with np.load(os.path.join(args.model_dir, "test_split.npz")) as split:
+        X_raw, y_test = split["X_raw"], split["y"]
+    names = getattr(scaler, "feature_names_in_", None)
+    X_test = scaler.transform(X_raw if names is None else pd.DataFrame(X_raw, columns=names))[:, selected_idx]
+    X_test = X_test.astype(knn._fit_X.dtype)
+
+    reduced, metrics, evaluation = train_reduced(knn, X_test, y_test, args.model_dir, method=args.method,
+                                                 ratio=args.ratio, n_neighbors=args.neighbors, edit=args.edit)
+    save_plot_data({REDUCED_NAME: evaluation}, args.model_dir, append=True)
+    comparison_path = os.path.join(args.model_dir, "model_comparison.csv")
+    res_df = pd.read_csv(comparison_path, index_col=0) if os.path.exists(comparison_path) else pd.DataFrame()
+    for name, model, row in (("KNN", knn, {}), (REDUCED_NAME, reduced, metrics)):
+        for key, value in dict(row, ReferenceRows=len(model._fit_X),
+                               Latency_ms=predict_latency_ms(model, X_test)).items():
+            res_df.loc[name, key] = value
+    print(res_df.loc[["KNN", REDUCED_NAME], ["Accuracy", "F1", "ROC-AUC", "ReferenceRows", "Latency_ms"]])
+    res_df.to_csv(comparison_path, index=True)
+    if has_bundle(args.model_dir):
+        bundle_from_pickles(args.model_dir)
+    print(f"\n✅ Reduced KNN saved in '{args.model_dir}'")
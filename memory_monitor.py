@@ -0,0 +1,92 @@
+"""
+Peak memory (RSS) per pipeline stage
+A background thread samples the process's resident set size every few
+milliseconds and every stage active at that moment keeps its maximum, so
+stages may overlap (e.g. the four models training in parallel threads).
+RSS comes from /proc/self/statm on Linux and from psutil elsewhere if it is
+installed; without either, stages report NaN. Only this process is measured,
+not QGA worker processes.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None if it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+class MemoryTracker:
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peaks = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.available = current_rss() is not None
+
+    def _sample(self):
+        rss = current_rss()
+        if rss is None:
+            return
+        with self._lock:
+            for name, count in self._active.items():
+                if count and rss > self.peaks.get(name, 0):
+                    self.peaks[name] = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    @contextmanager
+    def stage(self, name):
+        """Track the peak RSS while the block runs (re-entering a name extends the same stage)."""
+        if not self.available:
+            yield
+            return
+        with self._lock:
+            self._active[name] = self._active.get(name, 0) + 1
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="memory-tracker", daemon=True)
+                self._thread.start()
+        self._sample()
+        try:
+            yield
+        finally:
+            self._sample()
+            with self._lock:
+                self._active[name] -= 1
+
+    def peak_mb(self, name):
+        peak = self.peaks.get(name)
+        return float("nan") if peak is None else peak / 2 ** 20
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,392 @@
+"""
+Versioned model bundle
+The trained artifacts of a model directory as plain data instead of pickled
+Python objects, in <model_dir>/bundle:
+
+  manifest.json   format version, feature names, selected indices/columns,
+                  scaler mean/scale, metrics, library versions and one entry
+                  per model (GaussianNB's parameters live here as well)
+  xgb.ubj         XGBoost's native binary model
+  dt.npz          tree arrays: children, split feature/threshold, leaf class probabilities
+  knn.npz         KNN reference rows and labels (knn_reduced.npz for the compressed KNN)
+
+The loader rebuilds predictors with the predict/predict_proba interface the
+predictor uses. DT and NB become small numpy predictors, so sklearn is
+never imported for them. KNN is a KNeighborsClassifier refitted on its
+reference rows, which for brute force only stores them. XGBoost loads its
+own format. Nothing depends on the pickling library versions.
+
+    python model_bundle.py models_sample300k    # write the bundle from the pickles and benchmark both
+"""
+
+import json
+import os
+import shutil
+import time
+import numpy as np
+
+BUNDLE_DIR = "bundle"
+MANIFEST_FILE = "manifest.json"
+BUNDLE_FORMAT = "secure-iot-model-bundle"
+BUNDLE_VERSION = 1  # bumped on incompatible layout changes; newer bundles are refused
+
+# Training names (model_comparison.csv, model_training) -> predictor names
+BUNDLE_NAMES = {"KNN": "knn", "DT": "dt", "XGBoost": "xgb", "NaiveBayes": "nb", "KNN_reduced": "knn_reduced"}
+KNN_PARAMS = ("n_neighbors", "weights", "algorithm", "leaf_size", "p", "metric", "metric_params", "n_jobs")
+
+
+def bundle_path(model_dir):
+    return os.path.join(model_dir, BUNDLE_DIR)
+
+
+def has_bundle(model_dir):
+    return os.path.exists(os.path.join(bundle_path(model_dir), MANIFEST_FILE))
+
+
+class ScalerParams:
+    """StandardScaler.transform from its mean/scale vectors."""
+
+    def __init__(self, mean, scale, feature_names=None):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        self.n_features_in_ = len(self.mean_)
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
+class TreeClassifier:
+    """DecisionTreeClassifier's predict/predict_proba from its tree arrays."""
+
+    def __init__(self, children_left, children_right, feature, threshold, proba, classes):
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.proba = proba
+        self.classes_ = classes
+
+    def apply(self, X):
+        # sklearn compares float32 feature values against float64 thresholds; so does this.
+        X = np.asarray(X, dtype=np.float32)
+        node = np.zeros(len(X), dtype=np.intp)
+        active = np.arange(len(X)) if self.children_left[0] != -1 else np.arange(0)
+        while len(active):
+            current = node[active]
+            go_left = X[active, self.feature[current]] <= self.threshold[current]
+            node[active] = np.where(go_left, self.children_left[current], self.children_right[current])
+            active = active[self.children_left[node[active]] != -1]
+        return node
+
+    def predict_proba(self, X):
+        return self.proba[self.apply(X)]
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class GaussianNBParams:
+    """GaussianNB's predict/predict_proba from its per-class means, variances and priors."""
+
+    def __init__(self, theta, var, class_prior, classes):
+        self.theta_ = theta
+        self.var_ = var
+        self.class_prior_ = class_prior
+        self.classes_ = classes
+        self._log_prior = np.log(class_prior)
+        self._log_norm = -0.5 * np.sum(np.log(2.0 * np.pi * var), axis=1)
+
+    def _joint_log_likelihood(self, X):
+        # Same order of operations as sklearn, so the (large) log-likelihoods round identically
+        X = np.asarray(X)
+        jll = []
+        for i in range(len(self.classes_)):
+            n_ij = self._log_norm[i] - 0.5 * np.sum(((X - self.theta_[i]) ** 2) / self.var_[i], 1)
+            jll.append(self._log_prior[i] + n_ij)
+        return np.array(jll).T
+
+    def predict_proba(self, X):
+        jll = self._joint_log_likelihood(X)
+        # log P(x) as sklearn's logsumexp computes it: the maximum terms out, the rest through log1p
+        top = jll.max(axis=1, keepdims=True)
+        is_top = jll == top
+        rest = np.where(is_top, -np.inf, jll)
+        m = np.sum(is_top, axis=1, keepdims=True, dtype=jll.dtype)
+        shift = np.where(np.isfinite(top), top, 0)
+        total = np.sum(np.exp(rest - shift), axis=1, keepdims=True, dtype=jll.dtype)
+        total = np.where(total == 0, total, total / m)
+        log_prob_x = np.log1p(total) + np.log(m) + top
+        return np.exp(jll - log_prob_x)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self._joint_log_likelihood(X), axis=1)]
+
+
+def _json_metrics(metrics):
+    """{bundle name: {metric: value}} from model_comparison's DataFrame or dict, NaN as null."""
+    if metrics is None:
+        return {}
+    if hasattr(metrics, "to_dict"):
+        metrics = metrics.to_dict(orient="index")
+    return {BUNDLE_NAMES.get(name, name): {k: (None if v != v else float(v)) for k, v in row.items()}
+            for name, row in metrics.items()}
+
+
+def _library_versions():
+    import sklearn
+    import xgboost
+    return {"numpy": np.__version__, "sklearn": sklearn.__version__, "xgboost": xgboost.__version__}
+
+
+def _write_model(name, model, path):
+    """Save one model into the bundle directory; returns its manifest entry."""
+    if name == "xgb":
+        model.save_model(os.path.join(path, "xgb.ubj"))
+        return {"kind": "xgboost", "file": "xgb.ubj"}
+    if name == "dt":
+        tree = model.tree_
+        value = tree.value[:, 0, :]
+        np.savez(os.path.join(path, "dt.npz"),
+                 children_left=tree.children_left, children_right=tree.children_right,
+                 feature=tree.feature, threshold=tree.threshold,
+                 proba=value / value.sum(axis=1, keepdims=True), classes=model.classes_)
+        return {"kind": "tree", "file": "dt.npz", "max_depth": int(tree.max_depth), "n_nodes": int(tree.node_count)}
+    if name == "nb":
+        # float32 when fitted on float32 input, and predictions are computed in that precision
+        params = {k: getattr(model, f"{k}_") for k in ("theta", "var", "class_prior")}
+        return dict({k: v.tolist() for k, v in params.items()}, kind="gaussian_nb", classes=model.classes_.tolist(),
+                    dtypes={k: v.dtype.str for k, v in params.items()})
+    if name.startswith("knn"):
+        np.savez(os.path.join(path, f"{name}.npz"), X=model._fit_X, y=model.classes_[model._y])
+        return {"kind": "knn", "file": f"{name}.npz",
+                "params": {k: v for k, v in model.get_params().items() if k in KNN_PARAMS}}
+    raise ValueError(f"No bundle format for model '{name}'")
+
+
+def save_bundle(out_dir, models, scaler, selected_idx, selected_cols=None, metrics=None):
+    """Write models ({training or predictor name: fitted model}) and preprocessing as out_dir/bundle."""
+    final = bundle_path(out_dir)
+    tmp = f"{final}.tmp{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    feature_names = getattr(scaler, "feature_names_in_", None)
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "libraries": _library_versions(),
+        "feature_names": None if feature_names is None else [str(c) for c in feature_names],
+        "selected_idx": np.asarray(selected_idx).astype(int).tolist(),
+        "selected_cols": None if selected_cols is None else [str(c) for c in selected_cols],
+        "scaler": {"mean": (scaler.mean_ if scaler.with_mean else np.zeros(scaler.n_features_in_)).tolist(),
+                   "scale": (scaler.scale_ if scaler.with_std else np.ones(scaler.n_features_in_)).tolist()},
+        "metrics": _json_metrics(metrics),
+        "models": {},
+    }
+    for name, model in models.items():
+        name = BUNDLE_NAMES.get(name, name)
+        manifest["models"][name] = _write_model(name, model, tmp)
+    with open(os.path.join(tmp, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=1)
+    # Swap in complete bundles only, so a reader never sees a half-written one.
+    if os.path.exists(final):
+        shutil.rmtree(final)
+    os.replace(tmp, final)
+    return final
+
+
+def _pickled_models(model_dir):
+    """{training name: pickle file} of the models in model_dir, optional ones only if present."""
+    from model_training import MODEL_FILES, OPTIONAL_MODEL_FILES
+    optional = {name: f for name, f in OPTIONAL_MODEL_FILES.items() if os.path.exists(os.path.join(model_dir, f))}
+    return dict(MODEL_FILES, **optional)
+
+
+def bundle_from_pickles(model_dir):
+    """Write model_dir/bundle from the joblib artifacts already in model_dir."""
+    import joblib
+    models = {name: joblib.load(os.path.join(model_dir, filename))
+              for name, filename in _pickled_models(model_dir).items()}
+    scaler = joblib.load(os.path.join(model_dir, "scaler.pkl"))
+    selected_idx = joblib.load(os.path.join(model_dir, "selected_idx.npy"))
+    cols_path = os.path.join(model_dir, "selected_cols.pkl")
+    selected_cols = joblib.load(cols_path) if os.path.exists(cols_path) else None
+    metrics = None
+    if os.path.exists(os.path.join(model_dir, "model_comparison.csv")):
+        import pandas as pd
+        metrics = pd.read_csv(os.path.join(model_dir, "model_comparison.csv"), index_col=0)
+    return save_bundle(model_dir, models, scaler, selected_idx, selected_cols, metrics)
+
+
+class ModelBundle:
+    """Reader for <model_dir>/bundle; models are rebuilt one at a time on request."""
+
+    def __init__(self, model_dir):
+        self.path = bundle_path(model_dir)
+        with open(os.path.join(self.path, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"'{self.path}' is not a model bundle")
+        if self.manifest.get("version", 0) > BUNDLE_VERSION:
+            raise ValueError(f"Model bundle version {self.manifest['version']} is newer than supported "
+                             f"({BUNDLE_VERSION})")
+
+    @property
+    def model_names(self):
+        return list(self.manifest["models"])
+
+    @property
+    def metrics(self):
+        return self.manifest.get("metrics", {})
+
+    @property
+    def selected_idx(self):
+        return np.asarray(self.manifest["selected_idx"], dtype=np.intp)
+
+    @property
+    def selected_cols(self):
+        return self.manifest.get("selected_cols")
+
+    def files(self):
+        return [MANIFEST_FILE] + [entry["file"] for entry in self.manifest["models"].values() if "file" in entry]
+
+    def scaler(self):
+        scaler = self.manifest["scaler"]
+        return ScalerParams(scaler["mean"], scaler["scale"], self.manifest.get("feature_names"))
+
+    def load_model(self, name):
+        entry = self.manifest["models"][name]
+        kind = entry["kind"]
+        if kind == "xgboost":
+            from xgboost import XGBClassifier
+            model = XGBClassifier()
+            model.load_model(os.path.join(self.path, entry["file"]))
+            return model
+        if kind == "tree":
+            with np.load(os.path.join(self.path, entry["file"])) as arrays:
+                return TreeClassifier(*(arrays[k] for k in ("children_left", "children_right", "feature",
+                                                            "threshold", "proba", "classes")))
+        if kind == "gaussian_nb":
+            dtypes = entry.get("dtypes", {})
+            return GaussianNBParams(*(np.asarray(entry[k], dtype=dtypes.get(k, "<f8"))
+                                      for k in ("theta", "var", "class_prior")), np.asarray(entry["classes"]))
+        if kind == "knn":
+            from sklearn.neighbors import KNeighborsClassifier
+            with np.load(os.path.join(self.path, entry["file"])) as arrays:
+                return KNeighborsClassifier(**entry["params"]).fit(arrays["X"], arrays["y"])
+        raise ValueError(f"Unknown model kind '{kind}' in bundle")
+
+
+def _dir_size(paths):
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+
+# Cold loads run in a fresh interpreter, so library imports are part of the time.
+_COLD_PICKLES = """
+import joblib, os, sys, time
+t0 = time.perf_counter()
+for f in sys.argv[2:]:
+    joblib.load(os.path.join(sys.argv[1], f))
+print(time.perf_counter() - t0)
+"""
+
+_COLD_BUNDLE = """
+import sys, time
+t0 = time.perf_counter()
+from model_bundle import ModelBundle
+bundle = ModelBundle(sys.argv[1])
+for key in sys.argv[2:]:
+    bundle.scaler() if key == "scaler" else bundle.load_model(key)
+print(time.perf_counter() - t0)
+"""
+
+
+def _cold_load_s(script, *args):
+    import subprocess
+    import sys
+    here = os.path.dirname(os.path.abspath(__file__))
+    out = subprocess.run([sys.executable, "-c", script, *args], capture_output=True, text=True, check=True, cwd=here)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def benchmark(model_dir, repeat=5):
+    """Load time (warm: best of `repeat` in this process; cold: fresh interpreter) and size, pickles vs bundle."""
+    import joblib
+    import pandas as pd
+
+    if not has_bundle(model_dir):
+        print(f"Writing bundle from the pickles in '{model_dir}'...")
+        bundle_from_pickles(model_dir)
+    bundle = ModelBundle(model_dir)
+    pickles = {"scaler": ["scaler.pkl", "selected_idx.npy"]}
+    model_files = _pickled_models(model_dir)
+    pickles.update({BUNDLE_NAMES[name]: [filename] for name, filename in model_files.items()})
+    bundle_files = {"scaler": [MANIFEST_FILE]}
+    bundle_files.update({name: [e["file"]] if "file" in e else [] for name, e in bundle.manifest["models"].items()})
+
+    def best_of(fn):
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+        return min(times)
+
+    rows = []
+    for key, files in pickles.items():
+        load_pickle = lambda: [joblib.load(os.path.join(model_dir, f)) for f in files]
+        load_bundle = (lambda: ModelBundle(model_dir).scaler()) if key == "scaler" else \
+                      (lambda: ModelBundle(model_dir).load_model(key))
+        load_pickle(), load_bundle()  # imports out of the way
+        rows.append({"Artifact": key,
+                     "PickleLoad_ms": best_of(load_pickle) * 1000, "BundleLoad_ms": best_of(load_bundle) * 1000,
+                     "PickleCold_ms": _cold_load_s(_COLD_PICKLES, model_dir, *files) * 1000,
+                     "BundleCold_ms": _cold_load_s(_COLD_BUNDLE, model_dir, key) * 1000,
+                     "PickleSize_KB": _dir_size(os.path.join(model_dir, f) for f in files) / 1024,
+                     "BundleSize_KB": _dir_size(os.path.join(bundle.path, f) for f in bundle_files[key]) / 1024})
+    all_pickles = [f for files in pickles.values() for f in files]
+    report = pd.DataFrame(rows).set_index("Artifact")
+    report.loc["all"] = report.sum()
+    report.loc["all", "PickleCold_ms"] = _cold_load_s(_COLD_PICKLES, model_dir, *all_pickles) * 1000
+    report.loc["all", "BundleCold_ms"] = _cold_load_s(_COLD_BUNDLE, model_dir, *pickles) * 1000
+    report.loc["all", "BundleSize_KB"] = _dir_size(os.path.join(bundle.path, f) for f in bundle.files()) / 1024
+
+    # The rebuilt predictors must agree with the pickled models
+    split = os.path.join(model_dir, "test_split.npz")
+    if os.path.exists(split):
+        with np.load(split) as data:
+            X_raw = data["X_raw"]
+        X_pickle = joblib.load(os.path.join(model_dir, "scaler.pkl")).transform(
+            pd.DataFrame(X_raw, columns=bundle.manifest["feature_names"]) if bundle.manifest["feature_names"] else X_raw)
+        X_bundle = bundle.scaler().transform(X_raw)
+        idx = bundle.selected_idx
+        for name, filename in model_files.items():
+            key = BUNDLE_NAMES[name]
+            old = joblib.load(os.path.join(model_dir, filename)).predict_proba(X_pickle[:, idx])
+            new = bundle.load_model(key).predict_proba(X_bundle[:, idx])
+            report.loc[key, "MaxProbaDiff"] = float(np.max(np.abs(old - new)))
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write a model directory's bundle and benchmark it against the pickles")
+    parser.add_argument("model_dir")
+    parser.add_argument("--rebuild", action="store_true", help="rewrite the bundle even if one exists")
+    parser.add_argument("--repeat", type=int, default=5, help="warm loads per artifact (best is reported)")
+    parser.add_argument("--csv", default=None, help="also save the report as CSV")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        bundle_from_pickles(args.model_dir)
+    report = benchmark(args.model_dir, args.repeat)
+    print(report.round(3).to_string())
+    if args.csv:
+        report.to_csv(args.csv)
+        print(f"\n✅ Report saved to '{args.csv}'")
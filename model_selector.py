@@ -0,0 +1,105 @@
+"""
+Latency-budget model selection for SecureIoTPredictor
+Keeps live per-model cost estimates (per batch-size bucket) and picks the most
+accurate model that is expected to finish within the remaining budget. When
+more requests are in flight than there are cores, estimates are inflated so the
+predictor degrades to cheaper models under overload.
+"""
+
+import csv
+import os
+import threading
+
+COMPARISON_NAMES = {"KNN": "knn", "DT": "dt", "XGBoost": "xgb", "NaiveBayes": "nb", "KNN_reduced": "knn_reduced"}
+
+# Used when model_comparison.csv is missing (400k sample figures)
+DEFAULT_ACCURACY = {"xgb": 0.99995, "dt": 0.9999125, "knn": 0.9998125, "nb": 0.986613}
+
+# Cost before any measurement: (fixed ms per call, ms per row)
+PRIOR_COST_MS = {"nb": (0.2, 0.001), "dt": (0.2, 0.001), "xgb": (1.0, 0.003), "knn": (2.0, 0.05),
+                 "knn_reduced": (0.5, 0.005)}
+
+
+def load_accuracy(model_dir):
+    path = os.path.join(model_dir, "model_comparison.csv")
+    accuracy = dict(DEFAULT_ACCURACY)
+    if not os.path.exists(path):
+        return accuracy
+
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            # The model name is pandas' unnamed index column
+            name = COMPARISON_NAMES.get(row.get("", next(iter(row.values()))))
+            if name and row.get("Accuracy"):
+                accuracy[name] = float(row["Accuracy"])
+    return accuracy
+
+
+def _bucket(n_rows):
+    return max(int(n_rows), 1).bit_length()
+
+
+class LatencyBudgetSelector:
+    def __init__(self, accuracy=None, alpha=0.2, n_cpus=None):
+        self.accuracy = dict(accuracy or DEFAULT_ACCURACY)
+        self.alpha = alpha
+        self.n_cpus = n_cpus or os.cpu_count() or 1
+        self._costs = {}   # (model, bucket) -> [ewma_ms, ewma_rows]
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_model_dir(cls, model_dir, **kwargs):
+        return cls(load_accuracy(model_dir), **kwargs)
+
+    def estimate_ms(self, name, n_rows):
+        entry = self._costs.get((name, _bucket(n_rows)))
+        if entry is None:
+            # Nearest measured bucket for this model, scaled by rows.
+            known = [(abs(b - _bucket(n_rows)), v) for (m, b), v in list(self._costs.items()) if m == name]
+            if not known:
+                fixed, per_row = PRIOR_COST_MS.get(name, (1.0, 0.01))
+                return fixed + per_row * n_rows
+            entry = min(known, key=lambda k: k[0])[1]
+        ms, rows = entry
+        return ms * max(1.0, n_rows / max(rows, 1.0))
+
+    def load_factor(self):
+        return max(1.0, self._in_flight / self.n_cpus)
+
+    def choose(self, budget_ms, n_rows=1, candidates=None):
+        candidates = [m for m in (candidates or self.accuracy) if m in self.accuracy]
+        if not candidates:
+            raise ValueError("No candidate models with known accuracy")
+
+        factor = self.load_factor()
+        estimates = {m: self.estimate_ms(m, n_rows) * factor for m in candidates}
+        for name in sorted(candidates, key=lambda m: self.accuracy[m], reverse=True):
+            if estimates[name] <= budget_ms:
+                return name, estimates[name]
+        # Nothing fits: degrade to the cheapest model.
+        name = min(estimates, key=estimates.get)
+        return name, estimates[name]
+
+    def record(self, name, n_rows, elapsed_ms):
+        key = (name, _bucket(n_rows))
+        with self._lock:
+            entry = self._costs.get(key)
+            if entry is None:
+                self._costs[key] = [elapsed_ms, float(n_rows)]
+            else:
+                entry[0] += self.alpha * (elapsed_ms - entry[0])
+                entry[1] += self.alpha * (n_rows - entry[1])
+
+    def begin(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def end(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def snapshot(self):
+        with self._lock:
+            costs = {f"{m}@{2 ** (b - 1)}+": round(v[0], 4) for (m, b), v in sorted(self._costs.items())}
+        return {"accuracy": dict(self.accuracy), "cost_ms": costs, "in_flight": self._in_flight}
@@ -0,0 +1,130 @@
+"""
+Concurrent training of the four model families
+Each model is fitted, evaluated and saved in its own thread with its own core
+budget: DT and GaussianNB are single-threaded and get one core each, KNN's
+neighbour queries get a share and XGBoost gets the rest. scikit-learn's tree
+builder and neighbour search and XGBoost all release the GIL, so the fits
+overlap without copying the training data into other processes.
+
+TrainTime_s is each model's own fit time, and results are always reported in
+the fixed KNN, DT, XGBoost, NaiveBayes order whatever finishes first. With a
+checkpoints.Checkpoints, every finished model is checkpointed and restored
+instead of retrained on the next run. With a memory_monitor.MemoryTracker,
+PeakRSS_MB is the process's peak RSS while the model was fitted and evaluated
+(which, when training concurrently, includes the other models' memory).
+Metrics come from one predict_proba pass per model (evaluation.py), and with
+an out_dir each model's confusion matrix and ROC curve points are saved too.
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import joblib
+import numpy as np
+from evaluation import evaluate, save_plot_data
+
+MODEL_ORDER = ["KNN", "DT", "XGBoost", "NaiveBayes"]
+MODEL_FILES = {"KNN": "knn_model.pkl", "DT": "dt_model.pkl",
+               "XGBoost": "xgb_model.pkl", "NaiveBayes": "naivebayes_model.pkl"}
+SINGLE_THREADED = ("DT", "NaiveBayes")
+# Derived after training, not present in every model directory
+OPTIONAL_MODEL_FILES = {"KNN_reduced": "knn_reduced_model.pkl"}
+RESULT_FORMAT = 2  # checkpointed per-model result: (model, metrics, BinaryEvaluator); part of the checkpoint key
+
+_PRINT_LOCK = threading.Lock()
+
+
+def core_budgets(n_cpus=None):
+    """Cores per model: one each for DT and NB, a quarter of the rest for KNN, the remainder for XGBoost."""
+    n_cpus = n_cpus or os.cpu_count() or 1
+    spare = max(n_cpus - len(SINGLE_THREADED), 2)
+    budgets = {name: 1 for name in SINGLE_THREADED}
+    budgets["KNN"] = max(1, spare // 4)
+    budgets["XGBoost"] = max(1, spare - budgets["KNN"])
+    return budgets
+
+
+def evaluate_model(model, X_test, y_test):
+    return evaluate(model, X_test, y_test).metrics()
+
+
+def gather(X, rows, columns, dtype=np.float32):
+    """X[rows][:, columns] as one C-contiguous buffer, filled column by column (no full-width temporary)."""
+    out = np.empty((len(rows), len(columns)), dtype=dtype)
+    for j, c in enumerate(columns):
+        out[:, j] = X[rows, c]
+    return out
+
+
+def _log(message):
+    with _PRINT_LOCK:
+        print(message, flush=True)
+
+
+def train_one(name, factory, n_jobs, X_train, y_train, X_test, y_test, out_dir=None, checkpoint=None,
+              verbose=False, memory=None):
+    """Fit, evaluate and save one model; returns (model, metrics with TrainTime_s and, with memory, PeakRSS_MB,
+    BinaryEvaluator)."""
+    restored = checkpoint.load(f"model_{name}") if checkpoint is not None else None
+    if restored is not None:
+        model, metrics, evaluation = restored
+        _log(f" [OK] {name} restored from checkpoint")
+    else:
+        model = factory(n_jobs)
+        with memory.stage(name) if memory is not None else nullcontext():
+            t0 = time.time()
+            model.fit(X_train, y_train)
+            t1 = time.time()
+            evaluation = evaluate(model, X_test, y_test)
+        metrics = evaluation.metrics()
+        metrics["TrainTime_s"] = t1 - t0
+        if memory is not None:
+            metrics["PeakRSS_MB"] = memory.peak_mb(name)
+        if verbose:
+            _log(f" [OK] {name} trained in {metrics['TrainTime_s']:.2f}s")
+        if checkpoint is not None:
+            checkpoint.save(f"model_{name}", (model, metrics, evaluation))
+    if out_dir is not None:
+        joblib.dump(model, os.path.join(out_dir, MODEL_FILES[name]))
+    return model, metrics, evaluation
+
+
+def train_models(factories, X_train, y_train, X_test, y_test, out_dir=None, n_cpus=None, budgets=None,
+                 concurrent=True, checkpoint=None, memory=None):
+    """Train every model in `factories` ({name: factory(n_jobs)}); returns ({name: model}, {name: metrics})."""
+    names = [name for name in MODEL_ORDER if name in factories] + \
+            [name for name in factories if name not in MODEL_ORDER]
+    models, results, evaluations = {}, {}, {}
+
+    if not concurrent:
+        # One after another, each model free to use every core.
+        for step, name in enumerate(names, 1):
+            print(f"\n4.{step}) Training {name}...")
+            n_jobs = n_cpus or (-1 if name == "KNN" else None)
+            models[name], results[name], evaluations[name] = train_one(
+                name, factories[name], n_jobs, X_train, y_train, X_test, y_test, out_dir, checkpoint,
+                memory=memory)
+        if out_dir is not None:
+            save_plot_data(evaluations, out_dir)
+        return models, results
+
+    budgets = dict(core_budgets(n_cpus), **(budgets or {}))
+    print("\n4) Training " + ", ".join(f"{name} ({budgets.get(name, 1)} cores)" for name in names)
+          + " concurrently...")
+
+    def run(name):
+        models[name], results[name], evaluations[name] = train_one(
+            name, factories[name], budgets.get(name, 1), X_train, y_train, X_test, y_test, out_dir, checkpoint,
+            verbose=True, memory=memory)
+
+    wall_start = time.time()
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        for future in [pool.submit(run, name) for name in names]:
+            future.result()
+    total_fit = sum(r["TrainTime_s"] for r in results.values())
+    print(f" Training wall time {time.time() - wall_start:.2f}s (sum of fit times {total_fit:.2f}s)")
+    if out_dir is not None:
+        save_plot_data({name: evaluations[name] for name in names}, out_dir)
+    return models, {name: results[name] for name in names}
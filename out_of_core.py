@@ -0,0 +1,281 @@
+"""
+Out-of-core training for datasets larger than RAM
+Rows are streamed from one or more columnar caches (dataset_cache) in chunks;
+nothing of size rows x features is ever held in memory:
+
+  1. medians for columns with missing values, one column at a time
+  2. StandardScaler fitted from chunked partial statistics
+  3. scaled train/test rows written to float32 memory-mapped .npy files
+  4. QGA feature selection on a stratified in-memory subsample of the train rows
+  5. XGBoost trained from an external-memory data iterator (pages cached on disk),
+     GaussianNB by partial_fit over chunks
+  6. DT and KNN (which need all rows at once) on a bounded stratified subsample
+  7. every model evaluated chunk by chunk over the test matrix
+
+Rows without a label are skipped. The output directory has the same artifacts
+as sample_and_compare.py (including the unscaled test rows in test_split.npz),
+so SecureIoTPredictor and the tools that replay the test split load it unchanged.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import joblib
+import xgboost
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from dataset_cache import load_dataset
+from stratified_sampling import _valid_labels, stratified_sample, stratified_sample_indices
+from model_training import MODEL_FILES
+from evaluation import BinaryEvaluator, positive_proba, save_plot_data
+from model_bundle import save_bundle
+
+CHUNK_ROWS = 200_000
+QGA_ROWS = 300_000  # train rows the QGA scores chromosomes on
+IN_MEMORY_ROWS = 1_000_000  # cap for DT and KNN, which train on all their rows at once
+
+
+class RowSource:
+    """Rows of several ColumnarDatasets, addressed by one global position 0..n_rows-1."""
+
+    def __init__(self, datasets, rows=None):
+        self.datasets = datasets
+        self.rows = rows or [labeled_rows(ds) for ds in datasets]
+        self.feature_names = datasets[0].feature_names
+        for ds in datasets[1:]:
+            if ds.feature_names != self.feature_names:
+                raise ValueError(f"Feature columns of '{ds.cache_dir}' differ from '{datasets[0].cache_dir}'")
+        self.offsets = np.concatenate([[0], np.cumsum([len(r) for r in self.rows])])
+        self.n_rows = int(self.offsets[-1])
+
+    def subset(self, positions):
+        """RowSource over the rows at sorted global positions."""
+        bounds = np.searchsorted(positions, self.offsets)
+        return RowSource(self.datasets, [rows[positions[bounds[i]:bounds[i + 1]] - self.offsets[i]]
+                                         for i, rows in enumerate(self.rows)])
+
+    def target(self):
+        return np.concatenate([np.asarray(ds.target[r]) for ds, r in zip(self.datasets, self.rows)]).astype(np.int64)
+
+    def column(self, name):
+        return np.concatenate([np.asarray(ds.column(name)[r], dtype=np.float64)
+                               for ds, r in zip(self.datasets, self.rows)])
+
+    def features(self, positions):
+        """Feature matrix (float64) for sorted global positions."""
+        X = np.empty((len(positions), len(self.feature_names)))
+        bounds = np.searchsorted(positions, self.offsets)
+        for i, (ds, rows) in enumerate(zip(self.datasets, self.rows)):
+            lo, hi = bounds[i], bounds[i + 1]
+            if hi > lo:
+                X[lo:hi] = ds.feature_matrix(rows[positions[lo:hi] - self.offsets[i]])
+        return X
+
+
+def _chunks(n, chunk_rows):
+    for start in range(0, n, chunk_rows):
+        yield start, min(start + chunk_rows, n)
+
+
+def labeled_rows(ds, chunk_rows=CHUNK_ROWS):
+    """Row numbers of ds whose Target is not missing, read chunk by chunk."""
+    rows = []
+    for a, b in _chunks(ds.n_rows, chunk_rows):
+        _, mask = _valid_labels(ds.target[a:b])
+        rows.append(np.arange(a, b) if mask is None else a + np.flatnonzero(mask))
+    return np.concatenate(rows) if rows else np.arange(0)
+
+
+def column_medians(source):
+    """Median of every column that has missing values (NaNs can only be in float columns)."""
+    medians = {}
+    for ds in source.datasets:
+        for j, name in enumerate(source.feature_names):
+            if j in medians or ds.column(name).dtype.kind != "f":
+                continue
+            if any(np.isnan(ds.column(name)[a:b]).any() for a, b in _chunks(ds.n_rows, CHUNK_ROWS)):
+                medians[j] = float(np.nanmedian(source.column(name)))
+    return medians
+
+
+def _fill(X, medians):
+    for j, median in medians.items():
+        col = X[:, j]
+        col[np.isnan(col)] = median
+    return X
+
+
+def fit_scaler(source, medians, chunk_rows=CHUNK_ROWS):
+    scaler = StandardScaler()
+    positions = np.arange(source.n_rows)
+    for a, b in _chunks(source.n_rows, chunk_rows):
+        chunk = _fill(source.features(positions[a:b]), medians)
+        scaler.partial_fit(pd.DataFrame(chunk, columns=source.feature_names))
+    return scaler
+
+
+def write_scaled(source, positions, scaler, medians, path, chunk_rows=CHUNK_ROWS, dtype=np.float32):
+    """Scale the rows at `positions` chunk by chunk into a .npy memmap (scaler=None: unscaled)."""
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype,
+                                    shape=(len(positions), len(source.feature_names)))
+    for a, b in _chunks(len(positions), chunk_rows):
+        chunk = _fill(source.features(positions[a:b]), medians)
+        if scaler is not None:
+            chunk -= scaler.mean_
+            chunk /= scaler.scale_
+        out[a:b] = chunk
+    out.flush()
+    return np.load(path, mmap_mode="r")
+
+
+def write_test_split(source, positions, y, medians, out_dir, work_dir, chunk_rows=CHUNK_ROWS):
+    """Unscaled test rows as test_split.npz, as sample_and_compare writes it, without loading them all."""
+    X_raw = write_scaled(source, positions, None, medians, os.path.join(work_dir, "test_raw.npy"), chunk_rows,
+                         dtype=np.float64)
+    # savez streams a memmap into the archive in buffered chunks
+    np.savez_compressed(os.path.join(out_dir, "test_split.npz"),
+                        X_raw=X_raw, y=y, columns=np.array(source.feature_names))
+    del X_raw
+
+
+class _ChunkIter(xgboost.DataIter):
+    """Selected columns of a memory-mapped matrix, one chunk per batch, for external-memory XGBoost."""
+
+    def __init__(self, X, y, idx, chunk_rows, cache_prefix):
+        self.X, self.y, self.idx = X, y, idx
+        self.bounds = list(_chunks(len(y), chunk_rows))
+        self.pos = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self.pos == len(self.bounds):
+            return False
+        a, b = self.bounds[self.pos]
+        input_data(data=np.ascontiguousarray(self.X[a:b][:, self.idx]), label=self.y[a:b])
+        self.pos += 1
+        return True
+
+    def reset(self):
+        self.pos = 0
+
+
+def train_xgb_external(factory, X, y, idx, work_dir, n_jobs=None, chunk_rows=CHUNK_ROWS):
+    """Train the factory's XGBClassifier from an on-disk page cache; returns a fitted XGBClassifier."""
+    clf = factory(n_jobs)
+    params = {k: v for k, v in clf.get_xgb_params().items() if v is not None and k != "use_label_encoder"}
+    params.setdefault("objective", "binary:logistic")
+    data = xgboost.ExtMemQuantileDMatrix(_ChunkIter(X, y, idx, chunk_rows, os.path.join(work_dir, "xgb")),
+                                         max_bin=params.get("max_bin") or 256)
+    booster = xgboost.train(params, data, num_boost_round=clf.n_estimators)
+    clf.load_model(bytearray(booster.save_raw("json")))
+    return clf
+
+
+def train_nb_chunked(factory, X, y, idx, chunk_rows=CHUNK_ROWS):
+    nb = factory(None)
+    classes = np.unique(y)
+    for a, b in _chunks(len(y), chunk_rows):
+        nb.partial_fit(np.asarray(X[a:b][:, idx], dtype=np.float64), y[a:b], classes=classes)
+    return nb
+
+
+def evaluate_chunked(model, X, y, idx, chunk_rows=CHUNK_ROWS):
+    """One predict_proba pass per chunk of the selected columns; returns the BinaryEvaluator."""
+    evaluator = BinaryEvaluator()
+    for a, b in _chunks(len(y), chunk_rows):
+        evaluator.update(y[a:b], positive_proba(model, np.asarray(X[a:b][:, idx], dtype=np.float64)))
+    return evaluator
+
+
+def _subsample(X, y, n, random_state):
+    rows = stratified_sample_indices(y, n, random_state) if n < len(y) else np.arange(len(y))
+    return np.asarray(X[rows], dtype=np.float64), y[rows]
+
+
+def run_out_of_core(source, out_dir, factories, select, test_size=0.3, random_state=42, work_dir=None,
+                    chunk_rows=CHUNK_ROWS, qga_rows=QGA_ROWS, in_memory_rows=IN_MEMORY_ROWS, n_jobs=None):
+    """Out-of-core version of sample_and_compare's pipeline; select(X_sub, y_sub) -> selected column indices."""
+    os.makedirs(out_dir, exist_ok=True)
+    work_dir = work_dir or tempfile.mkdtemp(prefix="ooc_", dir=out_dir)
+    os.makedirs(work_dir, exist_ok=True)
+    t_start = time.time()
+
+    print(f"1) Splitting {source.n_rows} rows from {len(source.datasets)} source(s)...")
+    y = source.target()
+    train_pos, test_pos = train_test_split(np.arange(source.n_rows), test_size=test_size,
+                                           random_state=random_state, stratify=y)
+    train_pos.sort()
+    test_pos.sort()
+    y_train, y_test = y[train_pos], y[test_pos]
+    del y
+
+    print("\n2) Fitting scaler from chunked statistics...")
+    medians = column_medians(source)
+    scaler = fit_scaler(source, medians, chunk_rows)
+    X_train = write_scaled(source, train_pos, scaler, medians, os.path.join(work_dir, "train.npy"), chunk_rows)
+    X_test = write_scaled(source, test_pos, scaler, medians, os.path.join(work_dir, "test.npy"), chunk_rows)
+    print(f" Scaled matrices on disk: {X_train.shape} train, {X_test.shape} test (float32, '{work_dir}')")
+    write_test_split(source, test_pos, y_test, medians, out_dir, work_dir, chunk_rows)
+
+    print(f"\n3) Feature selection on a stratified subsample of {min(qga_rows, len(y_train))} train rows...")
+    selected_idx = np.asarray(select(*_subsample(X_train, y_train, qga_rows, random_state)), dtype=np.intp)
+    selected_cols = [source.feature_names[i] for i in selected_idx]
+    print("Selected features:", selected_cols)
+    joblib.dump(selected_idx, os.path.join(out_dir, "selected_idx.npy"))
+    joblib.dump(selected_cols, os.path.join(out_dir, "selected_cols.pkl"))
+    joblib.dump(scaler, os.path.join(out_dir, "scaler.pkl"))
+
+    models, results = {}, {}
+    print("\n4) Training XGBoost from external memory...")
+    t0 = time.time()
+    models["XGBoost"] = train_xgb_external(factories["XGBoost"], X_train, y_train, selected_idx, work_dir,
+                                           n_jobs, chunk_rows)
+    results["XGBoost"] = {"TrainTime_s": time.time() - t0}
+
+    print("   Training Naive Bayes with partial_fit over chunks...")
+    t0 = time.time()
+    models["NaiveBayes"] = train_nb_chunked(factories["NaiveBayes"], X_train, y_train, selected_idx, chunk_rows)
+    results["NaiveBayes"] = {"TrainTime_s": time.time() - t0}
+
+    n_mem = min(in_memory_rows, len(y_train))
+    print(f"   Training DT and KNN on a stratified subsample of {n_mem} rows...")
+    X_mem, y_mem = _subsample(X_train, y_train, n_mem, random_state)
+    X_mem = np.ascontiguousarray(X_mem[:, selected_idx])
+    for name, jobs in (("DT", None), ("KNN", n_jobs or -1)):
+        t0 = time.time()
+        models[name] = factories[name](jobs).fit(X_mem, y_mem)
+        results[name] = {"TrainTime_s": time.time() - t0}
+    del X_mem
+
+    print("\n5) Evaluating over the test matrix in chunks...")
+    evaluations = {}
+    for name in ("KNN", "DT", "XGBoost", "NaiveBayes"):
+        evaluations[name] = evaluate_chunked(models[name], X_test, y_test, selected_idx, chunk_rows)
+        results[name] = dict(evaluations[name].metrics(), **results[name])
+        joblib.dump(models[name], os.path.join(out_dir, MODEL_FILES[name]))
+    save_plot_data(evaluations, out_dir)
+
+    res_df = pd.DataFrame({name: results[name] for name in ("KNN", "DT", "XGBoost", "NaiveBayes")}).T
+    print(res_df)
+    res_df.to_csv(os.path.join(out_dir, "model_comparison.csv"), index=True)
+    save_bundle(out_dir, models, scaler, selected_idx, selected_cols, res_df)
+
+    del X_train, X_test
+    shutil.rmtree(work_dir, ignore_errors=True)
+    print(f"\n✅ Results and models saved in '{out_dir}' ({time.time() - t_start:.1f}s)")
+    return res_df
+
+
+def load_sources(csv_paths, sample_size=None, random_state=42):
+    """RowSource over the columnar caches of csv_paths, optionally a stratified sample of all of them together."""
+    datasets = [load_dataset(path) for path in csv_paths]
+    if sample_size is None:
+        return RowSource(datasets)
+    if len(datasets) == 1:
+        return RowSource(datasets, [stratified_sample(datasets[0], sample_size, random_state=random_state)])
+    # Class quotas come from the combined labels, so the sample is stratified across sources
+    source = RowSource(datasets)
+    return source.subset(stratified_sample_indices(source.target(), sample_size, random_state))
@@ -0,0 +1,254 @@
+"""
+Multi-process sharded scoring for large offline captures
+K worker processes each load the model artifacts once. Input batches are copied
+into a shared-memory ring buffer and workers write predictions/probabilities
+straight into a shared output array, so only tiny task tuples cross process
+boundaries - no per-record pickling.
+
+Rows are expected to be the 43 numeric features of already verified records
+(signature checks stay with SecureIoTPredictor.batch_secure_predict).
+"""
+
+import contextlib
+import io
+import multiprocessing as mp
+import os
+import queue
+import time
+from collections import deque
+from multiprocessing import shared_memory
+import numpy as np
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+# Native thread pools read these when they load; a forked worker inherits pools that are already loaded
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def _limit_threads(model):
+    # One process per core: stop sklearn/xgboost from spawning their own thread pools.
+    if hasattr(model, "get_params") and "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)
+
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker_main(worker_id, model_dir, model_name, float32, in_name, in_shape, task_q, done_q):
+    if threadpool_limits is not None:
+        threadpool_limits(1)  # BLAS/OpenMP pools already loaded in the parent before fork
+    try:
+        from secure_predictor import SecureIoTPredictor
+        with contextlib.redirect_stdout(io.StringIO()):
+            predictor = SecureIoTPredictor(model_dir, lazy=False, float32=float32)
+            model = predictor.models[model_name]
+            _limit_threads(model)
+            predictor.warmup([model_name])
+        in_shm, inputs = _attach(in_name, in_shape, np.float64)
+    except Exception as e:
+        done_q.put(("error", None, f"worker {worker_id} failed to start: {type(e).__name__}: {e}"))
+        return
+
+    done_q.put(("ready", worker_id, None))
+    out_key, out_shms, preds, probas = None, [], None, None
+
+    while True:
+        task = task_q.get()
+        if task is None:
+            break
+        slot, start, n_rows, pred_name, proba_name, n_total = task
+
+        if out_key != (pred_name, proba_name):
+            for shm in out_shms:
+                shm.close()
+            pred_shm, preds = _attach(pred_name, (n_total,), np.int32)
+            proba_shm, probas = _attach(proba_name, (n_total,), np.float64)
+            out_key, out_shms = (pred_name, proba_name), [pred_shm, proba_shm]
+
+        try:
+            X = predictor.transform(inputs[slot, :n_rows])
+            preds[start:start + n_rows] = model.predict(X)
+            if hasattr(model, "predict_proba"):
+                probas[start:start + n_rows] = model.predict_proba(X)[:, 1]
+            else:
+                probas[start:start + n_rows] = np.nan
+            done_q.put(("done", slot, None))
+        except Exception as e:
+            done_q.put(("error", slot, f"{type(e).__name__}: {e}"))
+
+    for shm in out_shms:
+        shm.close()
+    in_shm.close()
+
+
+class ParallelPredictor:
+    def __init__(self, model_dir="models_sample1100k", model="xgb", n_workers=None,
+                 slot_rows=16384, slots_per_worker=2, n_features=43, float32=False,
+                 start_method=None):
+        self.model_dir = model_dir
+        self.model_name = model
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.slot_rows = slot_rows
+        self.n_slots = self.n_workers * slots_per_worker
+        self.n_features = n_features
+        self.float32 = float32
+        self._ctx = mp.get_context(start_method)
+        self._workers = []
+        self._in_shm = None
+
+    def start(self):
+        if self._workers:
+            return self
+        print(f"Starting {self.n_workers} scoring workers ({self.model_name.upper()})...")
+        in_shape = (self.n_slots, self.slot_rows, self.n_features)
+        self._in_shm = shared_memory.SharedMemory(create=True, size=int(np.prod(in_shape)) * 8)
+        self._inputs = np.ndarray(in_shape, dtype=np.float64, buffer=self._in_shm.buf)
+        self._task_q = self._ctx.Queue()
+        self._done_q = self._ctx.Queue()
+
+        # Set before the processes start, so spawned workers load their pools single-threaded
+        saved_env = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+        os.environ.update({name: "1" for name in THREAD_ENV_VARS})
+        try:
+            for worker_id in range(self.n_workers):
+                p = self._ctx.Process(
+                    target=_worker_main,
+                    args=(worker_id, self.model_dir, self.model_name, self.float32,
+                          self._in_shm.name, in_shape, self._task_q, self._done_q),
+                    daemon=True,
+                )
+                p.start()
+                self._workers.append(p)
+        finally:
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+        for _ in range(self.n_workers):
+            status, _, message = self._next_message()
+            if status == "error":
+                self.close()
+                raise RuntimeError(message)
+        print(f"[OK] {self.n_workers} workers ready")
+        return self
+
+    def _next_message(self):
+        while True:
+            try:
+                return self._done_q.get(timeout=1.0)
+            except queue.Empty:
+                dead = [p.pid for p in self._workers if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Scoring worker(s) {dead} exited unexpectedly")
+
+    def predict(self, X):
+        """Score every row of X; returns (predictions, attack probabilities)."""
+        if not self._workers:
+            self.start()
+
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected a 2-D array with {self.n_features} features, got shape {X.shape}")
+
+        n_total = X.shape[0]
+        if n_total == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+
+        pred_shm = shared_memory.SharedMemory(create=True, size=n_total * 4)
+        proba_shm = shared_memory.SharedMemory(create=True, size=n_total * 8)
+        try:
+            free_slots = deque(range(self.n_slots))
+            start, in_flight, errors = 0, 0, []
+
+            while start < n_total or in_flight:
+                while free_slots and start < n_total and not errors:
+                    slot = free_slots.popleft()
+                    n_rows = min(self.slot_rows, n_total - start)
+                    self._inputs[slot, :n_rows] = X[start:start + n_rows]
+                    self._task_q.put((slot, start, n_rows, pred_shm.name, proba_shm.name, n_total))
+                    start += n_rows
+                    in_flight += 1
+                if not in_flight:
+                    break
+
+                status, slot, message = self._next_message()
+                in_flight -= 1
+                free_slots.append(slot)
+                if status == "error":
+                    errors.append(message)
+
+            if errors:
+                raise RuntimeError(f"Parallel scoring failed: {errors[0]}")
+
+            preds = np.ndarray((n_total,), dtype=np.int32, buffer=pred_shm.buf).copy()
+            probas = np.ndarray((n_total,), dtype=np.float64, buffer=proba_shm.buf).copy()
+            return preds, probas
+        finally:
+            for shm in (pred_shm, proba_shm):
+                shm.close()
+                shm.unlink()
+
+    def close(self):
+        for _ in self._workers:
+            self._task_q.put(None)
+        for p in self._workers:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        self._workers = []
+        if self._in_shm is not None:
+            self._inputs = None
+            self._in_shm.close()
+            self._in_shm.unlink()
+            self._in_shm = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_matrix(path):
+    if path.endswith(".npz"):
+        return np.load(path)["X_raw"]
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    import pandas as pd
+    df = pd.read_csv(path)
+    return df.drop(columns=["Target"], errors="ignore").select_dtypes(include=[np.number]).values
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score a capture with K worker processes")
+    parser.add_argument("input", help=".npy / .npz (X_raw) / .csv with the 43 numeric features")
+    parser.add_argument("--model-dir", default="models_sample1100k")
+    parser.add_argument("--model", default="xgb", choices=["knn", "dt", "xgb", "nb", "knn_reduced"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--slot-rows", type=int, default=16384)
+    parser.add_argument("--float32", action="store_true")
+    parser.add_argument("--output", default=None, help="optional .npz for predictions/probabilities")
+    args = parser.parse_args()
+
+    X = load_matrix(args.input)
+    with ParallelPredictor(args.model_dir, args.model, args.workers, args.slot_rows,
+                           n_features=X.shape[1], float32=args.float32) as executor:
+        t0 = time.perf_counter()
+        preds, probas = executor.predict(X)
+        elapsed = time.perf_counter() - t0
+
+    print(f"Scored {len(preds)} rows in {elapsed:.2f}s "
+          f"({len(preds) / max(elapsed, 1e-9):,.0f} rows/s, {executor.n_workers} workers)")
+    print(f"Predicted attacks: {int(preds.sum())} ({preds.mean() * 100:.2f}%)")
+    if args.output:
+        np.savez_compressed(args.output, prediction=preds, probability=probas)
+        print(f"[OK] Saved results to {args.output}")
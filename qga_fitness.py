@@ -0,0 +1,526 @@
+"""
+Parallel fitness engine for the QGA feature selection
+Spreads (chromosome x CV fold) XGBoost evaluations over a process pool. The
+training split is copied into shared memory once and every worker attaches to
+it, so tasks only carry the selected column indices. Each worker gets an equal
+share of the cores for XGBoost's own threads to avoid oversubscription.
+
+Fold splits and XGBoost settings are the same as the serial
+cross_val_score(..., cv=3, scoring="accuracy") run, and XGBoost's hist training
+does not depend on the thread count, so results match the serial run exactly.
+
+FitnessCache memoizes scores by (dataset fingerprint, hyperparameters, CV config,
+chromosome bitmask), in memory and optionally in a JSON file shared across runs.
+
+With quantize_bins set, the training split is binned once into uint8 codes with
+fixed per-feature cut points (8x smaller than float64) and rows are laid out
+fold by fold, so fold splits are row slices of the shared codes. Every fit
+streams its selected columns into XGBoost in blocks and reuses cut points from a
+tiny reference matrix instead of re-sketching quantiles per chromosome and fold.
+"""
+
+import hashlib
+import json
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+import xgboost as xgb
+from xgboost import XGBClassifier
+
+FITNESS_XGB_PARAMS = dict(n_estimators=50, max_depth=5, learning_rate=0.1,
+                          subsample=0.8, use_label_encoder=False, eval_metric="logloss")
+BLOCK_ROWS = 65536
+
+_WORKER = {}
+
+
+def _share(array):
+    array = np.asarray(array)  # any memory order; copied straight into C order below
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    view[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _init_worker(X_spec, y_spec, fidelities, n_threads, n_bins=None):
+    X_shm, X = _attach(X_spec)
+    y_shm, y = _attach(y_spec)
+    _WORKER.update(X=X, y=y, shms=(X_shm, y_shm), fidelities=fidelities, n_threads=n_threads, n_bins=n_bins)
+
+
+def fold_accuracy(X, y, train_idx, test_idx, idx, params, n_threads=None):
+    clf = XGBClassifier(**params, n_jobs=n_threads)
+    clf.fit(X[np.ix_(train_idx, idx)], y[train_idx])
+    y_pred = clf.predict(X[np.ix_(test_idx, idx)])
+    return float(np.mean(y_pred == y[test_idx]))
+
+
+class QuantileBinner:
+    """Fixed per-feature cut points; transform() maps values to uint8 bin codes."""
+
+    def __init__(self, cuts, n_bins):
+        self.cuts = cuts
+        self.n_bins = n_bins
+
+    @classmethod
+    def fit(cls, X, n_bins=256, sample_rows=200_000, random_state=42, rows=None):
+        if not 2 <= n_bins <= 256:
+            raise ValueError("n_bins must be between 2 and 256 for uint8 codes")
+        n = len(X) if rows is None else len(rows)
+        if n > sample_rows:
+            sample = np.sort(np.random.default_rng(random_state).choice(n, sample_rows, replace=False))
+            rows = sample if rows is None else rows[sample]
+        cuts = []
+        for j in range(X.shape[1]):
+            col = np.asarray(X[:, j] if rows is None else X[rows, j], dtype=np.float64)
+            values = np.unique(col[~np.isnan(col)])
+            if len(values) <= n_bins:
+                # Few distinct values: one bin each, cut halfway between neighbours.
+                cut = (values[:-1] + values[1:]) / 2
+            else:
+                cut = np.unique(np.quantile(col[~np.isnan(col)], np.linspace(0, 1, n_bins + 1)[1:-1]))
+            cuts.append(cut)
+        return cls(cuts, n_bins)
+
+    def transform(self, X, rows=None, block_rows=BLOCK_ROWS):
+        n = len(X) if rows is None else len(rows)
+        codes = np.empty((n, len(self.cuts)), dtype=np.uint8)
+        for start in range(0, n, block_rows):
+            stop = min(start + block_rows, n)
+            block = X[start:stop] if rows is None else X[rows[start:stop]]
+            for j, cut in enumerate(self.cuts):
+                codes[start:stop, j] = np.searchsorted(cut, block[:, j], side="right")
+        return codes
+
+
+def _row_parts(rows, max_runs=8):
+    """Sorted row indices as a few slices when they form contiguous runs, else the index array."""
+    rows = np.sort(rows)
+    breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+    if len(breaks) + 1 > max_runs:
+        return [rows]
+    starts = np.concatenate([[0], breaks])
+    stops = np.concatenate([breaks, [len(rows)]])
+    return [slice(int(rows[a]), int(rows[b - 1]) + 1) for a, b in zip(starts, stops) if b > a]
+
+
+def _blocks(parts, block_rows=BLOCK_ROWS):
+    for part in parts:
+        if isinstance(part, slice):
+            for start in range(part.start, part.stop, block_rows):
+                yield slice(start, min(start + block_rows, part.stop))
+        else:
+            for start in range(0, len(part), block_rows):
+                yield part[start:start + block_rows]
+
+
+class _CodeBlocks(xgb.DataIter):
+    """Feeds the selected uint8 columns of some row parts to XGBoost one block at a time."""
+
+    def __init__(self, codes, y, parts, idx):
+        self.codes, self.y, self.idx = codes, y, idx
+        self.blocks = list(_blocks(parts))
+        self.pos = 0
+        super().__init__()
+
+    def next(self, input_data):
+        if self.pos == len(self.blocks):
+            return False
+        rows = self.blocks[self.pos]
+        input_data(data=np.take(self.codes[rows], self.idx, axis=1), label=self.y[rows])
+        self.pos += 1
+        return True
+
+    def reset(self):
+        self.pos = 0
+
+
+_REFERENCES = {}
+
+
+def _reference(n_features, n_bins):
+    """Tiny QuantileDMatrix whose cut points separate every code, reused for any column subset."""
+    key = (n_features, n_bins)
+    if key not in _REFERENCES:
+        grid = np.repeat(np.arange(n_bins, dtype=np.float32)[:, None], n_features, axis=1)
+        _REFERENCES[key] = xgb.QuantileDMatrix(grid, max_bin=n_bins)
+    return _REFERENCES[key]
+
+
+def _native_params(params, n_classes, n_bins, n_threads=None):
+    native = {"tree_method": "hist", "max_bin": n_bins, "max_depth": params.get("max_depth", 6),
+              "eta": params.get("learning_rate", 0.3), "subsample": params.get("subsample", 1.0),
+              "seed": params.get("random_state", 0), "eval_metric": params.get("eval_metric", "logloss")}
+    if n_classes > 2:
+        native.update(objective="multi:softprob", num_class=n_classes, eval_metric="mlogloss")
+    else:
+        native["objective"] = "binary:logistic"
+    if n_threads:
+        native["nthread"] = n_threads
+    return native
+
+
+def quantized_fold_accuracy(codes, y, train_parts, test_parts, idx, params, n_bins, n_threads=None):
+    """fold_accuracy on uint8 codes: train/test are row parts (slices or index arrays) of the codes."""
+    n_classes = max(int(y.max()) + 1, 2)
+    dtrain = xgb.QuantileDMatrix(_CodeBlocks(codes, y, train_parts, idx),
+                                 ref=_reference(len(idx), n_bins), max_bin=n_bins)
+    booster = xgb.train(_native_params(params, n_classes, n_bins, n_threads), dtrain,
+                        num_boost_round=params.get("n_estimators", 100))
+    correct, total = 0, 0
+    for rows in _blocks(test_parts):
+        proba = booster.inplace_predict(np.take(codes[rows], idx, axis=1))
+        y_pred = (proba > 0.5).astype(int) if proba.ndim == 1 else np.argmax(proba, axis=1)
+        correct += int(np.sum(y_pred == y[rows]))
+        total += len(y_pred)
+    return correct / total
+
+
+def _fold_score(X, y, train, test, idx, params, n_threads=None, n_bins=None):
+    if n_bins:
+        return quantized_fold_accuracy(X, y, train, test, idx, params, n_bins, n_threads)
+    return fold_accuracy(X, y, train, test, idx, params, n_threads)
+
+
+def _run_task(task):
+    chrom_id, fid, fold, idx = task
+    w = _WORKER
+    folds, params = w["fidelities"][fid]
+    train_idx, test_idx = folds[fold]
+    try:
+        return chrom_id, fold, _fold_score(w["X"], w["y"], train_idx, test_idx, idx, params,
+                                           w["n_threads"], w["n_bins"])
+    except Exception:
+        return chrom_id, fold, None
+
+
+def dataset_fingerprint(X, y, rows=None, block_rows=BLOCK_ROWS):
+    """SHA-256 of X (or its `rows`, hashed block by block without a full copy) and y."""
+    h = hashlib.sha256()
+    n = len(X) if rows is None else len(rows)
+    h.update(str(((n,) + X.shape[1:], X.dtype.str)).encode())
+    for start in range(0, n, block_rows):
+        block = X[start:start + block_rows] if rows is None else X[rows[start:start + block_rows]]
+        h.update(memoryview(np.ascontiguousarray(block)).cast("B"))
+    y = np.ascontiguousarray(y)
+    h.update(str((y.shape, y.dtype.str)).encode())
+    h.update(memoryview(y).cast("B"))
+    return h.hexdigest()
+
+
+class FitnessCache:
+    def __init__(self, path=None):
+        self.path = path
+        self.scores = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self.scores = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print(f"⚠ Ignoring unreadable fitness cache '{self.path}'")
+            return {}
+
+    @staticmethod
+    def context_key(fingerprint, params, cv):
+        config = json.dumps({"data": fingerprint, "params": params, "cv": cv}, sort_keys=True)
+        return hashlib.sha256(config.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def chromosome_key(chrom):
+        return np.packbits(np.asarray(chrom, dtype=np.uint8)).tobytes().hex() + f"/{len(chrom)}"
+
+    def get(self, context, chrom):
+        score = self.scores.get(context, {}).get(self.chromosome_key(chrom))
+        if score is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return score
+
+    def put(self, context, chrom, score):
+        self.scores.setdefault(context, {})[self.chromosome_key(chrom)] = score
+
+    def save(self):
+        if not self.path:
+            return
+        # Merge with whatever other runs wrote since we loaded, then replace atomically.
+        merged = self._read() if os.path.exists(self.path) else {}
+        for context, entries in self.scores.items():
+            merged.setdefault(context, {}).update(entries)
+        tmp = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(merged, f)
+        os.replace(tmp, self.path)
+        self.scores = merged
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return f"{self.hits}/{lookups} fitness lookups served from cache ({rate:.1%} hit rate)"
+
+
+class Fidelity:
+    """One evaluation budget: XGBoost trees, a stratified fraction of the rows and the first n_folds folds."""
+
+    def __init__(self, fraction=1.0, n_estimators=None, n_folds=None):
+        self.fraction = fraction
+        self.n_estimators = n_estimators
+        self.n_folds = n_folds
+
+    def __repr__(self):
+        return f"Fidelity(fraction={self.fraction}, n_estimators={self.n_estimators}, n_folds={self.n_folds})"
+
+
+class ParallelFitness:
+    def __init__(self, X, y, cv=3, random_state=42, xgb_params=None, n_workers=None, mp_context="fork",
+                 cache=None, fidelities=None, quantize_bins=None, rows=None):
+        # With `rows`, the training split is those rows of X (and y); no copy of them is made.
+        self.X = X
+        self.rows = None if rows is None else np.asarray(rows)
+        self._y_all = np.asarray(y)
+        self.y = self._y_all if rows is None else self._y_all[self.rows]
+        self.cv = cv
+        self.params = dict(xgb_params or FITNESS_XGB_PARAMS, random_state=random_state)
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.mp_context = mp_context
+        self.quantize_bins = quantize_bins
+        self._pool = None
+        self._shms = []
+        self.cache = cache
+        fingerprint = dataset_fingerprint(X, self.y, self.rows) if cache is not None else None
+
+        # Cheaper fidelities first; the last one is always full CV on every row.
+        self.fidelities = []
+        for fidelity in list(fidelities or []) + [Fidelity()]:
+            self.fidelities.append(self._prepare(fidelity, random_state, fingerprint))
+        self.folds = self.fidelities[-1]["folds"]
+
+        self._X, self._y = self.X, self._y_all  # splits index all rows of X, so labels must too
+        for f in self.fidelities:
+            f["splits"] = f["folds"] if self.rows is None else [(self.rows[tr], self.rows[te]) for tr, te in f["folds"]]
+        if quantize_bins:
+            self._quantize(quantize_bins, random_state)
+
+        # Fork lets workers inherit the parent's state (including sweep workers' own data)
+        # without re-importing the launching script.
+        if self.n_workers > 1 and mp_context not in mp.get_all_start_methods():
+            print(f"⚠ '{mp_context}' start method unavailable; evaluating fitness serially")
+            self.n_workers = 1
+
+    def _prepare(self, fidelity, random_state, fingerprint):
+        params = dict(self.params)
+        if fidelity.n_estimators is not None:
+            params["n_estimators"] = fidelity.n_estimators
+        n_folds = min(fidelity.n_folds or self.cv, self.cv)
+
+        rows = np.arange(len(self.y))
+        if fidelity.fraction < 1.0:
+            from stratified_sampling import stratified_sample_indices
+            rows = stratified_sample_indices(self.y, int(round(fidelity.fraction * len(self.y))), random_state)
+        splits = StratifiedKFold(n_splits=self.cv).split(np.zeros(len(rows)), self.y[rows])
+        folds = [(rows[tr], rows[te]) for tr, te in splits][:n_folds]
+
+        is_full = fidelity.fraction >= 1.0 and n_folds == self.cv and params == self.params
+        context = None
+        if fingerprint is not None:
+            # Full fidelity keeps the plain key so its scores are shared with single-fidelity runs.
+            cv_config = self.cv if is_full else {"cv": self.cv, "n_folds": n_folds, "fraction": fidelity.fraction}
+            key_params = dict(params, quantize_bins=self.quantize_bins) if self.quantize_bins else params
+            context = FitnessCache.context_key(fingerprint, key_params, cv_config)
+        return {"fidelity": fidelity, "params": params, "folds": folds, "context": context,
+                "work": len(rows) * params["n_estimators"] * n_folds}
+
+    def _quantize(self, n_bins, random_state):
+        # Lay rows out fold by fold (full-CV test folds in order) so every split is a few row slices.
+        order = np.concatenate([te for _, te in self.fidelities[-1]["folds"]])
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        self.binner = QuantileBinner.fit(self.X, n_bins, random_state=random_state, rows=self.rows)
+        self._X = self.binner.transform(self.X, rows=order if self.rows is None else self.rows[order])
+        self._y = self.y[order]
+        for f in self.fidelities:
+            f["splits"] = [(_row_parts(position[tr]), _row_parts(position[te])) for tr, te in f["folds"]]
+
+    def _start_pool(self):
+        # With `rows`, all of X is shared (test rows included) and tasks index it directly.
+        X_shm, X_spec = _share(self._X)
+        y_shm, y_spec = _share(self._y)
+        self._shms = [X_shm, y_shm]
+        n_threads = max(1, (os.cpu_count() or 1) // self.n_workers)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            mp_context=mp.get_context(self.mp_context),
+            initializer=_init_worker,
+            initargs=(X_spec, y_spec, [(f["splits"], f["params"]) for f in self.fidelities], n_threads,
+                      self.quantize_bins),
+        )
+
+    def __call__(self, chrom):
+        return float(self.evaluate(np.asarray(chrom)[None, :])[0])
+
+    def evaluate(self, population, fidelity=-1):
+        """Mean CV accuracy of XGBoost on each chromosome's selected columns (0.0 if none/failed)."""
+        population = np.asarray(population)
+        if self.cache is None:
+            return self._evaluate(population, fidelity)[0]
+
+        context = self.fidelities[fidelity]["context"]
+        fitnesses = np.zeros(len(population))
+        pending = {}
+        for i, chrom in enumerate(population):
+            if not chrom.any():
+                continue
+            key = FitnessCache.chromosome_key(chrom)
+            if key in pending:
+                # Repeat within this population: evaluated once below.
+                self.cache.hits += 1
+                pending[key].append(i)
+                continue
+            score = self.cache.get(context, chrom)
+            if score is None:
+                pending[key] = [i]
+            else:
+                fitnesses[i] = score
+
+        if pending:
+            todo = [rows[0] for rows in pending.values()]
+            scores, failed = self._evaluate(population[todo], fidelity)
+            for rows, score, did_fail in zip(pending.values(), scores, failed):
+                fitnesses[rows] = score
+                if not did_fail:
+                    self.cache.put(context, population[rows[0]], float(score))
+            self.cache.save()
+        return fitnesses
+
+    def _evaluate(self, population, fidelity=-1):
+        fid = fidelity % len(self.fidelities)
+        folds, params = self.fidelities[fid]["splits"], self.fidelities[fid]["params"]
+        fitnesses = np.zeros(len(population))
+        failed = np.zeros(len(population), dtype=bool)
+        selections = [np.where(chrom == 1)[0] for chrom in population]
+
+        if self.n_workers == 1:
+            for i, idx in enumerate(selections):
+                if len(idx) == 0:
+                    continue
+                try:
+                    fitnesses[i] = float(np.mean([_fold_score(self._X, self._y, tr, te, idx, params,
+                                                              n_bins=self.quantize_bins)
+                                                  for tr, te in folds]))
+                except Exception:
+                    failed[i] = True
+            return fitnesses, failed
+
+        if self._pool is None:
+            self._start_pool()
+        tasks = [(i, fid, fold, idx) for i, idx in enumerate(selections) if len(idx) > 0
+                 for fold in range(len(folds))]
+        scores = np.full((len(population), len(folds)), np.nan)
+        for chrom_id, fold, score in self._pool.map(_run_task, tasks):
+            if score is None:
+                failed[chrom_id] = True
+            else:
+                scores[chrom_id, fold] = score
+
+        for i, idx in enumerate(selections):
+            if len(idx) > 0 and not failed[i]:
+                fitnesses[i] = float(np.mean(scores[i]))
+        return fitnesses, failed
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.save()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SuccessiveHalvingFitness:
+    """Multi-fidelity fitness: score everyone cheaply, promote the top 1/eta to the next fidelity.
+
+    Only chromosomes that survive to the last (full) fidelity keep their full CV score;
+    eliminated ones keep their last cheap score, capped just below the weakest finalist,
+    so the generation's best is always a full-fidelity result.
+    """
+
+    def __init__(self, engine, eta=3, min_finalists=1):
+        self.engine = engine
+        self.eta = eta
+        self.min_finalists = min_finalists
+        self.evaluations = [0] * len(engine.fidelities)
+        self.work = 0
+        self.full_work = 0
+
+    def __call__(self, chrom):
+        return float(self.evaluate(np.asarray(chrom)[None, :])[0])
+
+    def evaluate(self, population):
+        population = np.asarray(population)
+        fitnesses = np.zeros(len(population))
+        alive = np.array([i for i, chrom in enumerate(population) if chrom.any()], dtype=int)
+        n_rungs = len(self.engine.fidelities)
+        self.full_work += len(alive) * self.engine.fidelities[-1]["work"]
+
+        for rung in range(n_rungs):
+            if len(alive) == 0:
+                break
+            scores = self.engine.evaluate(population[alive], fidelity=rung)
+            self.evaluations[rung] += len(alive)
+            self.work += len(alive) * self.engine.fidelities[rung]["work"]
+            fitnesses[alive] = scores
+            if rung == n_rungs - 1:
+                break
+
+            n_keep = max(self.min_finalists, int(np.ceil(len(alive) / self.eta)))
+            alive = alive[np.argsort(-scores, kind="stable")[:n_keep]]
+
+        if len(alive):
+            floor = np.nextafter(fitnesses[alive].min(), -np.inf)
+            dropped = np.ones(len(population), dtype=bool)
+            dropped[alive] = False
+            fitnesses[dropped & (fitnesses > floor)] = floor
+        return fitnesses
+
+    def summary(self):
+        per_rung = ", ".join(f"{f['fidelity'].fraction:.0%}/{f['params']['n_estimators']} trees/"
+                             f"{len(f['folds'])} folds: {n}"
+                             for f, n in zip(self.engine.fidelities, self.evaluations))
+        saving = self.full_work / self.work if self.work else 1.0
+        return f"Successive halving evaluations [{per_rung}] - {saving:.1f}x less training work than full fidelity"
+
+    def ranking_report(self, population):
+        """Spearman correlation of each fidelity's scores with full fidelity, and whether the winners agree."""
+        from scipy.stats import spearmanr
+        population = np.asarray([chrom for chrom in population if np.any(chrom)])
+        full = self.engine.evaluate(population, fidelity=-1)
+        multi = self.evaluate(population)
+        report = {"winner_matches": bool(np.argmax(full) == np.argmax(multi)),
+                  "winner_gap": float(full.max() - full[np.argmax(multi)])}
+        for rung in range(len(self.engine.fidelities) - 1):
+            cheap = self.engine.evaluate(population, fidelity=rung)
+            report[f"spearman_rung{rung}"] = float(spearmanr(cheap, full).correlation)
+        return report
@@ -1,14 +1,24 @@
 import pandas as pd
 import numpy as np
 import joblib
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.naive_bayes import GaussianNB
 from xgboost import XGBClassifier
-import warnings, time, os
+import warnings, time, os, sys, json
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from dataset_cache import load_dataset
+from stratified_sampling import stratified_sample
+from qga_fitness import ParallelFitness, FitnessCache, Fidelity, SuccessiveHalvingFitness, FITNESS_XGB_PARAMS
+from qga_selection import QuantumGA, select_features
+from model_training import train_models, gather, RESULT_FORMAT
+from memory_monitor import MemoryTracker
+from model_bundle import save_bundle
+from evaluation import predict_latency_ms, save_plot_data, THRESHOLD, AUC_BINS, AUC_EXACT_MAX_ROWS, ROC_POINTS
+from checkpoints import Checkpoints
 
 warnings.filterwarnings("ignore")
 
@@ -20,186 +30,336 @@ RANDOM_STATE = 42
 QGA_POP = 12
 QGA_GENS = 8
 QGA_NQUBITS = 40
+QGA_ROTATION = "constant"  # rotation schedule: constant (0.06), linear, exponential
+QGA_ELITES = 0  # best states re-injected into each generation
+QGA_PATIENCE = None  # stop after this many generations without improvement (None = run all)
+QGA_WORKERS = None  # fitness worker processes (None = one per core, 1 = serial)
+QGA_CACHE_FILE = "qga_fitness_cache.json"  # persistent fitness memo shared across runs (None = in-memory only)
+QGA_MULTI_FIDELITY = False  # successive halving: cheap fidelities first, only the top 1/ETA go on
+QGA_FIDELITIES = [Fidelity(fraction=0.05, n_estimators=10, n_folds=1),
+                  Fidelity(fraction=0.25, n_estimators=25, n_folds=1)]  # full 3-fold CV always runs last
+QGA_HALVING_ETA = 3
+QGA_QUANTIZE_BINS = None  # e.g. 256: bin the training split once into uint8 codes reused by every fit
 KNN_NEIGH = 5
 DT_MAX_DEPTH = 12
+TRAIN_CONCURRENT = True  # fit the four models side by side with per-model core budgets
+KNN_COMPRESS = True  # also fit a KNN on a compressed reference set (knn_compression.py), saved as KNN_reduced
 
-OUT_DIR = "models_sample300k"
-os.makedirs(OUT_DIR, exist_ok=True)
-
-print("1) Loading dataset and drawing stratified sample...")
-df = pd.read_csv(CSV_FILE)
-if "Target" not in df.columns:
-    raise RuntimeError("Target column 'Target' not found in CSV.")
-
-df = df.dropna(subset=["Target"])
-if len(df) <= SAMPLE_SIZE:
-    sample_df = df
-    print(f"Dataset has {len(df)} rows; using full dataset.")
-else:
-    sample_df = df.groupby("Target", group_keys=False).apply(
-        lambda x: x.sample(frac=min(1, SAMPLE_SIZE/len(df)), random_state=RANDOM_STATE)
-    )
-    if len(sample_df) > SAMPLE_SIZE:
-        sample_df = sample_df.sample(n=SAMPLE_SIZE, random_state=RANDOM_STATE)
-
-print("Sample shape:", sample_df.shape)
-print("Class counts:\n", sample_df["Target"].value_counts())
-
-print("\n2) Preprocessing (numeric-only, scaling)...")
-y = sample_df["Target"].astype(int)
-X = sample_df.drop(columns=["Target"]).select_dtypes(include=[np.number]).copy()
-X = X.fillna(X.median())
-
-orig_columns = list(X.columns)
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X_scaled, y, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=y
-)
-print("Train/test shapes:", X_train.shape, X_test.shape)
-
-print("\n3) Running lightweight QGA for feature selection...")
-rng = np.random.default_rng(RANDOM_STATE)
-n_features = X_train.shape[1]
-n_qubits = min(QGA_NQUBITS, n_features)
-
-def init_population(pop_size, n_q):
-    return rng.random((pop_size, n_q)) * 0.98 + 0.01
-
-def measure_state(probs):
-    return (rng.random(probs.shape) < probs).astype(int)
-
-def fitness_binary(chrom):
-    idx = np.where(chrom == 1)[0]
-    if len(idx) == 0:
-        return 0.0
-    clf = XGBClassifier(n_estimators=50, max_depth=5, learning_rate=0.1,
-                        subsample=0.8, use_label_encoder=False, eval_metric="logloss",
-                        random_state=RANDOM_STATE)
-    try:
-        scores = cross_val_score(clf, X_train[:, idx], y_train, cv=3, scoring="accuracy", n_jobs=1)
-        return float(np.mean(scores))
-    except Exception:
-        return 0.0
-
-population = init_population(QGA_POP, n_qubits)
-best_state = None
-best_score = 0.0
-
-for gen in range(QGA_GENS):
-    measured = measure_state(population)
-    fitnesses = np.array([fitness_binary(ch) for ch in measured])
-    gen_best_idx = int(np.argmax(fitnesses))
-    gen_best_score = float(fitnesses[gen_best_idx])
-    gen_best_state = measured[gen_best_idx]
-
-    if gen_best_score > best_score:
-        best_score = gen_best_score
-        best_state = gen_best_state.copy()
-
-    for i in range(QGA_POP):
-        for j in range(n_qubits):
-            if measured[i, j] != best_state[j]:
-                population[i, j] += 0.06 if measured[i, j] < best_state[j] else -0.06
-                population[i, j] = np.clip(population[i, j], 0.01, 0.99)
-
-    print(f" Generation {gen+1}/{QGA_GENS} | Gen best acc: {gen_best_score:.4f} | Overall best: {best_score:.4f}")
-
-if best_state is None:
-    variances = np.var(X_train, axis=0)
-    selected_idx = np.argsort(variances)[-30:]
-else:
-    selected_idx = np.where(best_state == 1)[0]
-    if len(selected_idx) == 0:
-        variances = np.var(X_train, axis=0)
-        selected_idx = np.argsort(variances)[-30:]
-    elif len(selected_idx) > 100:
-        variances = np.var(X_train[:, selected_idx], axis=0)
-        order = np.argsort(variances)[-50:]
-        selected_idx = selected_idx[order]
-
-selected_cols = [orig_columns[i] for i in selected_idx]
-print("Selected features:", selected_cols)
-joblib.dump(selected_idx, os.path.join(OUT_DIR, "selected_idx.npy"))
-joblib.dump(selected_cols, os.path.join(OUT_DIR, "selected_cols.pkl"))
-joblib.dump(scaler, os.path.join(OUT_DIR, "scaler.pkl"))
-
-X_train_sel = X_train[:, selected_idx]
-X_test_sel = X_test[:, selected_idx]
-
-results = {}
-
-print("\n4.1) Training KNN...")
-knn = KNeighborsClassifier(n_neighbors=KNN_NEIGH, n_jobs=-1)
-t0 = time.time()
-knn.fit(X_train_sel, y_train)
-t1 = time.time()
-y_pred = knn.predict(X_test_sel)
-results["KNN"] = {
-    "Accuracy": accuracy_score(y_test, y_pred),
-    "Precision": precision_score(y_test, y_pred, zero_division=0),
-    "Recall": recall_score(y_test, y_pred, zero_division=0),
-    "F1": f1_score(y_test, y_pred, zero_division=0),
-    "ROC-AUC": roc_auc_score(y_test, knn.predict_proba(X_test_sel)[:, 1]),
-    "TrainTime_s": t1 - t0
+# Model constructors, called with the model's core budget
+MODEL_FACTORIES = {
+    "KNN": lambda n_jobs: KNeighborsClassifier(n_neighbors=KNN_NEIGH, n_jobs=n_jobs),
+    "DT": lambda n_jobs: DecisionTreeClassifier(max_depth=DT_MAX_DEPTH, random_state=RANDOM_STATE),
+    "XGBoost": lambda n_jobs: XGBClassifier(n_estimators=150, max_depth=6, learning_rate=0.08,
+                                            subsample=0.9, colsample_bytree=0.9,
+                                            use_label_encoder=False, eval_metric="logloss",
+                                            random_state=RANDOM_STATE, n_jobs=n_jobs),
+    "NaiveBayes": lambda n_jobs: GaussianNB(),
 }
-joblib.dump(knn, os.path.join(OUT_DIR, "knn_model.pkl"))
-
-print("\n4.2) Training Decision Tree...")
-dt = DecisionTreeClassifier(max_depth=DT_MAX_DEPTH, random_state=RANDOM_STATE)
-t0 = time.time()
-dt.fit(X_train_sel, y_train)
-t1 = time.time()
-y_pred = dt.predict(X_test_sel)
-results["DT"] = {
-    "Accuracy": accuracy_score(y_test, y_pred),
-    "Precision": precision_score(y_test, y_pred, zero_division=0),
-    "Recall": recall_score(y_test, y_pred, zero_division=0),
-    "F1": f1_score(y_test, y_pred, zero_division=0),
-    "ROC-AUC": roc_auc_score(y_test, dt.predict_proba(X_test_sel)[:, 1]),
-    "TrainTime_s": t1 - t0
-}
-joblib.dump(dt, os.path.join(OUT_DIR, "dt_model.pkl"))
-
-print("\n4.3) Training XGBoost...")
-xgb = XGBClassifier(n_estimators=150, max_depth=6, learning_rate=0.08,
-                    subsample=0.9, colsample_bytree=0.9,
-                    use_label_encoder=False, eval_metric="logloss",
-                    random_state=RANDOM_STATE)
-t0 = time.time()
-xgb.fit(X_train_sel, y_train)
-t1 = time.time()
-y_pred = xgb.predict(X_test_sel)
-results["XGBoost"] = {
-    "Accuracy": accuracy_score(y_test, y_pred),
-    "Precision": precision_score(y_test, y_pred, zero_division=0),
-    "Recall": recall_score(y_test, y_pred, zero_division=0),
-    "F1": f1_score(y_test, y_pred, zero_division=0),
-    "ROC-AUC": roc_auc_score(y_test, xgb.predict_proba(X_test_sel)[:, 1]),
-    "TrainTime_s": t1 - t0
-}
-joblib.dump(xgb, os.path.join(OUT_DIR, "xgb_model.pkl"))
-
-print("\n4.4) Training Naive Bayes...")
-nb = GaussianNB()
-t0 = time.time()
-nb.fit(X_train_sel, y_train)
-t1 = time.time()
-y_pred = nb.predict(X_test_sel)
-results["NaiveBayes"] = {
-    "Accuracy": accuracy_score(y_test, y_pred),
-    "Precision": precision_score(y_test, y_pred, zero_division=0),
-    "Recall": recall_score(y_test, y_pred, zero_division=0),
-    "F1": f1_score(y_test, y_pred, zero_division=0),
-    "ROC-AUC": roc_auc_score(y_test, nb.predict_proba(X_test_sel)[:, 1]),
-    "TrainTime_s": t1 - t0
-}
-joblib.dump(nb, os.path.join(OUT_DIR, "naivebayes_model.pkl"))
-
-print("\n5) Model Comparison Results:")
-res_df = pd.DataFrame(results).T
-print(res_df)
-res_df.to_csv(os.path.join(OUT_DIR, "model_comparison.csv"), index=True)
-print(f"\n✅ Results and models saved in '{OUT_DIR}'")
-    "F1": f1_score(y_test, y_pred, zero_division=0),
+
+CHECKPOINTS = True  # resume an interrupted run from its last completed stage
+CHECKPOINT_DIR = "checkpoints"  # inside the output directory
+CHECKPOINT_KEEP = False  # keep checkpoints after a successful run
+
+SWEEP_SIZES = [n * 100_000 for n in range(1, 11)]  # models_sample100k .. models_sample1000k
+SWEEP_CORES_PER_RUN = 4  # sizes run side by side only when each gets at least this many cores
+SWEEP_SUMMARY = "sweep_summary.csv"
+
+_DATASET = None  # dataset shared with forked sweep workers
+
+
+def default_out_dir(sample_size):
+    return f"models_sample{sample_size // 1000}k"
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def pipeline_checkpoints(dataset, sample_size, out_dir, enabled=True):
+    """Checkpoints for (sample + scaler, QGA, models), each keyed by the settings it depends on."""
+    data = Checkpoints(os.path.join(out_dir, CHECKPOINT_DIR), {
+        "dataset": dataset.manifest["sha256"], "sample_size": sample_size,
+        "random_state": RANDOM_STATE, "test_size": TEST_SIZE,
+    }, enabled=enabled)
+    qga = data.derive({
+        "pop": QGA_POP, "gens": QGA_GENS, "n_qubits": QGA_NQUBITS, "rotation": QGA_ROTATION,
+        "elites": QGA_ELITES, "patience": QGA_PATIENCE, "fitness_params": FITNESS_XGB_PARAMS,
+        "fidelities": QGA_FIDELITIES if QGA_MULTI_FIDELITY else None, "eta": QGA_HALVING_ETA,
+        "quantize_bins": QGA_QUANTIZE_BINS,
+    })
+    models = qga.derive({
+        "params": {name: {k: v for k, v in factory(None).get_params().items() if k != "n_jobs"}
+                   for name, factory in MODEL_FACTORIES.items()},
+        "result_format": RESULT_FORMAT, "threshold": THRESHOLD, "auc_bins": AUC_BINS,
+        "auc_exact_max_rows": AUC_EXACT_MAX_ROWS, "roc_points": ROC_POINTS,
+    })
+    return data, qga, models
+
+
+def run_qga(X_train, y_train, out_dir, qga_workers=QGA_WORKERS, qga_ckpt=None, rows=None):
+    """QGA feature selection on the scaled training split (the `rows` of X_train if given); returns (selected_idx, QGAResult)."""
+    print("\n3) Running lightweight QGA for feature selection...")
+    rng = np.random.default_rng(RANDOM_STATE)
+    n_features = X_train.shape[1]
+    n_qubits = min(QGA_NQUBITS, n_features)
+
+    # 3-fold CV accuracy of a 50-tree XGBoost per chromosome, spread over a process pool
+    # (memoized per dataset/params/CV config, so repeated chromosomes are never retrained)
+    fitness_cache = FitnessCache(QGA_CACHE_FILE)
+    fitness = ParallelFitness(X_train, y_train, cv=3, random_state=RANDOM_STATE, n_workers=qga_workers,
+                              cache=fitness_cache, fidelities=QGA_FIDELITIES if QGA_MULTI_FIDELITY else None,
+                              quantize_bins=QGA_QUANTIZE_BINS, rows=rows)
+    evaluate = fitness.evaluate
+    if QGA_MULTI_FIDELITY:
+        halving = SuccessiveHalvingFitness(fitness, eta=QGA_HALVING_ETA)
+        evaluate = halving.evaluate
+
+    qga = QuantumGA(QGA_POP, n_qubits, QGA_GENS, rng=rng, rotation=QGA_ROTATION,
+                    elites=QGA_ELITES, patience=QGA_PATIENCE)
+    # The QGA state is checkpointed after every generation, so a killed run resumes mid-way.
+    resume = qga_ckpt.load("qga_state") if qga_ckpt is not None else None
+    if resume is not None:
+        print(f" Resuming QGA after generation {resume['generation']}/{QGA_GENS}")
+    save = (lambda state: qga_ckpt.save("qga_state", state)) if qga_ckpt is not None else None
+    qga_result = qga.run(evaluate, resume=resume, on_generation=save)
+    if QGA_MULTI_FIDELITY:
+        halving_summary = halving.summary()
+        # Once per run: do the cheap rungs rank chromosomes like full fidelity? Checked on the
+        # final best state plus random chromosomes, and saved next to the QGA history.
+        check = np.vstack([s for s in (qga_result.best_state,) if s is not None] +
+                          [qga.measure(np.full((QGA_POP, n_qubits), 0.5))])
+        ranking = halving.ranking_report(check)
+        with open(os.path.join(out_dir, "qga_ranking.json"), "w") as f:
+            json.dump(ranking, f, indent=2)
+    fitness.close()
+    print(" " + fitness_cache.summary())
+    if QGA_MULTI_FIDELITY:
+        print(" " + halving_summary)
+        print(" Ranking vs full fidelity: " + ", ".join(f"{k} {v:.3f}" if isinstance(v, float) else f"{k} {v}"
+                                                        for k, v in ranking.items()))
+    print(f" QGA time: {sum(h['total_s'] for h in qga_result.history):.1f}s over {len(qga_result.history)} generations")
+
+    pd.DataFrame(qga_result.history).to_csv(os.path.join(out_dir, "qga_history.csv"), index=False)
+
+    selected_idx = select_features(qga_result.best_state, X_train, rows=rows)
+    return selected_idx, qga_result
+
+
+def run_pipeline(dataset, sample_size=SAMPLE_SIZE, out_dir=None, qga_workers=QGA_WORKERS, n_jobs=None,
+                 checkpoints=None):
+    """Sample, preprocess, select features with the QGA and train/evaluate all models for one size."""
+    out_dir = out_dir or default_out_dir(sample_size)
+    os.makedirs(out_dir, exist_ok=True)
+    run_start = time.time()
+    data_ckpt, qga_ckpt, model_ckpt = pipeline_checkpoints(dataset, sample_size, out_dir,
+                                                           CHECKPOINTS if checkpoints is None else checkpoints)
+
+    memory = MemoryTracker()
+
+    print(f"1) Drawing stratified sample of {sample_size} rows...")
+    # Exact-size per-class reservoir sample, seeded by RANDOM_STATE; only sampled rows are
+    # read out of the cache. Compact dtypes are exact, so widening back to float64
+    # reproduces pd.read_csv's values. Samples for different sizes are nested.
+    with memory.stage("Sample"):
+        rows = data_ckpt.load("sample_rows")
+        if rows is None:
+            rows = stratified_sample(dataset, sample_size, random_state=RANDOM_STATE)
+            data_ckpt.save("sample_rows", rows)
+        else:
+            print(" [OK] Sampled rows restored from checkpoint")
+        if len(rows) < sample_size:
+            print(f"Dataset has {len(rows)} rows; using full dataset.")
+        # The features go straight from the cache into the one float64 matrix every later
+        # stage works on: scaled in place, split by index arrays, never copied as a whole.
+        # Column-major like a DataFrame, so the scaler's statistics (and with them the QGA
+        # fitness cache keys) are bit-identical to fitting on the DataFrame.
+        X = dataset.feature_matrix(rows, order="F")
+        y = np.asarray(dataset.target[rows]).astype(int)
+    orig_columns = list(dataset.feature_names)
+
+    print("Sample shape:", (X.shape[0], X.shape[1] + 1))
+    print("Class counts:\n", pd.Series(y, name="Target").value_counts())
+
+    print("\n2) Preprocessing (numeric-only, scaling)...")
+    with memory.stage("Preprocess"):
+        for j in range(X.shape[1]):
+            col = X[:, j]
+            missing = np.isnan(col)
+            if missing.any():
+                col[missing] = np.nanmedian(col)
+
+        scaler = data_ckpt.load("scaler")
+        if scaler is None:
+            # A no-copy DataFrame view, so the scaler still records the feature names
+            scaler = StandardScaler().fit(pd.DataFrame(X, columns=orig_columns, copy=False))
+            data_ckpt.save("scaler", scaler)
+        else:
+            print(" [OK] Fitted scaler restored from checkpoint")
+
+        train_idx, test_idx = train_test_split(np.arange(len(y)), test_size=TEST_SIZE,
+                                               random_state=RANDOM_STATE, stratify=y)
+        y_train, y_test = y[train_idx], y[test_idx]
+        print("Train/test shapes:", (len(train_idx), X.shape[1]), (len(test_idx), X.shape[1]))
+        # Unscaled test rows, used by validate_float32.py to replay the predictor's full preprocessing chain
+        np.savez_compressed(os.path.join(out_dir, "test_split.npz"),
+                            X_raw=X[test_idx], y=y_test, columns=np.array(orig_columns))
+
+        # Same arithmetic as scaler.transform, without its output copy
+        X -= scaler.mean_
+        X /= scaler.scale_
+
+    with memory.stage("QGA"):
+        selected_idx, qga_result = run_qga(X, y, out_dir, qga_workers, qga_ckpt, rows=train_idx)
+
+    selected_cols = [orig_columns[i] for i in selected_idx]
+    print("Selected features:", selected_cols)
+    joblib.dump(selected_idx, os.path.join(out_dir, "selected_idx.npy"))
+    joblib.dump(selected_cols, os.path.join(out_dir, "selected_cols.pkl"))
+    joblib.dump(scaler, os.path.join(out_dir, "scaler.pkl"))
+
+    # The selected columns are gathered once into contiguous float32 buffers (results are
+    # near-identical to float64; see validate_float32.py) and the full matrix is released before training.
+    with memory.stage("Preprocess"):
+        X_train_sel = gather(X, train_idx, selected_idx)
+        X_test_sel = gather(X, test_idx, selected_idx)
+        del X
+
+    models, results = train_models(MODEL_FACTORIES, X_train_sel, y_train, X_test_sel, y_test, out_dir,
+                                   n_cpus=n_jobs, concurrent=TRAIN_CONCURRENT, checkpoint=model_ckpt,
+                                   memory=memory)
+    if KNN_COMPRESS and "KNN" in models:
+        from knn_compression import REDUCED_NAME, train_reduced
+        print("\n4b) Compressing the KNN reference set...")
+        models[REDUCED_NAME], results[REDUCED_NAME], evaluation = train_reduced(
+            models["KNN"], X_test_sel, y_test, out_dir, memory, random_state=RANDOM_STATE)
+        save_plot_data({REDUCED_NAME: evaluation}, out_dir, append=True)
+    memory.close()
+    # Accuracy/latency tradeoff: reference set size and single-row prediction latency
+    for name, model in models.items():
+        if hasattr(model, "_fit_X"):
+            results[name]["ReferenceRows"] = len(model._fit_X)
+        results[name]["Latency_ms"] = predict_latency_ms(model, X_test_sel)
+
+    print("\n5) Model Comparison Results:")
+    res_df = pd.DataFrame(results).T
+    # Peak RSS of this process per pipeline stage (QGA worker processes are not included)
+    for stage in ("Sample", "Preprocess", "QGA"):
+        res_df[f"{stage}_PeakRSS_MB"] = memory.peak_mb(stage)
+    print(res_df)
+    res_df.to_csv(os.path.join(out_dir, "model_comparison.csv"), index=True)
+    save_bundle(out_dir, models, scaler, selected_idx, selected_cols, res_df)
+    print(f"\n✅ Results and models saved in '{out_dir}'")
+    if not CHECKPOINT_KEEP:
+        model_ckpt.clear()
+
+    qga_s = sum(h["total_s"] for h in qga_result.history)
+    return {"sample_size": sample_size, "out_dir": out_dir, "results": res_df, "qga_s": qga_s,
+            "n_selected": len(selected_idx), "total_s": time.time() - run_start}
+
+
+def _sweep_run(sample_size, qga_workers, n_jobs, log_to_file):
+    out_dir = default_out_dir(sample_size)
+    if not log_to_file:
+        return run_pipeline(_DATASET, sample_size, out_dir, qga_workers, n_jobs)
+    # Side-by-side runs would interleave on the console; each logs into its own directory.
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "run.log"), "w", encoding="utf-8") as log:
+        stdout = sys.stdout
+        sys.stdout = log
+        try:
+            return run_pipeline(_DATASET, sample_size, out_dir, qga_workers, n_jobs)
+        finally:
+            sys.stdout = stdout
+
+
+def sweep(dataset, sizes=SWEEP_SIZES, jobs=None, summary_path=SWEEP_SUMMARY):
+    """Run the pipeline for every sample size; writes each models_sample{N}k plus one summary CSV."""
+    global _DATASET
+    _DATASET = dataset
+    sizes = sorted(set(sizes), reverse=True)  # largest first so the longest runs start early
+    n_cpus = os.cpu_count() or 1
+    if jobs is None:
+        jobs = max(1, min(len(sizes), n_cpus // SWEEP_CORES_PER_RUN))
+    if jobs > 1 and "fork" not in mp.get_all_start_methods():
+        print("⚠ 'fork' start method unavailable; running sizes one after another")
+        jobs = 1
+    cores = max(1, n_cpus // jobs)
+    print(f"Sweep over {len(sizes)} sizes: {jobs} at a time, {cores} cores each")
+
+    runs = []
+    if jobs == 1:
+        for n in sizes:
+            print(f"\n===== Sample size {n} =====")
+            runs.append(_sweep_run(n, QGA_WORKERS, None, False))
+    else:
+        # Forked workers share the memory-mapped dataset loaded above.
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=mp.get_context("fork")) as pool:
+            futures = {n: pool.submit(_sweep_run, n, cores, cores, True) for n in sizes}
+            for n, future in futures.items():
+                run = future.result()
+                print(f" [OK] {run['out_dir']} ({run['total_s']:.1f}s)")
+                runs.append(run)
+
+    frames = []
+    for run in sorted(runs, key=lambda r: r["sample_size"]):
+        df = run["results"].copy()
+        df.insert(0, "SampleSize", run["sample_size"])
+        df["QGATime_s"] = run["qga_s"]
+        df["NumFeatures"] = run["n_selected"]
+        df["RunTime_s"] = run["total_s"]
+        frames.append(df)
+    summary = pd.concat(frames).rename_axis("Model").reset_index()
+    summary.to_csv(summary_path, index=False)
+    print(f"\n✅ Sweep summary saved to '{summary_path}'")
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sample, select features with the QGA, train and compare models")
+    parser.add_argument("--sample-size", default=str(SAMPLE_SIZE), help="rows to sample, e.g. 300000 or 300k")
+    parser.add_argument("--out-dir", default=None, help="output directory (default models_sample{N}k)")
+    parser.add_argument("--sweep", nargs="*", default=None,
+                        help="run several sizes in one process (default 100k..1000k in steps of 100k)")
+    parser.add_argument("--jobs", type=int, default=None, help="sizes to run side by side in a sweep")
+    parser.add_argument("--summary", default=SWEEP_SUMMARY, help="combined sweep results CSV")
+    parser.add_argument("--fresh", action="store_true", help="discard checkpoints from earlier runs first")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="stream rows from disk instead of holding the sample in memory (see out_of_core.py)")
+    parser.add_argument("--sample-all", action="store_true", help="with --out-of-core: use every row, no sampling")
+    parser.add_argument("--extra-csv", nargs="*", default=[],
+                        help="with --out-of-core: more CSVs with the same columns (e.g. plant captures); "
+                             "--sample-size then samples across all of them")
+    args = parser.parse_args()
+
+    sizes = None
+    if args.sweep is not None:
+        sizes = [parse_size(s) for s in args.sweep] or SWEEP_SIZES
+    if args.fresh:
+        import shutil
+        out_dirs = [default_out_dir(n) for n in sizes] if sizes else \
+                   [args.out_dir or default_out_dir(parse_size(args.sample_size))]
+        for out_dir in out_dirs:
+            shutil.rmtree(os.path.join(out_dir, CHECKPOINT_DIR), ignore_errors=True)
+
+    if args.out_of_core:
+        from out_of_core import load_sources, run_out_of_core
+        sample_size = None if args.sample_all else parse_size(args.sample_size)
+        out_dir = args.out_dir or (default_out_dir(sample_size) if sample_size else "models_full")
+        if args.extra_csv and not args.out_dir:
+            out_dir += "_combined"  # not the single-CSV run's directory
+        source = load_sources([CSV_FILE] + args.extra_csv, sample_size, RANDOM_STATE)
+        run_out_of_core(source, out_dir, MODEL_FACTORIES,
+                        select=lambda X_sub, y_sub: run_qga(X_sub, y_sub, out_dir)[0],
+                        test_size=TEST_SIZE, random_state=RANDOM_STATE)
+        sys.exit(0)
+
+    print("Loading dataset...")
+    dataset = load_dataset(CSV_FILE)
+    if sizes is not None:
+        sweep(dataset, sizes, args.jobs, args.summary)
+    else:
+        run_pipeline(dataset, parse_size(args.sample_size), args.out_dir)
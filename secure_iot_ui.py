@@ -1,17 +1,26 @@
 """
 Secure IoT Predictor - Professional GUI Interface
 Demonstrates digital signatures, verification, and ML predictions with visual feedback
+
+Scenarios run in worker threads and never touch widgets: they post text and
+calls to a queue, which the Tk main loop drains every UI_DRAIN_MS with
+after(), one insert per panel per drain.
 """
 
+import queue
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import threading
-import time
 from digital_signature import DigitalSignatureManager
 from secure_predictor import SecureIoTPredictor
+from traffic_generator import TrafficGenerator
 import numpy as np
 import json
 
+UI_DRAIN_MS = 50  # how often the main loop applies queued UI events
+UI_MAX_EVENTS_PER_DRAIN = 5000  # the rest wait for the next drain, so a flood cannot freeze the window
+PANEL_MAX_LINES = 5000  # oldest lines are dropped beyond this, so long sessions stay responsive
+
 class SecureIoTUI:
     def __init__(self, root):
         self.root = root
@@ -25,6 +34,8 @@ class SecureIoTUI:
         self.bob_manager = None
         self.charlie_manager = None
         self.system_active = False
+        self.traffic = TrafficGenerator()  # fresh entropy per session; pass a seed to replay one
+        self._events = queue.SimpleQueue()  # (kind, target, args) posted from any thread
         
         # Color scheme
         self.bg_dark = "#1e1e2e"
@@ -37,6 +48,9 @@ class SecureIoTUI:
         self.text_muted = "#808080"
         
         self.setup_ui()
+        self._panels = {"flow": self.flow_text, "data": self.data_text,
+                        "pred": self.pred_text, "sec": self.sec_text}
+        self.root.after(UI_DRAIN_MS, self._drain_events)
         self.initialize_system()
         
     def setup_ui(self):
@@ -346,12 +360,12 @@ class SecureIoTUI:
                 self.log_flow("✓ Charlie's keys configured (for tampering scenario)", "success")
                 
                 self.system_active = True
-                self.status_label.config(text="Status: Ready", fg=self.accent_green)
+                self.post_call(self.status_label.config, text="Status: Ready", fg=self.accent_green)
                 self.log_flow("\n✓ System Ready! Click a scenario button to begin.", "success")
                 
             except Exception as e:
                 self.log_flow(f"✗ Initialization Error: {str(e)}", "error")
-                self.status_label.config(text=f"Status: Error - {str(e)}", fg=self.accent_red)
+                self.post_call(self.status_label.config, text=f"Status: Error - {str(e)}", fg=self.accent_red)
         
         thread = threading.Thread(target=init_thread, daemon=True)
         thread.start()
@@ -372,19 +386,8 @@ class SecureIoTUI:
             df = df.select_dtypes(include=[np.number]).copy()
             df = df.fillna(df.median())
             
-            # Scale with full 43 features
-            X_scaled_full = self.predictor.scaler.transform(df.values)
-            
-            # Select GA features
-            if self.predictor.selected_idx is not None and len(self.predictor.selected_idx) > 0:
-                X_selected = X_scaled_full[:, self.predictor.selected_idx]
-            else:
-                X_selected = X_scaled_full
-            
-            # Predict
-            model = self.predictor.models["xgb"]
-            prediction = model.predict(X_selected)
-            proba = model.predict_proba(X_selected) if hasattr(model, "predict_proba") else None
+            # Scale, select GA features and predict against one consistent model snapshot
+            prediction, proba = self.predictor.predict_raw(df.values, "xgb")
             
             prob_val = float(proba[0][1]) if proba is not None else 0.0
             
@@ -406,74 +409,11 @@ class SecureIoTUI:
         
     def generate_normal_data(self):
         """Generate legitimate IoT sensor data (43 features)"""
-        np.random.seed(int(time.time()) % 100)
-        data = {
-            "Mean": np.random.uniform(80, 120),
-            "Sport": np.random.uniform(1000, 65535),
-            "Dport": np.random.uniform(1000, 65535),
-            "SrcPkts": np.random.uniform(100, 1000),
-            "DstPkts": np.random.uniform(100, 1000),
-            "TotPkts": np.random.uniform(200, 2000),
-            "DstBytes": np.random.uniform(1000, 100000),
-            "SrcBytes": np.random.uniform(1000, 100000),
-            "TotBytes": np.random.uniform(2000, 200000),
-            "SrcLoad": np.random.uniform(0.1, 5.0),
-            "DstLoad": np.random.uniform(0.1, 5.0),
-            "Rate": np.random.uniform(1, 100),
-            "Duration": np.random.uniform(10, 300),
-            "Idle": np.random.uniform(0, 10),
-        }
-        
-        # Add F1-F29 (29 additional features)
-        for i in range(1, 30):
-            data[f"F{i}"] = np.random.uniform(-1, 1)
-        
-        return data
+        return self.traffic.record("normal")
         
     def generate_attack_data(self, attack_type="moderate"):
-        """Generate attack/suspicious IoT data"""
-        np.random.seed(int(time.time()) % 100)
-        
-        if attack_type == "Moderate":
-            data = {
-                "Mean": np.random.uniform(40, 80),
-                "Sport": np.random.uniform(100, 500),
-                "Dport": np.random.uniform(100, 500),
-                "SrcPkts": np.random.uniform(1000, 5000),
-                "DstPkts": np.random.uniform(1000, 5000),
-                "TotPkts": np.random.uniform(5000, 50000),
-                "DstBytes": np.random.uniform(100000, 1000000),
-                "SrcBytes": np.random.uniform(100000, 1000000),
-                "TotBytes": np.random.uniform(200000, 2000000),
-                "SrcLoad": np.random.uniform(50, 90),
-                "DstLoad": np.random.uniform(50, 90),
-                "Rate": np.random.uniform(500, 5000),
-                "Duration": np.random.uniform(1, 60),
-                "Idle": np.random.uniform(0, 1),
-            }
-        else:  # Severe
-            data = {
-                "Mean": np.random.uniform(20, 50),
-                "Sport": np.random.uniform(1, 100),
-                "Dport": np.random.uniform(1, 100),
-                "SrcPkts": np.random.uniform(5000, 50000),
-                "DstPkts": np.random.uniform(5000, 50000),
-                "TotPkts": np.random.uniform(50000, 500000),
-                "DstBytes": np.random.uniform(1000000, 10000000),
-                "SrcBytes": np.random.uniform(1000000, 10000000),
-                "TotBytes": np.random.uniform(2000000, 20000000),
-                "SrcLoad": np.random.uniform(90, 100),
-                "DstLoad": np.random.uniform(90, 100),
-                "Rate": np.random.uniform(5000, 50000),
-                "Duration": np.random.uniform(0.1, 10),
-                "Idle": np.random.uniform(0, 0.1),
-            }
-        
-        # Add F1-F29
-        for i in range(1, 30):
-            data[f"F{i}"] = np.random.uniform(-5, 5)
-        
-        return data
+        """Generate attack/suspicious IoT data (moderate, severe, ddos, port_scan, exfiltration)"""
+        return self.traffic.record(attack_type.lower())
         
     def scenario_legitimate_user(self):
         """Alice sends legitimate data"""
@@ -481,9 +421,10 @@ class SecureIoTUI:
             messagebox.showerror("Error", "System still initializing...")
             return
             
+        threat_level = self.threat_var.get()
+        
         def run_scenario():
             self.clear_display()
-            threat_level = self.threat_var.get()
             
             self.log_flow("=" * 80, "process")
             self.log_flow("SCENARIO 1: LEGITIMATE USER (ALICE)", "header")
@@ -695,7 +636,7 @@ class SecureIoTUI:
                 {"name": "Normal Traffic", "type": "normal", "threat": "LOW"},
                 {"name": "Port Scanning Attack", "type": "port_scan", "threat": "MEDIUM"},
                 {"name": "DDoS Attack", "type": "ddos", "threat": "HIGH"},
-                {"name": "Data Exfiltration", "type": "exfil", "threat": "CRITICAL"},
+                {"name": "Data Exfiltration", "type": "exfiltration", "threat": "CRITICAL"},
             ]
             
             for idx, alert in enumerate(alerts, 1):
@@ -707,8 +648,7 @@ class SecureIoTUI:
                     data = self.generate_normal_data()
                     self.log_flow(f"  Type: Legitimate IoT Traffic", "info")
                 else:
-                    severity = "Moderate" if alert['threat'] == 'MEDIUM' else "Severe"
-                    data = self.generate_attack_data(severity)
+                    data = self.generate_attack_data(alert['type'])
                     self.log_flow(f"  Type: {alert['name']}", "warning")
                 
                 # Sign and verify
@@ -730,9 +670,9 @@ class SecureIoTUI:
                 self.log_flow(f"  Threat Level: {alert['threat']}", "warning" if alert['threat'] != 'LOW' else "success")
                 
                 # Add to data display
-                self.data_text.insert(tk.END, f"\n{alert['name']}\n", "header")
+                self.post_text("data", f"\n{alert['name']}\n", "header")
                 for key in list(data.keys())[:8]:  # Show first 8 fields
-                    self.data_text.insert(tk.END, f"  {key}: {data[key]:.2f}\n", "info")
+                    self.post_text("data", f"  {key}: {data[key]:.2f}\n", "info")
             
             # Summary
             self.log_flow("\n" + "=" * 80, "process")
@@ -750,65 +690,104 @@ class SecureIoTUI:
         
     def display_data_details(self, title, data):
         """Display data in the Data Details tab"""
-        self.data_text.insert(tk.END, f"\n{title}\n", "header")
-        self.data_text.insert(tk.END, "=" * 50 + "\n", "process")
+        self.post_text("data", f"\n{title}\n", "header")
+        self.post_text("data", "=" * 50 + "\n", "process")
         
         for key, value in list(data.items())[:20]:  # Show first 20
-            self.data_text.insert(tk.END, f"  {key:12} : {value:12.4f}\n", "info")
+            self.post_text("data", f"  {key:12} : {value:12.4f}\n", "info")
         
         if len(data) > 20:
-            self.data_text.insert(tk.END, f"  ... and {len(data) - 20} more features\n", "info")
+            self.post_text("data", f"  ... and {len(data) - 20} more features\n", "info")
         
-        self.data_text.insert(tk.END, "\n", "process")
+        self.post_text("data", "\n", "process")
         
     def display_prediction_results(self, title, result):
         """Display model prediction results"""
-        self.pred_text.insert(tk.END, f"\n{title}\n", "header")
-        self.pred_text.insert(tk.END, "=" * 50 + "\n", "process")
+        self.post_text("pred", f"\n{title}\n", "header")
+        self.post_text("pred", "=" * 50 + "\n", "process")
         
         if result['is_valid'] and result['prediction'] is not None:
             pred_class = "NORMAL" if result['prediction'] == 0 else "ATTACK"
-            self.pred_text.insert(tk.END, f"  Prediction Class: {pred_class}\n", "success" if result['prediction'] == 0 else "warning")
+            self.post_text("pred", f"  Prediction Class: {pred_class}\n", "success" if result['prediction'] == 0 else "warning")
             prob_val = result['probability'] if result['probability'] is not None else 0
-            self.pred_text.insert(tk.END, f"  Confidence: {prob_val:.2f}%\n", "success" if result['prediction'] == 0 else "warning")
-            self.pred_text.insert(tk.END, f"  Model Used: {result.get('model_used', 'N/A')}\n", "info")
+            self.post_text("pred", f"  Confidence: {prob_val:.2f}%\n", "success" if result['prediction'] == 0 else "warning")
+            self.post_text("pred", f"  Model Used: {result.get('model_used', 'N/A')}\n", "info")
         else:
-            self.pred_text.insert(tk.END, f"  Status: PREDICTION NOT MADE\n", "error")
-            self.pred_text.insert(tk.END, f"  Reason: Data failed verification\n", "error")
+            self.post_text("pred", f"  Status: PREDICTION NOT MADE\n", "error")
+            self.post_text("pred", f"  Reason: Data failed verification\n", "error")
         
-        self.pred_text.insert(tk.END, f"  Data Valid: {result['is_valid']}\n", "success" if result['is_valid'] else "error")
-        self.pred_text.insert(tk.END, "\n", "process")
+        self.post_text("pred", f"  Data Valid: {result['is_valid']}\n", "success" if result['is_valid'] else "error")
+        self.post_text("pred", "\n", "process")
         
     def display_security_analysis(self, source, signature_valid, data_tampered, prediction, verdict):
         """Display security analysis"""
-        self.sec_text.insert(tk.END, f"\nSecurity Analysis\n", "header")
-        self.sec_text.insert(tk.END, "=" * 50 + "\n", "process")
+        self.post_text("sec", f"\nSecurity Analysis\n", "header")
+        self.post_text("sec", "=" * 50 + "\n", "process")
         
-        self.sec_text.insert(tk.END, f"  Source: {source}\n", "warning" if "Attacker" in source else "success")
-        self.sec_text.insert(tk.END, f"  Signature Valid: {'✓ YES' if signature_valid else '✗ NO'}\n", 
-                            "success" if signature_valid else "error")
-        self.sec_text.insert(tk.END, f"  Data Tampered: {'✗ YES' if data_tampered else '✓ NO'}\n", 
-                            "error" if data_tampered else "success")
+        self.post_text("sec", f"  Source: {source}\n", "warning" if "Attacker" in source else "success")
+        self.post_text("sec", f"  Signature Valid: {'✓ YES' if signature_valid else '✗ NO'}\n", 
+                       "success" if signature_valid else "error")
+        self.post_text("sec", f"  Data Tampered: {'✗ YES' if data_tampered else '✓ NO'}\n", 
+                       "error" if data_tampered else "success")
         
         if prediction:
-            self.sec_text.insert(tk.END, f"  Prediction: {prediction['prediction']}\n", "info")
+            self.post_text("sec", f"  Prediction: {prediction['prediction']}\n", "info")
         
         verdict_tag = "error" if "REJECTED" in verdict else "success"
-        self.sec_text.insert(tk.END, f"  Verdict: {verdict}\n", verdict_tag)
-        self.sec_text.insert(tk.END, "\n", "process")
+        self.post_text("sec", f"  Verdict: {verdict}\n", verdict_tag)
+        self.post_text("sec", "\n", "process")
         
     def log_flow(self, message, tag="info"):
         """Add message to process flow"""
-        self.flow_text.insert(tk.END, message + "\n", tag)
-        self.flow_text.see(tk.END)
-        self.root.update()
+        self.post_text("flow", message + "\n", tag)
         
     def clear_display(self):
         """Clear all display panels"""
-        self.flow_text.delete(1.0, tk.END)
-        self.data_text.delete(1.0, tk.END)
-        self.pred_text.delete(1.0, tk.END)
-        self.sec_text.delete(1.0, tk.END)
+        self._events.put(("clear", tuple(self._panels), None))
+        
+    def post_text(self, panel, text, tag="info"):
+        """Queue text for a panel (flow, data, pred, sec); safe from any thread"""
+        self._events.put(("text", panel, (text, tag)))
+        
+    def post_call(self, func, *args, **kwargs):
+        """Queue a widget call (e.g. a label's config) to run on the main thread"""
+        self._events.put(("call", func, (args, kwargs)))
+        
+    def _drain_events(self):
+        """Apply queued UI events on the main thread, one insert per panel"""
+        pending = {}  # panel -> [text, tag, text, tag, ...] for a single Text.insert
+        backlog = True
+        try:
+            for _ in range(UI_MAX_EVENTS_PER_DRAIN):
+                try:
+                    kind, target, args = self._events.get_nowait()
+                except queue.Empty:
+                    backlog = False
+                    break
+                if kind == "text":
+                    pending.setdefault(target, []).extend(args)
+                elif kind == "clear":
+                    for panel in target:
+                        pending.pop(panel, None)
+                        self._panels[panel].delete(1.0, tk.END)
+                else:
+                    self._flush_panels(pending)
+                    target(*args[0], **args[1])
+            self._flush_panels(pending)
+        finally:
+            # Keep draining even if one event failed
+            self.root.after(1 if backlog else UI_DRAIN_MS, self._drain_events)
+        
+    def _flush_panels(self, pending):
+        for panel, chunks in pending.items():
+            widget = self._panels[panel]
+            widget.insert(tk.END, *chunks)
+            excess = int(widget.index("end-1c").split(".")[0]) - PANEL_MAX_LINES
+            if excess > 0:
+                widget.delete(1.0, f"{excess + 1}.0")
+            if panel == "flow":
+                widget.see(tk.END)
+        pending.clear()
 
 
 if __name__ == "__main__":
@@ -1,43 +1,342 @@
-import pandas as pd
 import numpy as np
-import joblib
+import importlib
 import json
 import os
+import sys
+import threading
+import time
 from digital_signature import DigitalSignatureManager
+from model_selector import LatencyBudgetSelector
+from model_bundle import ModelBundle, has_bundle
+
+# pandas, joblib, sklearn and xgboost are imported on first use so that
+# importing this module (and constructing a predictor) stays cheap.
+MODEL_FILES = {
+    "knn": "knn_model.pkl",
+    "dt": "dt_model.pkl",
+    "xgb": "xgb_model.pkl",
+    "nb": "naivebayes_model.pkl",
+    "knn_reduced": "knn_reduced_model.pkl",
+}
+OPTIONAL_MODELS = ("knn_reduced",)  # only in directories where they were built (knn_compression.py)
+MODEL_MODULES = {
+    "knn": "sklearn.neighbors",
+    "dt": "sklearn.tree",
+    "xgb": "xgboost",
+    "nb": "sklearn.naive_bayes",
+    "knn_reduced": "sklearn.neighbors",
+}
+# A model bundle (model_bundle.py) rebuilds DT and NB without sklearn
+BUNDLE_MODULES = {"knn": "sklearn.neighbors", "xgb": "xgboost", "knn_reduced": "sklearn.neighbors"}
+FLOAT32_CHUNK_ROWS = 65_536  # float32 path: rows centred and scaled in float64 at a time
+
+_IMPORT_TIMES = {}
+_IMPORT_LOCK = threading.Lock()
+
+
+def lazy_import(name):
+    module = sys.modules.get(name)
+    if module is None:
+        with _IMPORT_LOCK:
+            module = sys.modules.get(name)
+            if module is None:
+                t0 = time.perf_counter()
+                module = importlib.import_module(name)
+                _IMPORT_TIMES[name] = time.perf_counter() - t0
+    return module
+
+
+class _LazyModels(dict):
+    def __init__(self, loader):
+        super().__init__()
+        self._loader = loader
+        self._lock = threading.Lock()
+
+    def __missing__(self, name):
+        if name not in MODEL_FILES:
+            raise KeyError(name)
+        with self._lock:
+            model = self.get(name)
+            if model is None:
+                model = self._loader(name)
+                self[name] = model
+        return model
+
+
+def _model_to_float32(name, model):
+    # DT and XGBoost already split on float32 thresholds internally and NB accepts
+    # float32 as is. Brute-force KNN only stays in float32 if its reference set is.
+    if name.startswith("knn") and getattr(model, "_fit_method", None) == "brute":
+        model._fit_X = np.ascontiguousarray(model._fit_X, dtype=np.float32)
+    return model
+
+
+class _ArtifactState:
+    """Artifacts of one model directory. Never mutated after loading; reloads build a new one."""
+
+    def __init__(self, model_dir, float32=False, use_bundle=True):
+        self.model_dir = model_dir
+        self.float32 = float32
+        self.use_bundle = use_bundle
+        # Prefer the bundle when the directory has one; the pickles are the fallback.
+        self.bundle = ModelBundle(model_dir) if use_bundle and has_bundle(model_dir) else None
+        self.models = _LazyModels(self._load_model)
+        self.unpickle_times = {}
+        self.warmup_times = {}
+        self._preprocessing = None
+        self._selector = None
+        self._lock = threading.Lock()
+
+    @property
+    def selector(self):
+        if self._selector is None:
+            with self._lock:
+                if self._selector is None:
+                    self._selector = LatencyBudgetSelector.from_model_dir(self.model_dir)
+        return self._selector
+
+    def available(self, name):
+        if self.bundle is not None:
+            return name in self.bundle.model_names
+        return os.path.exists(os.path.join(self.model_dir, MODEL_FILES[name]))
+
+    @property
+    def model_names(self):
+        return [name for name in MODEL_FILES if name not in OPTIONAL_MODELS or self.available(name)]
+
+    def check_files(self):
+        required_models = [name for name in MODEL_FILES if name not in OPTIONAL_MODELS]
+        if self.bundle is not None:
+            root, required = self.bundle.path, self.bundle.files()
+            missing = [name for name in required_models if name not in self.bundle.model_names]
+        else:
+            root = self.model_dir
+            required = [MODEL_FILES[n] for n in required_models] + ["scaler.pkl", "selected_idx.npy"]
+            missing = []
+        missing += [f for f in required if not os.path.exists(os.path.join(root, f))]
+        if missing:
+            raise RuntimeError(f"Failed to load model artifacts: missing {', '.join(missing)}")
+
+    def load_all(self):
+        self.preprocessing()
+        for name in self.model_names:
+            self.models[name]
+
+    def _unpickle(self, key, filename):
+        joblib = lazy_import("joblib")
+        t0 = time.perf_counter()
+        obj = joblib.load(os.path.join(self.model_dir, filename))
+        self.unpickle_times[key] = time.perf_counter() - t0
+        return obj
+
+    def _load_model(self, name):
+        if not self.available(name):
+            raise KeyError(f"Model '{name}' is not in '{self.model_dir}'")
+        if self.bundle is not None:
+            if name in BUNDLE_MODULES:
+                lazy_import(BUNDLE_MODULES[name])
+            t0 = time.perf_counter()
+            model = self.bundle.load_model(name)
+            self.unpickle_times[name] = time.perf_counter() - t0
+        else:
+            lazy_import(MODEL_MODULES[name])
+            model = self._unpickle(name, MODEL_FILES[name])
+        if self.float32:
+            model = _model_to_float32(name, model)
+        return model
+
+    def preprocessing(self):
+        """(scaler, selected_idx, selected_cols, float32_params), loaded once."""
+        preprocessing = self._preprocessing
+        if preprocessing is not None:
+            return preprocessing
+        
+        with self._lock:
+            if self._preprocessing is None:
+                if self.bundle is not None:
+                    t0 = time.perf_counter()
+                    scaler = self.bundle.scaler()
+                    selected_idx, selected_cols = self.bundle.selected_idx, self.bundle.selected_cols
+                    self.unpickle_times["scaler"] = time.perf_counter() - t0
+                else:
+                    lazy_import("sklearn.preprocessing")
+                    scaler = self._unpickle("scaler", "scaler.pkl")
+                    selected_idx = self._unpickle("selected_idx", "selected_idx.npy")
+                    selected_cols = None
+                    if os.path.exists(os.path.join(self.model_dir, "selected_cols.pkl")):
+                        selected_cols = self._unpickle("selected_cols", "selected_cols.pkl")
+                float32_params = _float32_params(scaler, selected_idx) if self.float32 else None
+                self._preprocessing = (scaler, selected_idx, selected_cols, float32_params)
+        return self._preprocessing
+
+    def transform(self, values):
+        scaler, selected_idx, _, float32_params = self.preprocessing()
+        
+        if float32_params is not None:
+            # Only the selected columns are scaled, chunk by chunk into one contiguous float32 buffer.
+            # Centring happens in float64: raw byte counts around 1e7 lose their low digits in float32.
+            idx, mean, scale = float32_params
+            values = np.asarray(values)
+            X = np.empty((len(values), len(idx)), dtype=np.float32)
+            for start in range(0, len(values), FLOAT32_CHUNK_ROWS):
+                chunk = np.asarray(values[start:start + FLOAT32_CHUNK_ROWS][:, idx], dtype=np.float64)
+                chunk -= mean
+                chunk /= scale
+                X[start:start + len(chunk)] = chunk
+            return X
+        
+        X_scaled_full = scaler.transform(values)
+        
+        if selected_idx is not None and len(selected_idx) > 0:
+            return X_scaled_full[:, selected_idx]
+        return X_scaled_full
+
+
+def _float32_params(scaler, selected_idx):
+    n_features = scaler.n_features_in_
+    idx = selected_idx
+    if idx is None or len(idx) == 0:
+        idx = np.arange(n_features)
+    idx = np.asarray(idx, dtype=np.intp)
+    mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+    return idx, np.asarray(mean[idx], dtype=np.float64), np.asarray(scale[idx], dtype=np.float64)
+
 
 class SecureIoTPredictor:
     def __init__(self, model_dir="models_sample1100k", 
                  private_key_path="private_key.pem",
-                 public_key_path="public_key.pem"):
-        self.model_dir = model_dir
+                 public_key_path="public_key.pem",
+                 lazy=True, float32=False, use_bundle=True):
         self.private_key_path = private_key_path
         self.public_key_path = public_key_path
         
         self.sig_manager = DigitalSignatureManager(private_key_path, public_key_path)
-        self.models = {}
-        self.scaler = None
-        self.selected_idx = None
-        self.selected_cols = None
+        self._reload_lock = threading.Lock()
+        self._state = None
         
-        self._load_model_artifacts()
+        self._load_model_artifacts(model_dir, float32, lazy=lazy, use_bundle=use_bundle)
 
-    def _load_model_artifacts(self):
-        print(f"Loading model artifacts from '{self.model_dir}'...")
+    def _load_model_artifacts(self, model_dir, float32=False, lazy=True, use_bundle=True):
+        print(f"Loading model artifacts from '{model_dir}'...")
         
-        try:
-            self.models["knn"] = joblib.load(os.path.join(self.model_dir, "knn_model.pkl"))
-            self.models["dt"] = joblib.load(os.path.join(self.model_dir, "dt_model.pkl"))
-            self.models["xgb"] = joblib.load(os.path.join(self.model_dir, "xgb_model.pkl"))
-            self.models["nb"] = joblib.load(os.path.join(self.model_dir, "naivebayes_model.pkl"))
-            self.scaler = joblib.load(os.path.join(self.model_dir, "scaler.pkl"))
-            self.selected_idx = joblib.load(os.path.join(self.model_dir, "selected_idx.npy"))
-            
-            if os.path.exists(os.path.join(self.model_dir, "selected_cols.pkl")):
-                self.selected_cols = joblib.load(os.path.join(self.model_dir, "selected_cols.pkl"))
-            
-            print(f"[OK] Loaded {len(self.models)} models and preprocessing artifacts")
-        except Exception as e:
-            raise RuntimeError(f"Failed to load model artifacts: {e}")
+        state = _ArtifactState(model_dir, float32, use_bundle)
+        state.check_files()
+        if state.bundle is not None:
+            print(f"[OK] Using model bundle v{state.bundle.manifest['version']}")
+        
+        if lazy:
+            print("[OK] Model artifacts found (loaded on first use)")
+        else:
+            try:
+                state.load_all()
+            except Exception as e:
+                raise RuntimeError(f"Failed to load model artifacts: {e}")
+            print(f"[OK] Loaded {len(state.models)} models and preprocessing artifacts")
+        
+        # Requests already running keep the state they started with.
+        self._state = state
+        return state
+
+    def reload_artifacts(self, model_dir=None, float32=None, warmup=True):
+        """Load a model directory in full and swap it in atomically."""
+        with self._reload_lock:
+            current = self._state
+            model_dir = model_dir or current.model_dir
+            float32 = current.float32 if float32 is None else float32
+            state = _ArtifactState(model_dir, float32, current.use_bundle)
+            state.check_files()
+            try:
+                state.load_all()
+                if warmup:
+                    self._warmup_state(state, [n for n in state.model_names if n in current.models] or None)
+            except Exception as e:
+                raise RuntimeError(f"Failed to load model artifacts: {e}")
+            self._state = state
+        print(f"[OK] Reloaded model artifacts from '{model_dir}'")
+        return state
+
+    @property
+    def model_dir(self):
+        return self._state.model_dir
+
+    @property
+    def float32(self):
+        return self._state.float32
+
+    @property
+    def models(self):
+        return self._state.models
+
+    @property
+    def model_names(self):
+        """Models this directory can serve (the four base models plus any optional ones present)."""
+        return self._state.model_names
+
+    @property
+    def uses_bundle(self):
+        """True when the artifacts come from the model bundle rather than the pickles."""
+        return self._state.bundle is not None
+
+    @property
+    def scaler(self):
+        return self._state.preprocessing()[0]
+
+    @property
+    def selected_idx(self):
+        return self._state.preprocessing()[1]
+
+    @property
+    def selected_cols(self):
+        return self._state.preprocessing()[2]
+
+    @property
+    def unpickle_times(self):
+        return self._state.unpickle_times
+
+    @property
+    def warmup_times(self):
+        return self._state.warmup_times
+
+    def warmup(self, model_names=None, batch_size=8):
+        """Run a dummy batch through each model so the first real request is not slowed by lazy loading."""
+        self._warmup_state(self._state, model_names, batch_size)
+        return self.startup_report()
+
+    def _warmup_state(self, state, model_names=None, batch_size=8):
+        model_names = list(model_names or state.model_names)
+        scaler = state.preprocessing()[0]
+        n_features = getattr(scaler, "n_features_in_", 43)
+        dummy = np.zeros((batch_size, n_features))
+        X_selected = state.transform(dummy)
+        
+        for name in model_names:
+            model = state.models[name]
+            t0 = time.perf_counter()
+            model.predict(X_selected)
+            if hasattr(model, "predict_proba"):
+                model.predict_proba(X_selected)
+            state.warmup_times[name] = time.perf_counter() - t0
+            state.selector.record(name, batch_size, state.warmup_times[name] * 1000)
+
+    def startup_report(self, verbose=True):
+        state = self._state
+        report = {
+            "import_s": dict(_IMPORT_TIMES),
+            "unpickle_s": dict(state.unpickle_times),
+            "warmup_s": dict(state.warmup_times),
+        }
+        report["total_s"] = sum(sum(v.values()) for v in report.values())
+        
+        if verbose:
+            print("\nStartup time report:")
+            for section in ("import_s", "unpickle_s", "warmup_s"):
+                print(f"  {section[:-2]}:")
+                for key, value in report[section].items():
+                    print(f"    {key:<22} {value * 1000:9.1f} ms")
+            print(f"  total: {report['total_s'] * 1000:.1f} ms")
+        
+        return report
 
     def setup_keys(self, generate_new=False):
         if generate_new or not os.path.exists(self.public_key_path):
@@ -45,11 +344,12 @@ class SecureIoTPredictor:
             self.sig_manager.generate_keys(save=True)
         else:
             print("Loading existing keys...")
-            self.sig_manager.load_private_key()
-            self.sig_manager.load_public_key()
+            self.sig_manager.load_keys()
 
     def sign_input_data(self, data):
-        if isinstance(data, pd.DataFrame):
+        # A DataFrame can only have been passed in if pandas is already imported.
+        pd = sys.modules.get("pandas")
+        if pd is not None and isinstance(data, pd.DataFrame):
             data_dict = data.to_dict(orient='records')[0] if len(data) == 1 else data.to_dict(orient='list')
         elif isinstance(data, dict):
             data_dict = data
@@ -67,6 +367,9 @@ class SecureIoTPredictor:
         return signed_package
 
     def verify_and_preprocess(self, signed_package):
+        return self._verify_and_preprocess(signed_package, self._state)
+
+    def _verify_and_preprocess(self, signed_package, state):
         print("Verifying digital signature...")
         result = self.sig_manager.verify_and_extract(signed_package)
         
@@ -76,9 +379,14 @@ class SecureIoTPredictor:
         
         print(f"[OK] Signature verified. Source: {result['source']}")
         
-        data = result["data"]
+        return self._preprocess(result["data"], state), result
+
+    def _preprocess(self, data, state):
+        """Verified payload (one record, or columns of several) -> scaled, selected feature matrix."""
+        pd = lazy_import("pandas")
         
-        if isinstance(data, dict):
+        # One record has scalar values; a batch is signed as {column: [values]}
+        if isinstance(data, dict) and not isinstance(next(iter(data.values()), None), list):
             df = pd.DataFrame([data])
         else:
             df = pd.DataFrame(data)
@@ -89,29 +397,52 @@ class SecureIoTPredictor:
         if df.shape[1] < 43:
             raise ValueError(f"Expected 43 numeric features, got {df.shape[1]}")
         
-        X_scaled_full = self.scaler.transform(df.values)
-        
-        if self.selected_idx is not None and len(self.selected_idx) > 0:
-            X_selected = X_scaled_full[:, self.selected_idx]
-        else:
-            X_selected = X_scaled_full
-        
-        return X_selected, result
+        return state.transform(df.values)
+
+    def preprocess(self, data):
+        """Verified payload (one record, or columns of several) -> scaled, selected feature matrix."""
+        return self._preprocess(data, self._state)
+
+    def transform(self, values):
+        """Scale raw 43-feature rows and keep the selected features (no signature check)."""
+        return self._state.transform(values)
 
     def predict(self, X_scaled, use_best_model="xgb"):
+        return self._predict(X_scaled, use_best_model, self._state)
+
+    def _predict(self, X_scaled, use_best_model, state):
         print(f"\nRunning predictions using {use_best_model.upper()} model...")
         
-        model = self.models[use_best_model]
+        model = state.models[use_best_model]
         prediction = model.predict(X_scaled)
         proba = model.predict_proba(X_scaled) if hasattr(model, "predict_proba") else None
         
         return prediction, proba
 
-    def secure_predict(self, input_data, use_best_model="xgb"):
+    def predict_raw(self, values, use_best_model="xgb"):
+        """Preprocess and predict raw 43-feature rows (no signature check) against one artifact snapshot."""
+        state = self._state
+        model = state.models[use_best_model]
+        X_selected = state.transform(values)
+        prediction = model.predict(X_selected)
+        proba = model.predict_proba(X_selected) if hasattr(model, "predict_proba") else None
+        return prediction, proba
+
+    def secure_predict(self, input_data, use_best_model="xgb", latency_budget_ms=None):
+        """Sign, verify and predict one record.
+        
+        With latency_budget_ms set, use_best_model is ignored and the most accurate
+        model expected to finish within the remaining budget is used instead.
+        """
+        # One snapshot per request, so a concurrent reload never mixes scaler and model versions.
+        state = self._state
+        t_start = time.perf_counter()
+        if latency_budget_ms is not None:
+            state.selector.begin()
         try:
             signed_package = self.sign_input_data(input_data)
             
-            X_scaled, verify_result = self.verify_and_preprocess(signed_package)
+            X_scaled, verify_result = self._verify_and_preprocess(signed_package, state)
             
             if X_scaled is None:
                 return {
@@ -121,15 +452,25 @@ class SecureIoTPredictor:
                     "is_valid": False
                 }
             
-            prediction, proba = self.predict(X_scaled, use_best_model)
+            if latency_budget_ms is not None:
+                remaining_ms = latency_budget_ms - (time.perf_counter() - t_start) * 1000
+                use_best_model, _ = state.selector.choose(remaining_ms, len(X_scaled))
             
-            return {
+            t_model = time.perf_counter()
+            prediction, proba = self._predict(X_scaled, use_best_model, state)
+            state.selector.record(use_best_model, len(X_scaled), (time.perf_counter() - t_model) * 1000)
+            
+            result = {
                 "prediction": int(prediction[0]),
                 "probability": float(proba[0][1]) if proba is not None else None,
                 "source": verify_result["source"],
                 "is_valid": True,
                 "model_used": use_best_model.upper()
             }
+            if latency_budget_ms is not None:
+                result["latency_ms"] = (time.perf_counter() - t_start) * 1000
+                result["latency_budget_ms"] = latency_budget_ms
+            return result
         
         except Exception as e:
             return {
@@ -138,12 +479,22 @@ class SecureIoTPredictor:
                 "error": str(e),
                 "is_valid": False
             }
+        finally:
+            if latency_budget_ms is not None:
+                state.selector.end()
 
-    def batch_secure_predict(self, input_data_list, use_best_model="xgb"):
+    def batch_secure_predict(self, input_data_list, use_best_model="xgb", latency_budget_ms=None):
         results = []
         for idx, data in enumerate(input_data_list):
             print(f"\nProcessing sample {idx+1}/{len(input_data_list)}...")
-            result = self.secure_predict(data, use_best_model)
+            result = self.secure_predict(data, use_best_model, latency_budget_ms)
             results.append(result)
         
         return results
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    predictor = SecureIoTPredictor(sys.argv[1] if len(sys.argv) > 1 else "models_sample1100k")
+    print(f"Constructed predictor in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    predictor.warmup()
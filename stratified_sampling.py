@@ -0,0 +1,130 @@
+"""
+Single-pass per-class reservoir sampling
+Every row gets a uniform random key from one seeded stream (in file order);
+each class keeps a bounded reservoir of its k_c smallest keys, which is an exact
+uniform sample of size k_c. Quotas k_c follow the class ratio and sum exactly
+to the requested size. Peak memory is O(sample size + one chunk), and because
+keys depend only on row order and seed, the result does not depend on the
+chunk size or on whether rows come from the CSV or the columnar cache.
+
+Since keys are shared, the sample for a smaller size is contained in the
+sample for a larger one (nested samples for size sweeps).
+"""
+
+import numpy as np
+
+TARGET_COL = "Target"
+CHUNK_ROWS = 200_000
+
+
+def class_quotas(counts, n):
+    """Split n across classes proportionally to counts (largest remainder, exact total)."""
+    total = sum(counts.values())
+    if n >= total:
+        return dict(counts)
+    classes = sorted(counts)
+    exact = {c: n * counts[c] / total for c in classes}
+    quotas = {c: int(np.floor(exact[c])) for c in classes}
+    remainder = n - sum(quotas.values())
+    for c in sorted(classes, key=lambda c: (quotas[c] - exact[c], c))[:remainder]:
+        quotas[c] += 1
+    return quotas
+
+
+def _valid_labels(labels):
+    labels = np.asarray(labels)
+    if labels.dtype.kind == "f":
+        mask = ~np.isnan(labels)
+        return labels[mask].astype(np.int64), mask
+    return labels.astype(np.int64), None
+
+
+def count_classes(target, chunksize=CHUNK_ROWS):
+    counts = {}
+    for start in range(0, len(target), chunksize):
+        labels, _ = _valid_labels(target[start:start + chunksize])
+        values, n = np.unique(labels, return_counts=True)
+        for v, c in zip(values.tolist(), n.tolist()):
+            counts[v] = counts.get(v, 0) + c
+    return counts
+
+
+class _Reservoir:
+    """Bottom-k reservoir over (key, payload index) pairs."""
+
+    def __init__(self, k):
+        self.k = k
+        self.keys = np.empty(0)
+        self.rows = np.empty(0, dtype=np.int64)
+
+    def offer(self, keys, rows):
+        if self.k == 0 or len(keys) == 0:
+            return None
+        keys = np.concatenate([self.keys, keys])
+        rows = np.concatenate([self.rows, rows])
+        if len(keys) > self.k:
+            keep = np.argpartition(keys, self.k - 1)[:self.k]
+            keys, rows = keys[keep], rows[keep]
+        self.keys, self.rows = keys, rows
+        return rows
+
+
+def stratified_sample_indices(target, n, random_state=42, chunksize=CHUNK_ROWS, counts=None):
+    """Sorted row indices of an exact stratified sample of size n from a label array/memmap."""
+    counts = counts or count_classes(target, chunksize)
+    quotas = class_quotas(counts, n)
+    reservoirs = {c: _Reservoir(k) for c, k in quotas.items()}
+    rng = np.random.default_rng(random_state)
+
+    for start in range(0, len(target), chunksize):
+        chunk = np.asarray(target[start:start + chunksize])
+        keys = rng.random(len(chunk))
+        labels, mask = _valid_labels(chunk)
+        rows = np.arange(start, start + len(chunk))
+        if mask is not None:
+            keys, rows = keys[mask], rows[mask]
+        for c, reservoir in reservoirs.items():
+            in_class = labels == c
+            reservoir.offer(keys[in_class], rows[in_class])
+
+    return np.sort(np.concatenate([r.rows for r in reservoirs.values()]))
+
+
+def stratified_sample(dataset, n, random_state=42, chunksize=CHUNK_ROWS):
+    """Row indices of a stratified sample from a dataset_cache.ColumnarDataset."""
+    return stratified_sample_indices(dataset.target, n, random_state, chunksize)
+
+
+def stratified_sample_csv(csv_path, n, random_state=42, chunksize=CHUNK_ROWS, target_col=TARGET_COL):
+    """Stratified sample straight from a CSV in two chunked passes (counts, then reservoirs)."""
+    import pandas as pd
+
+    counts = {}
+    for chunk in pd.read_csv(csv_path, usecols=[target_col], chunksize=chunksize):
+        labels, _ = _valid_labels(chunk[target_col].to_numpy(dtype=np.float64))
+        values, cnt = np.unique(labels, return_counts=True)
+        for v, c in zip(values.tolist(), cnt.tolist()):
+            counts[v] = counts.get(v, 0) + c
+
+    quotas = class_quotas(counts, n)
+    reservoirs = {c: _Reservoir(k) for c, k in quotas.items()}
+    kept = {c: None for c in quotas}
+    rng = np.random.default_rng(random_state)
+    start = 0
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, low_memory=False):
+        keys = rng.random(len(chunk))
+        labels, mask = _valid_labels(chunk[target_col].to_numpy(dtype=np.float64))
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        if mask is not None:
+            keys, chunk = keys[mask], chunk[mask]
+        for c, reservoir in reservoirs.items():
+            in_class = labels == c
+            candidates = chunk[in_class] if kept[c] is None else pd.concat([kept[c], chunk[in_class]])
+            rows = reservoir.offer(keys[in_class], chunk.index[in_class].to_numpy())
+            if rows is not None:
+                kept[c] = candidates.loc[rows]
+
+    frames = [df for df in kept.values() if df is not None]
+    return pd.concat(frames).sort_index()
@@ -0,0 +1,187 @@
+"""
+Concurrency stress test for SecureIoTPredictor and DigitalSignatureManager
+Many threads share one predictor while keys and model artifacts are reloaded
+underneath them; every result must match a single-threaded run. Under pytest,
+and when the model directory does not exist, tiny models and a fresh key pair
+are built in a temporary directory, so the test needs no trained artifacts.
+
+Usage: python test_concurrency.py [model_dir]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from secure_predictor import SecureIoTPredictor
+from digital_signature import DigitalSignatureManager
+
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+MODEL_DIR = "models_sample1100k"
+KEY_PATHS = ("private_key.pem", "public_key.pem")
+N_THREADS = 16
+N_SAMPLES = 64
+ROUNDS = 3
+N_FEATURES = 43
+
+
+def make_samples(n=N_SAMPLES, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{f"F{i}": float(v) for i, v in enumerate(row)} for row in rng.normal(size=(n, 43))]
+
+
+def make_fixture_models(out_dir, n_rows=2000, n_selected=10, seed=0):
+    """Small KNN, DT, XGBoost and NB on synthetic rows, saved the way sample_and_compare saves them."""
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.tree import DecisionTreeClassifier
+    from sklearn.naive_bayes import GaussianNB
+    from xgboost import XGBClassifier
+    from model_training import MODEL_FILES
+
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, N_FEATURES))
+    y = (X[:, :3].sum(axis=1) + rng.normal(scale=0.5, size=n_rows) > 0).astype(int)
+    scaler = StandardScaler().fit(pd.DataFrame(X, columns=[f"F{i}" for i in range(N_FEATURES)]))
+    selected_idx = np.arange(n_selected)
+    X_sel = scaler.transform(pd.DataFrame(X, columns=scaler.feature_names_in_))[:, selected_idx]
+    models = {"KNN": KNeighborsClassifier(n_neighbors=5), "DT": DecisionTreeClassifier(max_depth=6, random_state=0),
+              "XGBoost": XGBClassifier(n_estimators=20, max_depth=3, random_state=0, n_jobs=1),
+              "NaiveBayes": GaussianNB()}
+    os.makedirs(out_dir, exist_ok=True)
+    for name, model in models.items():
+        joblib.dump(model.fit(X_sel, y), os.path.join(out_dir, MODEL_FILES[name]))
+    joblib.dump(scaler, os.path.join(out_dir, "scaler.pkl"))
+    joblib.dump(selected_idx, os.path.join(out_dir, "selected_idx.npy"))
+    return out_dir
+
+
+def make_key_pair(out_dir):
+    paths = (os.path.join(out_dir, "private_key.pem"), os.path.join(out_dir, "public_key.pem"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        DigitalSignatureManager(*paths).generate_keys(save=True)
+    return paths
+
+
+if pytest is not None:
+    @pytest.fixture(scope="module")
+    def key_paths(tmp_path_factory):
+        return make_key_pair(str(tmp_path_factory.mktemp("keys")))
+
+    @pytest.fixture(scope="module")
+    def model_dir(tmp_path_factory):
+        return make_fixture_models(str(tmp_path_factory.mktemp("models")))
+
+
+def run_threads(target, n_threads):
+    errors = []
+
+    def wrapper(i):
+        try:
+            target(i)
+        except Exception as e:
+            errors.append(f"thread {i}: {type(e).__name__}: {e}")
+
+    threads = [threading.Thread(target=wrapper, args=(i,)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+
+def test_signature_manager_concurrent(key_paths, n_threads=N_THREADS):
+    manager = DigitalSignatureManager(*key_paths)
+    manager.load_keys()
+    samples = make_samples(16)
+    stop = threading.Event()
+
+    def reload_keys():
+        while not stop.is_set():
+            manager.load_keys()
+            time.sleep(0.005)
+
+    def sign_and_verify(i):
+        for data in samples:
+            signature = manager.sign_data(data)
+            assert manager.verify_signature(data, signature), "valid signature rejected"
+            tampered = dict(data, F0=data["F0"] + 1.0)
+            assert not manager.verify_signature(tampered, signature), "tampered data accepted"
+
+    reloader = threading.Thread(target=reload_keys)
+    reloader.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        errors = run_threads(sign_and_verify, n_threads)
+    stop.set()
+    reloader.join()
+
+    assert not errors, "\n".join(errors)
+    print(f"[OK] {n_threads} threads signed/verified {len(samples)} records each during key reloads")
+
+
+def test_predictor_concurrent(model_dir, key_paths, n_threads=N_THREADS):
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor = SecureIoTPredictor(model_dir, *key_paths)
+        predictor.setup_keys(generate_new=False)
+    samples = make_samples()
+    models = ["xgb", "dt", "knn", "nb"]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = {m: [predictor.secure_predict(data, m) for data in samples] for m in models}
+    for m in models:
+        assert all(r["is_valid"] for r in expected[m]), f"single-threaded {m} run failed: {expected[m][0]}"
+
+    # Fresh predictor so lazy loading also races between threads.
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor = SecureIoTPredictor(model_dir, *key_paths)
+        predictor.setup_keys(generate_new=False)
+    stop = threading.Event()
+    mismatches = []
+
+    def reload_everything():
+        while not stop.is_set():
+            predictor.setup_keys(generate_new=False)
+            predictor.reload_artifacts(warmup=False)
+            time.sleep(0.05)
+
+    def predict_worker(i):
+        for r in range(ROUNDS):
+            model = models[(i + r) % len(models)]
+            for j, data in enumerate(samples):
+                got = predictor.secure_predict(data, model)
+                want = expected[model][j]
+                if got.get("prediction") != want["prediction"] or got.get("probability") != want["probability"]:
+                    mismatches.append((i, model, j, got, want))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        reloader = threading.Thread(target=reload_everything)
+        reloader.start()
+        errors = run_threads(predict_worker, n_threads)
+        stop.set()
+        reloader.join()
+
+    assert not errors, "\n".join(errors)
+    assert not mismatches, f"{len(mismatches)} results differ from single-threaded run, e.g. {mismatches[0]}"
+    total = n_threads * ROUNDS * len(samples)
+    print(f"[OK] {total} concurrent predictions matched the single-threaded run during reloads")
+
+
+if __name__ == "__main__":
+    model_dir = sys.argv[1] if len(sys.argv) > 1 else MODEL_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        key_paths = KEY_PATHS
+        if not os.path.isdir(model_dir):
+            print(f"'{model_dir}' not found; using fixture models and keys in a temporary directory")
+            model_dir, key_paths = make_fixture_models(os.path.join(tmp, "models")), make_key_pair(tmp)
+        test_signature_manager_concurrent(key_paths)
+        test_predictor_concurrent(model_dir, key_paths)
+    print("\n✓ Concurrency stress test passed")
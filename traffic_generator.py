@@ -0,0 +1,253 @@
+"""
+Synthetic IIoT traffic for demos and load testing
+Generates N records of the 43-feature schema the UI sends (Mean, Sport, ...,
+Idle, F1..F29) in one vectorized draw per profile. Each profile is a uniform
+range per feature:
+
+  normal        legitimate sensor traffic
+  moderate      suspicious volume on low ports
+  severe        saturating flood on well-known ports
+  ddos          many small packets from spread-out source ports at a very high rate
+  port_scan     one or two tiny packets per flow, sweeping destination ports
+  exfiltration  long flows with large outbound (source) byte counts
+
+Each TrafficGenerator owns a seeded numpy Generator, so runs are reproducible
+and successive calls never repeat records; spawn() gives independent streams
+for parallel workers. Rows come back as a float64 matrix, column arrays or a
+structured array. They can be signed per record or per batch with a
+DigitalSignatureManager, and paced() emits them at a fixed rate.
+
+    python traffic_generator.py --mix normal=0.9 ddos=0.05 port_scan=0.05 -n 1000000 --out traffic.npy
+    python traffic_generator.py --profile ddos -n 10000 --sign --rate 500 --out -
+"""
+
+import json
+import time
+import numpy as np
+
+BASE_FEATURES = ("Mean", "Sport", "Dport", "SrcPkts", "DstPkts", "TotPkts", "DstBytes", "SrcBytes",
+                 "TotBytes", "SrcLoad", "DstLoad", "Rate", "Duration", "Idle")
+FEATURES = BASE_FEATURES + tuple(f"F{i}" for i in range(1, 30))
+CHUNK_ROWS = 100_000  # rows drawn at a time when streaming
+
+# (low, high) per base feature, then the range of F1..F29 under "extra"
+PROFILES = {
+    "normal": {
+        "Mean": (80, 120), "Sport": (1000, 65535), "Dport": (1000, 65535),
+        "SrcPkts": (100, 1000), "DstPkts": (100, 1000), "TotPkts": (200, 2000),
+        "DstBytes": (1000, 100000), "SrcBytes": (1000, 100000), "TotBytes": (2000, 200000),
+        "SrcLoad": (0.1, 5.0), "DstLoad": (0.1, 5.0), "Rate": (1, 100), "Duration": (10, 300), "Idle": (0, 10),
+        "extra": (-1, 1),
+    },
+    "moderate": {
+        "Mean": (40, 80), "Sport": (100, 500), "Dport": (100, 500),
+        "SrcPkts": (1000, 5000), "DstPkts": (1000, 5000), "TotPkts": (5000, 50000),
+        "DstBytes": (100000, 1000000), "SrcBytes": (100000, 1000000), "TotBytes": (200000, 2000000),
+        "SrcLoad": (50, 90), "DstLoad": (50, 90), "Rate": (500, 5000), "Duration": (1, 60), "Idle": (0, 1),
+        "extra": (-5, 5),
+    },
+    "severe": {
+        "Mean": (20, 50), "Sport": (1, 100), "Dport": (1, 100),
+        "SrcPkts": (5000, 50000), "DstPkts": (5000, 50000), "TotPkts": (50000, 500000),
+        "DstBytes": (1000000, 10000000), "SrcBytes": (1000000, 10000000), "TotBytes": (2000000, 20000000),
+        "SrcLoad": (90, 100), "DstLoad": (90, 100), "Rate": (5000, 50000), "Duration": (0.1, 10),
+        "Idle": (0, 0.1),
+        "extra": (-5, 5),
+    },
+    "ddos": {
+        "Mean": (5, 20), "Sport": (1024, 65535), "Dport": (1, 1024),
+        "SrcPkts": (10000, 100000), "DstPkts": (0, 100), "TotPkts": (10000, 100100),
+        "DstBytes": (0, 10000), "SrcBytes": (600000, 6000000), "TotBytes": (600000, 6010000),
+        "SrcLoad": (95, 100), "DstLoad": (0, 5), "Rate": (20000, 100000), "Duration": (0.01, 5),
+        "Idle": (0, 0.01),
+        "extra": (-5, 5),
+    },
+    "port_scan": {
+        "Mean": (0, 5), "Sport": (30000, 65535), "Dport": (1, 65535),
+        "SrcPkts": (1, 2), "DstPkts": (0, 1), "TotPkts": (1, 3),
+        "DstBytes": (0, 60), "SrcBytes": (40, 120), "TotBytes": (40, 180),
+        "SrcLoad": (0, 1), "DstLoad": (0, 0.5), "Rate": (100, 2000), "Duration": (0.0001, 0.1),
+        "Idle": (0, 0.05),
+        "extra": (-3, 3),
+    },
+    "exfiltration": {
+        "Mean": (200, 1400), "Sport": (1024, 65535), "Dport": (443, 8443),
+        "SrcPkts": (5000, 50000), "DstPkts": (100, 2000), "TotPkts": (5100, 52000),
+        "DstBytes": (10000, 200000), "SrcBytes": (5000000, 50000000), "TotBytes": (5010000, 50200000),
+        "SrcLoad": (20, 60), "DstLoad": (0.1, 2), "Rate": (50, 500), "Duration": (300, 3600), "Idle": (0, 2),
+        "extra": (-5, 5),
+    },
+}
+PROFILE_NAMES = tuple(PROFILES)
+ATTACK_PROFILES = tuple(name for name in PROFILE_NAMES if name != "normal")
+FEATURE_DTYPE = np.dtype([(name, np.float64) for name in FEATURES])
+
+
+def _range_arrays(ranges):
+    """(low, high - low) per feature."""
+    n_extra = len(FEATURES) - len(BASE_FEATURES)
+    low = np.array([ranges[f][0] for f in BASE_FEATURES] + [ranges["extra"][0]] * n_extra, dtype=np.float64)
+    high = np.array([ranges[f][1] for f in BASE_FEATURES] + [ranges["extra"][1]] * n_extra, dtype=np.float64)
+    return low, high - low
+
+
+_BOUNDS = {name: _range_arrays(ranges) for name, ranges in PROFILES.items()}
+
+
+def _bounds(profile):
+    if profile not in _BOUNDS:
+        raise ValueError(f"Unknown traffic profile '{profile}' ({', '.join(PROFILE_NAMES)})")
+    return _BOUNDS[profile]
+
+
+class TrafficGenerator:
+    """Seeded source of synthetic records; every call continues the same random stream."""
+
+    def __init__(self, seed=None):
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence)
+
+    def spawn(self, n):
+        """n independent generators (e.g. one per worker), reproducible from this one's seed."""
+        return [TrafficGenerator(child) for child in self.seed_sequence.spawn(n)]
+
+    def generate(self, n, profile="normal"):
+        """(n, 43) float64 matrix of one profile."""
+        low, span = _bounds(profile)
+        # Same arithmetic as rng.uniform(low, high), done in place (uniform with per-column bounds is ~3x slower)
+        X = self.rng.random((n, len(FEATURES)))
+        X *= span
+        X += low
+        return X
+
+    def generate_mix(self, n, weights):
+        """(X, profile index per row) for {profile: weight}; rows are shuffled across profiles."""
+        names = list(weights)
+        p = np.array([weights[name] for name in names], dtype=np.float64)
+        labels = self.rng.choice(len(names), size=n, p=p / p.sum())
+        # One draw in [0, 1) for the whole batch, then each row is stretched to its profile's ranges
+        X = self.rng.random((n, len(FEATURES)))
+        X *= np.stack([_bounds(name)[1] for name in names])[labels]
+        X += np.stack([_bounds(name)[0] for name in names])[labels]
+        codes = np.array([PROFILE_NAMES.index(name) for name in names])
+        return X, codes[labels]
+
+    def record(self, profile="normal"):
+        """One record as a {feature: float} dict, as the UI signs it."""
+        return dict(zip(FEATURES, self.generate(1, profile)[0].tolist()))
+
+    def stream(self, n, profile="normal", chunk_rows=CHUNK_ROWS, weights=None):
+        """Yield n rows as matrices of at most chunk_rows, so millions of rows never sit in memory at once."""
+        for start in range(0, n, chunk_rows):
+            rows = min(chunk_rows, n - start)
+            yield self.generate_mix(rows, weights)[0] if weights else self.generate(rows, profile)
+
+
+def as_columns(X):
+    """{feature: column array} views of a generated matrix."""
+    return {name: X[:, j] for j, name in enumerate(FEATURES)}
+
+
+def as_structured(X):
+    """Structured array (one named float64 field per feature) sharing memory with X where possible."""
+    return np.ascontiguousarray(X, dtype=np.float64).view(FEATURE_DTYPE).ravel()
+
+
+def records(X):
+    """Yield one {feature: float} dict per row."""
+    for row in X.tolist():
+        yield dict(zip(FEATURES, row))
+
+
+def signed_packages(X, sig_manager, batch_size=None):
+    """Yield signed packages: one per record, or one per batch_size rows signed as {feature: [values]}."""
+    if batch_size is None:
+        for data in records(X):
+            yield {"data": data, "signature": sig_manager.sign_data(data)}
+        return
+    for start in range(0, len(X), batch_size):
+        chunk = X[start:start + batch_size]
+        data = {name: chunk[:, j].tolist() for j, name in enumerate(FEATURES)}
+        yield {"data": data, "signature": sig_manager.sign_data(data)}
+
+
+def paced(items, rate):
+    """Yield items at `rate` per second; a consumer that falls behind resumes from now instead of bursting."""
+    interval = 1.0 / rate
+    next_at = time.perf_counter()
+    for item in items:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_at -= delay  # running behind: restart the schedule instead of bursting to catch up
+        yield item
+        next_at += interval
+
+
+def parse_mix(specs):
+    """['normal=0.9', 'ddos=0.1'] -> {'normal': 0.9, 'ddos': 0.1}"""
+    weights = {}
+    for spec in specs:
+        name, _, weight = spec.partition("=")
+        if name not in PROFILES:
+            raise ValueError(f"Unknown traffic profile '{name}' ({', '.join(PROFILE_NAMES)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Generate synthetic IIoT traffic records")
+    parser.add_argument("-n", "--rows", type=int, default=100_000)
+    parser.add_argument("--profile", choices=PROFILE_NAMES, default="normal")
+    parser.add_argument("--mix", nargs="+", default=None, help="profile=weight pairs, e.g. normal=0.9 ddos=0.1")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", default="traffic.npy", help=".npy, .csv or .jsonl ('-' = JSON lines on stdout)")
+    parser.add_argument("--sign", action="store_true", help="write signed packages (JSON lines only)")
+    parser.add_argument("--sign-batch", type=int, default=None, help="rows per signed package (default one per record)")
+    parser.add_argument("--private-key", default="private_key.pem")
+    parser.add_argument("--rate", type=float, default=None, help="JSON lines only: records/packages per second")
+    args = parser.parse_args()
+
+    gen = TrafficGenerator(args.seed)
+    weights = parse_mix(args.mix) if args.mix else None
+    t0 = time.perf_counter()
+    if weights:
+        X, labels = gen.generate_mix(args.rows, weights)
+    else:
+        X, labels = gen.generate(args.rows, args.profile), np.full(args.rows, PROFILE_NAMES.index(args.profile))
+    elapsed = time.perf_counter() - t0
+    print(f"[OK] Generated {args.rows} rows in {elapsed:.3f}s ({args.rows / max(elapsed, 1e-9):,.0f} rows/s)",
+          file=sys.stderr)
+
+    if args.out == "-" or args.out.endswith(".jsonl"):
+        if args.sign:
+            from digital_signature import DigitalSignatureManager
+            sig_manager = DigitalSignatureManager(args.private_key)
+            sig_manager.load_private_key()
+            items = signed_packages(X, sig_manager, args.sign_batch)
+        else:
+            items = records(X)
+        if args.rate:
+            items = paced(items, args.rate)
+        out = sys.stdout if args.out == "-" else open(args.out, "w")
+        try:
+            for item in items:
+                out.write(json.dumps(item) + "\n")
+                if args.rate:
+                    out.flush()
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    elif args.sign or args.rate:
+        parser.error("--sign and --rate need JSON lines output (--out file.jsonl or -)")
+    elif args.out.endswith(".csv"):
+        pd.DataFrame(X, columns=FEATURES).assign(Profile=np.array(PROFILE_NAMES)[labels]).to_csv(args.out, index=False)
+    else:
+        np.save(args.out, as_structured(X))
+    if args.out != "-":
+        print(f"✅ Traffic saved to '{args.out}'", file=sys.stderr)
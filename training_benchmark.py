@@ -0,0 +1,264 @@
+"""
+Training-scaling benchmark and comparison charts
+Runs sample_and_compare's pipeline at each sample size (its sweep) and merges
+every size's model_comparison.csv into one results store, training_results.csv:
+one row per (SampleSize, Model) with the metrics, training time, prediction
+latency and peak RSS. Model directories that already exist can be collected
+without retraining. Every chart is then rendered from the store in one pass
+with matplotlib's Agg backend, so no display is needed:
+
+  {metric}_comparison.png   one bar per model at the largest (or chosen) size
+  {metric}_vs_size.png      one line per model across sample sizes
+  tradeoff.png              training time against accuracy and F1 per model
+  confusion_matrices.png    per-model confusion matrices (confusion_matrices.csv)
+  roc_curves.png            per-model ROC curves (roc_curves.csv)
+
+    python training_benchmark.py --sizes 100k 200k 300k
+    python training_benchmark.py --collect        # existing models_sample*k directories
+    python training_benchmark.py --charts-only
+"""
+
+import glob
+import os
+import re
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from evaluation import CONFUSION_FILE, ROC_FILE
+
+RESULTS_FILE = "training_results.csv"
+CHART_DIR = "charts"
+CHART_DPI = 150
+BAR_METRICS = ("Accuracy", "Precision", "Recall", "F1", "ROC-AUC", "TrainTime_s")
+SIZE_METRICS = ("TrainTime_s", "PeakRSS_MB", "Latency_ms", "Accuracy", "F1", "ROC-AUC")
+SCORE_METRICS = ("Accuracy", "Precision", "Recall", "F1", "ROC-AUC")  # in [0, 1]; bars are zoomed in
+MODEL_LABELS = {"KNN": "KNN", "DT": "Decision Tree", "XGBoost": "XGBoost", "NaiveBayes": "Naive Bayes",
+                "KNN_reduced": "KNN (reduced)"}
+MODEL_COLORS = {"KNN": "#AED6F1", "DT": "#A9DFBF", "XGBoost": "#F7DC6F", "NaiveBayes": "#F5B7B1",
+                "KNN_reduced": "#D7BDE2"}
+METRIC_LABELS = {"TrainTime_s": "Training Time (s)", "PeakRSS_MB": "Peak RSS (MB)",
+                 "Latency_ms": "Single-row Latency (ms)", "F1": "F1 Score"}
+MODEL_DIR_PATTERN = re.compile(r"models_sample(\d+)k$")
+
+
+def size_label(n):
+    n = int(n)
+    if n % 1_000_000 == 0:
+        return f"{n // 1_000_000}M"
+    return f"{n // 1000}k" if n % 1000 == 0 else str(n)
+
+
+def _chart_name(metric):
+    return metric.split("_")[0]  # TrainTime_s -> TrainTime, as the existing PNGs are named
+
+
+def read_run(out_dir, sample_size):
+    """One model directory's model_comparison.csv as store rows."""
+    df = pd.read_csv(os.path.join(out_dir, "model_comparison.csv"), index_col=0)
+    df = df.rename_axis("Model").reset_index()
+    df.insert(0, "SampleSize", int(sample_size))
+    df["OutDir"] = out_dir
+    return df
+
+
+def collect(base_dir="."):
+    """Store rows from every models_sample{N}k directory under base_dir that has results."""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(base_dir, "models_sample*k"))):
+        match = MODEL_DIR_PATTERN.search(path)
+        if match is None:
+            continue
+        if not os.path.exists(os.path.join(path, "model_comparison.csv")):
+            print(f"⚠ Missing: {os.path.join(path, 'model_comparison.csv')}")
+            continue
+        frames.append(read_run(path, int(match.group(1)) * 1000))
+    if not frames:
+        raise FileNotFoundError(f"No models_sample*k directories with results under '{base_dir}'")
+    return pd.concat(frames, ignore_index=True)
+
+
+def run_training(sizes, jobs=None):
+    """Train at every sample size with sample_and_compare's sweep; returns store rows."""
+    from dataset_cache import load_dataset
+    from sample_and_compare import CSV_FILE, default_out_dir, sweep
+
+    print("Loading dataset...")
+    summary = sweep(load_dataset(CSV_FILE), sizes, jobs)
+    summary["OutDir"] = [default_out_dir(n) for n in summary["SampleSize"]]
+    return summary
+
+
+def update_store(rows, path=RESULTS_FILE):
+    """Merge rows into the results store; a new (SampleSize, Model) row replaces the old one."""
+    if os.path.exists(path):
+        store = pd.read_csv(path)
+        new_keys = pd.MultiIndex.from_frame(rows[["SampleSize", "Model"]])
+        old_keys = pd.MultiIndex.from_frame(store[["SampleSize", "Model"]])
+        rows = pd.concat([store[~old_keys.isin(new_keys)], rows], ignore_index=True)
+    rows = rows.sort_values(["SampleSize", "Model"], kind="stable").reset_index(drop=True)
+    keys = ["SampleSize", "Model"]
+    rows = rows[keys + [c for c in rows.columns if c not in keys + ["OutDir"]] + ["OutDir"]]
+    rows.to_csv(path, index=False)
+    print(f"[OK] Results store '{path}': {rows['SampleSize'].nunique()} sizes, {len(rows)} rows")
+    return rows
+
+
+def _save(fig, out_dir, name):
+    path = os.path.join(out_dir, name)
+    fig.tight_layout()
+    fig.savefig(path, dpi=CHART_DPI)
+    plt.close(fig)
+    return path
+
+
+def bar_chart(at_size, metric, sample_size, out_dir):
+    values = at_size[metric].dropna()
+    fig, ax = plt.subplots(figsize=(7, 4))
+    ax.bar([MODEL_LABELS.get(m, m) for m in values.index], values,
+           color=[MODEL_COLORS.get(m, "#CCCCCC") for m in values.index], edgecolor="gray")
+    if metric in SCORE_METRICS:
+        lo, hi = values.min(), values.max()
+        pad = max(hi - lo, 0.01)
+        ax.set_ylim(max(0.0, lo - pad), min(1.0, hi) + pad * 0.3)
+        fmt = "{:.6f}"
+    else:
+        ax.set_ylim(0, values.max() * 1.15 or 1)
+        fmt = "{:.3f}"
+    for i, val in enumerate(values):
+        ax.text(i, val, fmt.format(val), ha="center", va="bottom", fontsize=9, fontweight="bold")
+    label = METRIC_LABELS.get(metric, metric)
+    ax.set_title(f"{label} Comparison Across Models ({size_label(sample_size)} Sample)", fontsize=13, pad=15)
+    ax.set_xlabel("Models")
+    ax.set_ylabel(label)
+    ax.grid(axis="y", linestyle="--", alpha=0.4)
+    return _save(fig, out_dir, f"{_chart_name(metric)}_comparison.png")
+
+
+def size_chart(store, metric, out_dir):
+    table = store.pivot_table(index="SampleSize", columns="Model", values=metric)
+    fig, ax = plt.subplots(figsize=(9, 5))
+    for marker, model in zip("os^dv", table.columns):
+        ax.plot(table.index, table[model], marker=marker, linewidth=2, label=MODEL_LABELS.get(model, model))
+    ax.set_xticks(table.index, [size_label(n) for n in table.index])
+    label = METRIC_LABELS.get(metric, metric)
+    ax.set_title(f"{label} vs Dataset Size (All Models)", fontsize=13, pad=15)
+    ax.set_xlabel("Dataset Size")
+    ax.set_ylabel(label)
+    ax.grid(True, linestyle="--", alpha=0.6)
+    ax.legend(title="Model", loc="best", frameon=True)
+    return _save(fig, out_dir, f"{_chart_name(metric)}_vs_size.png")
+
+
+def tradeoff_chart(at_size, sample_size, out_dir):
+    """Training time bars with accuracy and F1 on a second axis."""
+    labels = [MODEL_LABELS.get(m, m) for m in at_size.index]
+    x = np.arange(len(labels))
+    fig, ax = plt.subplots(figsize=(9, 6))
+    ax.bar(x, at_size["TrainTime_s"], color="#ef233c", alpha=0.6, label="Training Time (s)")
+    for i, val in enumerate(at_size["TrainTime_s"]):
+        ax.text(i, val, f"{val:.3f}s", ha="center", va="bottom", fontsize=9, fontweight="bold", color="#ef233c")
+    ax.set_xticks(x, labels)
+    ax.set_ylabel("Training Time (s)")
+    scores = ax.twinx()
+    for metric, marker, color in (("Accuracy", "s", "#00b4d8"), ("F1", "^", "#8338ec")):
+        scores.plot(x, at_size[metric], marker=marker, linewidth=3, color=color, label=metric)
+    scores.set_ylabel("Score")
+    handles = ax.get_legend_handles_labels()
+    more = scores.get_legend_handles_labels()
+    scores.legend(handles[0] + more[0], handles[1] + more[1], title="Metrics", loc="lower right")
+    ax.set_title(f"Training Time vs Performance Trade-off ({size_label(sample_size)} Sample)",
+                 fontsize=14, fontweight="bold", pad=20)
+    ax.grid(True, linestyle="--", alpha=0.6)
+    return _save(fig, out_dir, "tradeoff.png")
+
+
+def confusion_chart(model_dir, sample_size, out_dir):
+    path = os.path.join(model_dir, CONFUSION_FILE)
+    if not os.path.exists(path):
+        print(f"⚠ Missing: {path}")
+        return None
+    confusion = pd.read_csv(path, index_col="Model")
+    fig, axes = plt.subplots(1, len(confusion), figsize=(3.2 * len(confusion), 3.4), squeeze=False)
+    for ax, (model, row) in zip(axes[0], confusion.iterrows()):
+        matrix = np.array([[row["TN"], row["FP"]], [row["FN"], row["TP"]]])
+        ax.imshow(matrix, cmap="Blues")
+        for (i, j), count in np.ndenumerate(matrix):
+            ax.text(j, i, f"{count:,}", ha="center", va="center",
+                    color="white" if count > matrix.max() / 2 else "black", fontweight="bold")
+        ax.set_xticks([0, 1], ["Normal", "Attack"])
+        ax.set_yticks([0, 1], ["Normal", "Attack"])
+        ax.set_xlabel("Predicted")
+        ax.set_ylabel("Actual")
+        ax.set_title(MODEL_LABELS.get(model, model))
+    fig.suptitle(f"Confusion Matrices ({size_label(sample_size)} Sample)", fontsize=13)
+    return _save(fig, out_dir, "confusion_matrices.png")
+
+
+def roc_chart(model_dir, at_size, sample_size, out_dir):
+    path = os.path.join(model_dir, ROC_FILE)
+    if not os.path.exists(path):
+        print(f"⚠ Missing: {path}")
+        return None
+    curves = pd.read_csv(path)
+    fig, ax = plt.subplots(figsize=(7, 6))
+    for model, curve in curves.groupby("Model", sort=False):
+        auc = at_size["ROC-AUC"].get(model, np.nan) if "ROC-AUC" in at_size else np.nan
+        ax.plot(curve["FPR"], curve["TPR"], linewidth=2, label=f"{MODEL_LABELS.get(model, model)} (AUC {auc:.4f})")
+    ax.plot([0, 1], [0, 1], linestyle="--", color="gray", linewidth=1)
+    ax.set_xlabel("False Positive Rate")
+    ax.set_ylabel("True Positive Rate")
+    ax.set_title(f"ROC Curves ({size_label(sample_size)} Sample)", fontsize=13, pad=15)
+    ax.grid(True, linestyle="--", alpha=0.4)
+    ax.legend(loc="lower right")
+    return _save(fig, out_dir, "roc_curves.png")
+
+
+def render_charts(store, out_dir=CHART_DIR, sample_size=None):
+    """Render every chart from the results store; returns the written paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    sample_size = int(sample_size or store["SampleSize"].max())
+    at_size = store[store["SampleSize"] == sample_size].set_index("Model")
+    if at_size.empty:
+        raise ValueError(f"No results for sample size {sample_size} in the store")
+    # Directories from older runs may lack newer columns; charts are drawn for whatever was recorded
+    paths = [bar_chart(at_size, m, sample_size, out_dir) for m in BAR_METRICS
+             if m in at_size and at_size[m].notna().any()]
+    paths += [size_chart(store, m, out_dir) for m in SIZE_METRICS if m in store and store[m].notna().any()]
+    if {"TrainTime_s", "Accuracy", "F1"} <= set(at_size.columns):
+        paths.append(tradeoff_chart(at_size, sample_size, out_dir))
+    model_dir = at_size["OutDir"].iloc[0] if "OutDir" in at_size else None
+    if isinstance(model_dir, str):
+        paths.append(confusion_chart(model_dir, sample_size, out_dir))
+        paths.append(roc_chart(model_dir, at_size, sample_size, out_dir))
+    return [p for p in paths if p is not None]
+
+
+if __name__ == "__main__":
+    import argparse
+    from sample_and_compare import SWEEP_SIZES, parse_size
+
+    parser = argparse.ArgumentParser(description="Train at several sample sizes, store the results and chart them")
+    parser.add_argument("--sizes", nargs="+", default=None,
+                        help="sample sizes to train, e.g. 100k 200k (default 100k..1000k in steps of 100k)")
+    parser.add_argument("--jobs", type=int, default=None, help="sizes to train side by side")
+    parser.add_argument("--collect", action="store_true", help="read existing models_sample*k directories instead")
+    parser.add_argument("--base-dir", default=".", help="with --collect: where the model directories are")
+    parser.add_argument("--charts-only", action="store_true", help="render charts from the store as it is")
+    parser.add_argument("--store", default=RESULTS_FILE)
+    parser.add_argument("--charts-dir", default=CHART_DIR)
+    parser.add_argument("--chart-size", default=None, help="sample size for the per-model charts (default largest)")
+    args = parser.parse_args()
+
+    if args.charts_only:
+        store = pd.read_csv(args.store)
+    elif args.collect:
+        store = update_store(collect(args.base_dir), args.store)
+    else:
+        sizes = [parse_size(s) for s in args.sizes] if args.sizes else SWEEP_SIZES
+        store = update_store(run_training(sizes, args.jobs), args.store)
+
+    chart_size = parse_size(args.chart_size) if args.chart_size else None
+    paths = render_charts(store, args.charts_dir, chart_size)
+    print(f"\n✅ {len(paths)} charts saved in '{args.charts_dir}'")
@@ -0,0 +1,91 @@
+"""
+Float32 vs float64 validation for SecureIoTPredictor
+Replays the saved test split through both pipelines and reports prediction
+disagreement and probability drift per model.
+
+Usage: python validate_float32.py [model_dir] [--max-disagreement 0.001] [--max-drift 0.001]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from secure_predictor import SecureIoTPredictor, MODEL_FILES
+
+
+def run_model(predictor, name, X_raw):
+    model = predictor.models[name]
+    t0 = time.perf_counter()
+    X = predictor.transform(X_raw)
+    pred = model.predict(X)
+    proba = model.predict_proba(X)[:, 1] if hasattr(model, "predict_proba") else None
+    return pred, proba, time.perf_counter() - t0
+
+
+def validate(model_dir, models=None, max_rows=None):
+    split_path = os.path.join(model_dir, "test_split.npz")
+    if not os.path.exists(split_path):
+        raise FileNotFoundError(f"{split_path} not found. Rerun sample_and_compare.py to save the test split.")
+
+    split = np.load(split_path, allow_pickle=False)
+    X_raw, y = split["X_raw"], split["y"]
+    if max_rows is not None:
+        X_raw, y = X_raw[:max_rows], y[:max_rows]
+    print(f"Loaded test split: {X_raw.shape[0]} rows x {X_raw.shape[1]} features")
+
+    p64 = SecureIoTPredictor(model_dir)
+    p32 = SecureIoTPredictor(model_dir, float32=True)
+
+    report = {}
+    for name in models or p64.model_names:
+        pred64, proba64, t64 = run_model(p64, name, X_raw)
+        pred32, proba32, t32 = run_model(p32, name, X_raw)
+
+        disagree = int(np.count_nonzero(pred64 != pred32))
+        drift = np.abs(proba64 - proba32) if proba64 is not None else np.zeros(1)
+        report[name] = {
+            "rows": int(len(y)),
+            "disagreements": disagree,
+            "disagreement_rate": disagree / max(len(y), 1),
+            "max_proba_drift": float(drift.max()),
+            "mean_proba_drift": float(drift.mean()),
+            "accuracy_float64": float(np.mean(pred64 == y)),
+            "accuracy_float32": float(np.mean(pred32 == y)),
+            "time_float64_s": t64,
+            "time_float32_s": t32,
+        }
+    return report
+
+
+def print_report(report):
+    print("\nFloat32 validation report:")
+    print(f"  {'model':<11} {'disagree':>9} {'rate':>9} {'max drift':>11} {'mean drift':>11} "
+          f"{'acc64':>8} {'acc32':>8} {'t64 (s)':>8} {'t32 (s)':>8}")
+    for name, r in report.items():
+        print(f"  {name:<11} {r['disagreements']:>9} {r['disagreement_rate']:>9.2e} "
+              f"{r['max_proba_drift']:>11.2e} {r['mean_proba_drift']:>11.2e} "
+              f"{r['accuracy_float64']:>8.5f} {r['accuracy_float32']:>8.5f} "
+              f"{r['time_float64_s']:>8.3f} {r['time_float32_s']:>8.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare float32 and float64 inference on the saved test split")
+    parser.add_argument("model_dir", nargs="?", default="models_sample1100k")
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_FILES), default=None)
+    parser.add_argument("--max-rows", type=int, default=None)
+    parser.add_argument("--max-disagreement", type=float, default=0.001,
+                        help="maximum allowed fraction of rows whose predicted class changes")
+    parser.add_argument("--max-drift", type=float, default=0.001,
+                        help="maximum allowed absolute change in P(attack) for any row")
+    args = parser.parse_args()
+
+    report = validate(args.model_dir, args.models, args.max_rows)
+    print_report(report)
+
+    failed = [name for name, r in report.items()
+              if r["disagreement_rate"] > args.max_disagreement or r["max_proba_drift"] > args.max_drift]
+    if failed:
+        print(f"\n✗ Float32 error bounds exceeded for: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✓ Float32 pipeline within error bounds for all models")